@@ -35,6 +35,12 @@ urlpatterns = [
     path("leaves/<int:leave_id>/", views.leave_detail, name="leave_detail"),
     path("leaves/<int:leave_id>/approve/", views.approve_leave, name="approve_leave"),
     
+    # Agent Runs (tracing)
+    path("runs/", views.graph_runs, name="graph_runs"),
+    path("runs/<uuid:run_id>/trace/", views.run_trace, name="run_trace"),
+    path("runs/slowest/", views.slowest_runs, name="slowest_runs"),
+    path("runs/<uuid:run_id>/profile/", views.run_profile, name="run_profile"),
+
     # Org Settings
     path("settings/", views.org_settings, name="org_settings"),
 ]
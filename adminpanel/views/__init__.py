@@ -33,3 +33,4 @@ from .leaves import (
     leave_detail,
     approve_leave
 )
+from .runs import graph_runs, run_trace, slowest_runs, run_profile
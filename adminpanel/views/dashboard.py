@@ -1,9 +1,57 @@
+from datetime import timedelta
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from django.db.models import Sum
+from django.utils import timezone
 from core.models.organization import User
+from core.models.usage import TokenUsageRollup, TokenBudget
+from core.observability.usage import estimate_cost
 from .utils import is_org_admin
 
+
+def _usage_summary(org):
+    """Today's token usage by model/node and user, the last 7 days, and the budget position (from day rollups)."""
+    today = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    day_rows = TokenUsageRollup.objects.filter(organization=org, bucket="day")
+
+    by_model = list(
+        day_rows.filter(bucket_start=today)
+        .values("model", "node")
+        .annotate(prompt=Sum("prompt_tokens"), completion=Sum("completion_tokens"), calls=Sum("calls"))
+        .order_by("model", "node")
+    )
+    for row in by_model:
+        row["total"] = row["prompt"] + row["completion"]
+        row["cost"] = estimate_cost(row["model"], row["prompt"], row["completion"])
+
+    by_user = list(
+        day_rows.filter(bucket_start=today)
+        .values("user__username")
+        .annotate(prompt=Sum("prompt_tokens"), completion=Sum("completion_tokens"))
+        .order_by("-prompt")[:5]
+    )
+
+    history = list(
+        day_rows.filter(bucket_start__gte=today - timedelta(days=6))
+        .values("bucket_start")
+        .annotate(prompt=Sum("prompt_tokens"), completion=Sum("completion_tokens"))
+        .order_by("bucket_start")
+    )
+
+    total_today = sum(row["total"] for row in by_model)
+    budget = TokenBudget.objects.filter(organization=org).first()
+    limit = budget and (budget.throttle_at or budget.downgrade_at)
+    return {
+        "usage_by_model": by_model,
+        "usage_by_user": by_user,
+        "usage_history": history,
+        "usage_total_today": total_today,
+        "usage_cost_today": sum(row["cost"] for row in by_model),
+        "usage_budget": budget,
+        "usage_budget_pct": min(int(total_today / limit * 100), 100) if limit else None,
+    }
+
 @login_required
 @user_passes_test(is_org_admin)
 def admin_dashboard(request):
@@ -29,6 +77,8 @@ def admin_dashboard(request):
         "staff_pct": get_pct(staff_users),
         "regular_pct": get_pct(regular_users),
     }
+    if org:
+        context.update(_usage_summary(org))
 
     # Check Google Token Validity (if configured)
     if org and org.google_refresh_token:
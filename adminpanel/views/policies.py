@@ -2,8 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
 from core.models.policy import Policy
-from core.ai.rag.policy_indexer import PolicyIndexer
-import threading
+from core.jobs import enqueue
 from .utils import is_org_admin
 
 @login_required
@@ -45,16 +44,17 @@ def add_policy(request):
                 return render(request, "policies/add.html", {"org": org})
         elif source_type == "url":
             policy.external_url = request.POST.get("external_url")
+            if request.POST.get("crawl"):
+                # Also index the pages linked below the URL (see url_source.crawl)
+                policy.metadata = {"crawl": True}
         
         try:
             policy.save()
             
-            # Auto-trigger indexing
-            indexer = PolicyIndexer()
-            thread = threading.Thread(target=indexer.index_policy, args=(policy.id,))
-            thread.start()
+            # Auto-trigger indexing (picked up by the run_jobs worker)
+            enqueue("index_policy", policy.id, organization_id=org.id if org else None)
             
-            messages.success(request, f"Policy '{title}' added and indexing started.")
+            messages.success(request, f"Policy '{title}' added and queued for indexing.")
             return redirect("manage_policies")
         except Exception as e:
             messages.error(request, f"Error adding policy: {e}")
@@ -69,11 +69,9 @@ def reindex_policy(request, policy_id):
     org = request.user.organization
     policy = get_object_or_404(Policy, id=policy_id, created_by__organization=org)
 
-    indexer = PolicyIndexer()
-    thread = threading.Thread(target=indexer.index_policy, args=(policy.id,))
-    thread.start()
+    enqueue("index_policy", policy.id, organization_id=org.id if org else None)
 
-    messages.success(request, f"Re-indexing started for '{policy.title}'.")
+    messages.success(request, f"Re-indexing queued for '{policy.title}'.")
     return redirect("manage_policies")
 
 
@@ -2,9 +2,13 @@ from core.models import Candidate, JobRole, Interview, EmailLog, CalendarEvent,
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
+from urllib.parse import urlencode
 from adminpanel.forms import CandidateForm, JobForm
+from core.ai.rag.candidate_search import search_candidates
 from .utils import is_org_admin
 
+CANDIDATES_PER_PAGE = 25
+
 @login_required
 @user_passes_test(is_org_admin)
 def recruitment_dashboard(request):
@@ -18,13 +22,34 @@ def recruitment_dashboard(request):
 @login_required
 @user_passes_test(is_org_admin)
 def candidates(request):
-    """View to display list of candidates."""
+    """View to display list of candidates, filtered and (with q) ranked by resume relevance."""
     org = request.user.organization
-    candidates = Candidate.objects.filter(organization=org)
+    filters = {key: request.GET.get(key, "").strip() for key in ("q", "status", "skills", "source")}
+    try:
+        page_number = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        page_number = 1
+
+    page = search_candidates(
+        org.id,
+        query=filters["q"],
+        status=filters["status"],
+        skills=filters["skills"],
+        source=filters["source"],
+        limit=CANDIDATES_PER_PAGE,
+        offset=(page_number - 1) * CANDIDATES_PER_PAGE,
+    )
     
     return render(request, 'recruitment/candidates.html', {
         'org': org,
-        'candidates': candidates,
+        'candidates': page.hits,
+        'filters': filters,
+        'filtered': any(filters.values()),
+        'total': page.total,
+        'page_number': page_number,
+        'previous_page': page_number - 1 if page_number > 1 else None,
+        'next_page': page_number + 1 if page.has_more else None,
+        'querystring': urlencode({k: v for k, v in filters.items() if v}),
     })
 
 @login_required
@@ -0,0 +1,123 @@
+from django.contrib import messages
+from django.db.models import DurationField, ExpressionWrapper, F
+from django.http import HttpResponse
+from django.shortcuts import render, get_object_or_404, redirect
+from django.contrib.auth.decorators import login_required, user_passes_test
+from core.models import GraphRun, GraphRunTrace, GraphRunProfile
+from core.observability.profiling import enable_profiling, FLAG_TIMEOUT
+from .utils import is_org_admin
+
+
+def _waterfall_rows(spans):
+    """Flattens spans into depth-first rows with offset/width as % of the trace."""
+    if not spans:
+        return [], 0
+
+    start = min(s["start"] for s in spans)
+    end = max(s["start"] + s["duration_ms"] / 1000 for s in spans)
+    total_ms = max((end - start) * 1000, 0.001)
+
+    children = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+
+    rows = []
+
+    def walk(parent_id, depth):
+        for s in sorted(children.get(parent_id, []), key=lambda x: x["start"]):
+            offset_ms = (s["start"] - start) * 1000
+            rows.append({
+                "span": s,
+                "depth": depth,
+                "indent": depth * 12,
+                "offset_pct": round(offset_ms / total_ms * 100, 2),
+                "width_pct": max(round(s["duration_ms"] / total_ms * 100, 2), 0.3),
+            })
+            walk(s["span_id"], depth + 1)
+
+    known = {s["span_id"] for s in spans}
+    for root_parent in {s["parent_id"] for s in spans if s["parent_id"] not in known}:
+        walk(root_parent, 0)
+    return rows, round(total_ms, 1)
+
+
+@login_required
+@user_passes_test(is_org_admin)
+def graph_runs(request):
+    """Recent agent runs for the organization."""
+    org = request.user.organization
+    runs = (
+        GraphRun.objects.filter(conversation__organization=org)
+        .select_related("user")
+        .order_by("-started_at")[:100]
+    )
+
+    return render(request, "runs/list.html", {
+        "org": org,
+        "runs": runs,
+    })
+
+
+@login_required
+@user_passes_test(is_org_admin)
+def run_trace(request, run_id):
+    """Waterfall of the spans recorded for one GraphRun."""
+    org = request.user.organization
+    run = get_object_or_404(GraphRun, id=run_id, conversation__organization=org)
+    trace = GraphRunTrace.objects.filter(run=run).first()
+    rows, total_ms = _waterfall_rows(trace.spans if trace else [])
+
+    return render(request, "runs/trace.html", {
+        "org": org,
+        "run": run,
+        "rows": rows,
+        "total_ms": total_ms,
+    })
+
+
+@login_required
+@user_passes_test(is_org_admin)
+def slowest_runs(request):
+    """Finished runs ordered by wall time, with their profiles when one was recorded."""
+    org = request.user.organization
+
+    if request.method == "POST":
+        enable_profiling(organization_id=org.id)
+        messages.success(request, f"Profiling every run of {org.name} for the next {FLAG_TIMEOUT // 60} minutes.")
+        return redirect("slowest_runs")
+
+    runs = (
+        GraphRun.objects.filter(conversation__organization=org, finished_at__isnull=False)
+        .annotate(duration=ExpressionWrapper(F("finished_at") - F("started_at"), output_field=DurationField()))
+        .select_related("user", "profile")
+        .order_by("-duration")[:50]
+    )
+    for run in runs:
+        run.duration_ms = int(run.duration.total_seconds() * 1000)
+        run.has_profile = hasattr(run, "profile")
+
+    return render(request, "runs/slowest.html", {
+        "org": org,
+        "runs": runs,
+    })
+
+
+@login_required
+@user_passes_test(is_org_admin)
+def run_profile(request, run_id):
+    """Top functions by CPU samples and top allocation sites for one profiled run."""
+    org = request.user.organization
+    profile = get_object_or_404(
+        GraphRunProfile.objects.select_related("run__user"), run_id=run_id, run__conversation__organization=org
+    )
+
+    if request.GET.get("format") == "folded":
+        response = HttpResponse(profile.collapsed_stacks, content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{run_id}.folded"'
+        return response
+
+    return render(request, "runs/profile.html", {
+        "org": org,
+        "run": profile.run,
+        "profile": profile,
+    })
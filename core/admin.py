@@ -2,13 +2,11 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.html import format_html
 from django.contrib.auth.hashers import make_password
-from .models import Organization, User, Policy, PolicyChunk
+from .models import Organization, User, Policy, PolicyChunk, TokenBudget, TokenUsageRollup, BackgroundJob
 from .models.recruitment import (
     Candidate, JobRole, Interview, EmailLog, 
     CalendarEvent, LeaveRequest, CandidateJobScore
 )
-from core.ai.rag.policy_indexer import PolicyIndexer
-import threading
 
 
 # ─────────────────────────────
@@ -152,6 +150,57 @@ class CandidateJobScoreAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at",)
 
 
+# ─────────────────────────────
+# LLM Usage & Budgets
+# ─────────────────────────────
+@admin.register(TokenBudget)
+class TokenBudgetAdmin(admin.ModelAdmin):
+    list_display = ("organization", "downgrade_at", "throttle_at", "updated_at")
+    search_fields = ("organization__name", "organization__org_id")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        from core.observability.usage import invalidate_budget
+        invalidate_budget(obj.organization_id)
+
+
+@admin.register(TokenUsageRollup)
+class TokenUsageRollupAdmin(admin.ModelAdmin):
+    list_display = ("bucket_start", "bucket", "organization", "user", "model", "node", "prompt_tokens", "completion_tokens", "calls")
+    list_filter = ("bucket", "model", "node", "organization")
+    date_hierarchy = "bucket_start"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# ─────────────────────────────
+# Background Jobs
+# ─────────────────────────────
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "entity_id", "organization", "status", "attempts", "run_after", "finished_at")
+    list_filter = ("status", "kind")
+    search_fields = ("entity_id", "last_error")
+    readonly_fields = ("created_at", "started_at", "finished_at", "worker")
+    actions = ["retry_now"]
+
+    @admin.action(description="Retry selected failed jobs now")
+    def retry_now(self, request, queryset):
+        from django.utils import timezone
+        count = 0
+        for job in queryset.filter(status="failed"):
+            # At most one queued job per entity (background_job_one_queued)
+            if not BackgroundJob.objects.filter(kind=job.kind, entity_id=job.entity_id, status="queued").exists():
+                job.status, job.attempts, job.run_after = "queued", 0, timezone.now()
+                job.save(update_fields=["status", "attempts", "run_after"])
+                count += 1
+        self.message_user(request, f"Re-queued {count} job(s).")
+
+
 # ─────────────────────────────
 # Customize Admin Branding
 # ─────────────────────────────
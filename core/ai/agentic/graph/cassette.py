@@ -0,0 +1,252 @@
+"""
+Record/replay cassettes for LLM calls.
+
+The LLM factories in tools_registry wrap their ChatGroq in a CassetteChatModel
+when a cassette is active, either through HARVEY_LLM_CASSETTE and
+HARVEY_LLM_CASSETTE_MODE or with `use_cassette()` in tests and benchmarks.
+
+Modes:
+- record:       always call the provider; store every request/response pair.
+- replay:       serve recorded responses only; a miss raises CassetteMiss.
+- new_episodes: replay hits, call the provider (and record) on misses.
+
+Interactions are keyed by a hash of the model, the normalized messages, bound
+tools and call options. Normalization strips values that change between runs
+(current date/time, UUIDs, ISO timestamps), so the dynamic system prompt still
+matches. Responses keep their token-usage metadata, and every cassette also keeps
+an ordered call log (model, graph node, prompt/completion tokens). The
+`llm_cassette_tokens` command diffs that log between two recordings.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+from django.conf import settings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import messages_from_dict, messages_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from core.observability.context import get_turn_value
+
+logger = logging.getLogger("harvey")
+
+MODES = ("off", "record", "replay", "new_episodes")
+
+_VOLATILE = [
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<uuid>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?"), "<datetime>"),
+    (re.compile(r"\b\d{4}-\d{2}-\d{2}\b"), "<date>"),
+    (re.compile(
+        r"\b(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday),\s+"
+        r"(January|February|March|April|May|June|July|August|September|October|November|December)"
+        r"\s+\d{1,2},\s+\d{4}(,\s+\d{1,2}:\d{2}\s*[AP]M)?"
+    ), "<date>"),
+    (re.compile(r"\b\d{1,2}:\d{2}(:\d{2})?\s*([AP]M)?\b"), "<time>"),
+    (re.compile(r"\s+"), " "),
+]
+
+
+class CassetteMiss(LookupError):
+    """Replay mode found no recording for a request."""
+
+
+def normalize_text(text):
+    text = str(text)
+    for pattern, replacement in _VOLATILE:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def _message_key(message):
+    return {
+        "type": message.type,
+        "content": normalize_text(message.content if isinstance(message.content, str) else json.dumps(message.content)),
+        "tool_calls": [
+            {"name": c["name"], "args": normalize_text(json.dumps(c["args"], sort_keys=True))}
+            for c in getattr(message, "tool_calls", None) or []
+        ],
+    }
+
+
+def prompt_hash(model, messages, stop=None, **kwargs):
+    """Stable key for a chat request; insensitive to dates, times and ids embedded in prompts."""
+    tools = kwargs.pop("tools", None) or []
+    payload = {
+        "model": model,
+        "messages": [_message_key(m) for m in messages],
+        "tools": sorted(t.get("function", {}).get("name", "") for t in tools),
+        "stop": stop,
+        "options": {k: v for k, v in sorted(kwargs.items()) if isinstance(v, (str, int, float, bool, type(None)))},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:32]
+
+
+class Cassette:
+    """One JSON file of recorded interactions plus the ordered call log."""
+
+    def __init__(self, path, mode="replay"):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode!r}, expected one of {MODES}")
+        self.path = str(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._cursor = {}
+        self.interactions = {}
+        self.log = []
+        if os.path.exists(self.path) and mode != "record":
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.interactions = data.get("interactions", {})
+            self.log = data.get("log", [])
+
+    def lookup(self, key):
+        """Next recording for `key` (repeated identical requests replay in recorded order, then repeat the last)."""
+        with self._lock:
+            recordings = self.interactions.get(key)
+            if not recordings:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return recordings[min(index, len(recordings) - 1)]
+
+    def record(self, key, model, result, latency_ms):
+        usage = (result.llm_output or {}).get("token_usage")
+        if not usage and result.generations:
+            usage = result.generations[0].message.response_metadata.get("token_usage")
+        usage = usage or {}
+        entry = {
+            "model": model,
+            "latency_ms": round(latency_ms, 1),
+            "generations": [
+                {"message": messages_to_dict([g.message])[0], "generation_info": g.generation_info}
+                for g in result.generations
+            ],
+            "llm_output": result.llm_output,
+        }
+        with self._lock:
+            self.interactions.setdefault(key, []).append(entry)
+            self.log.append({
+                "key": key,
+                "model": model,
+                "node": get_turn_value("node") or "",
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+            })
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "interactions": self.interactions, "log": self.log}, f, indent=1, default=str)
+        os.replace(tmp, self.path)
+
+
+def _to_result(entry):
+    generations = [
+        ChatGeneration(message=messages_from_dict([g["message"]])[0], generation_info=g.get("generation_info"))
+        for g in entry["generations"]
+    ]
+    return ChatResult(generations=generations, llm_output=entry.get("llm_output"))
+
+
+class CassetteChatModel(BaseChatModel):
+    """Wraps a chat model; records or replays its `_generate` calls through a Cassette."""
+
+    inner: BaseChatModel
+    cassette: Any
+    model_name: str = ""
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    @property
+    def _identifying_params(self):
+        return {"model_name": self.model_name, "cassette": self.cassette.path, "mode": self.cassette.mode}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _generate(self, messages: List, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        key = prompt_hash(self.model_name, messages, stop, **dict(kwargs))
+        mode = self.cassette.mode
+
+        if mode in ("replay", "new_episodes"):
+            entry = self.cassette.lookup(key)
+            if entry is not None:
+                _replay_delay(entry)
+                return _to_result(entry)
+            if mode == "replay":
+                raise CassetteMiss(
+                    f"No recording for {self.model_name} request {key} in {self.cassette.path}; "
+                    "re-record with HARVEY_LLM_CASSETTE_MODE=new_episodes"
+                )
+
+        start = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        self.cassette.record(key, self.model_name, result, (time.perf_counter() - start) * 1000)
+        return result
+
+
+def _replay_delay(entry):
+    latency = getattr(settings, "HARVEY_LLM_CASSETTE_LATENCY", "recorded")
+    if latency == "recorded":
+        seconds = entry.get("latency_ms", 0) / 1000
+    else:
+        seconds = float(latency or 0) / 1000
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+# ─────────────────────────────
+# Activation
+# ─────────────────────────────
+_active = None
+_configured = None
+
+
+def active_cassette():
+    """The cassette set with use_cassette(), else the one configured in settings (loaded once)."""
+    global _configured
+    if _active is not None:
+        return _active
+    mode = getattr(settings, "HARVEY_LLM_CASSETTE_MODE", "off")
+    path = getattr(settings, "HARVEY_LLM_CASSETTE", "")
+    if mode == "off" or not path:
+        return None
+    if _configured is None or _configured.path != str(path) or _configured.mode != mode:
+        _configured = Cassette(path, mode)
+    return _configured
+
+
+@contextmanager
+def use_cassette(path, mode="replay"):
+    global _active
+    previous, _active = _active, Cassette(path, mode)
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+
+def replaying():
+    cassette = active_cassette()
+    return cassette is not None and cassette.mode == "replay"
+
+
+def wrap(llm, model_name):
+    """Returns `llm` unchanged, or wrapped in the active cassette."""
+    cassette = active_cassette()
+    if cassette is None:
+        return llm
+    return CassetteChatModel(inner=llm, cassette=cassette, model_name=model_name)
@@ -1,15 +1,18 @@
 import json
 import logging
+import uuid
 from django.utils import timezone
 from pydantic import BaseModel
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
 from django.core.cache import cache
-from google.api_core.exceptions import ResourceExhausted
 
-from .graph import graph
+from .graph import get_graph
 from core.models.chatbot import Conversation, Message, GraphRun
-from .tools_registry import tool_registry
+from .write_behind import write_behind, to_record
+from core.observability.context import turn_context
+from core.observability.metrics import TOOL_SECONDS
+from core.observability.tracing import span, current_span, tracing_enabled, get_llm_callback
+from core.observability.profiling import profile_run, ProfileResult
+from core.observability.usage import budget_state, BUDGET_THROTTLE
 
 logger = logging.getLogger("harvey")
 
@@ -33,27 +36,64 @@ def _content_to_text(content):
     return str(content)
 
 
-def _save_chat(convo, user, user_input, ai_output):
-    Message.objects.create(
-        sender="user",
-        message_text=user_input,
-        conversation=convo,
-        organization=user.organization,
-    )
-    ai_msg = Message.objects.create(
-        sender="ai",
-        message_text=ai_output,
+def _build_message(convo, user, sender, text):
+    return Message(
+        sender=sender,
+        message_text=Message.encrypt_text(text),
         conversation=convo,
         organization=user.organization,
+        client_id=uuid.uuid4(),
+        timestamp=timezone.now(),
     )
+
+
+def _save_chat(convo, user, user_input, ai_output, run=None, extra_records=()):
+    """Queues the run metadata (plus its profile, if any) and both chat messages for write-behind persistence."""
+    user_msg = _build_message(convo, user, "user", user_input)
+    ai_msg = _build_message(convo, user, "ai", ai_output)
+
+    records = [to_record(run)] if run is not None else []
+    records += list(extra_records)
+    records += [to_record(user_msg), to_record(ai_msg)]
+    write_behind.submit(records)
     return ai_msg
 
 
+def __getattr__(name):
+    # `chat_service.graph` (as patched by tests) is the shared graph, built on first access
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _save_run(run, extra_records=()):
+    write_behind.submit([to_record(run)] + list(extra_records))
+
+
 def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
+    with span("chat.generate_llm_reply", user_id=user.id, organization_id=user.organization_id):
+        return _generate_llm_reply(prompt, user, conversation_id, request)
+
+
+def _generate_llm_reply(prompt, user, conversation_id=None, request=None):
+    # LangChain, LangGraph and the tool/LLM modules load with the graph, not with this
+    # module, so importing the consumer stays cheap (core.warmup preloads them at startup)
+    from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+    from langchain_core.runnables import RunnableConfig
+    from google.api_core.exceptions import ResourceExhausted
+    from .tools_registry import tool_registry
+
     # 1. Check for Rate Limit Block
     if cache.get(f"chat_block_{user.id}"):
         return LLMResponse(response=" System is cooling down due to high traffic. Please try again in 60 seconds.", conversation_id=0, title="Error")
 
+    if budget_state(user.organization_id) == BUDGET_THROTTLE:
+        logger.warning(f"Token budget exhausted for organization {user.organization_id}")
+        return LLMResponse(response=" Your organization has reached its daily AI usage limit. Chat will resume tomorrow.", conversation_id=0, title="Error")
+
+    # Only turns that get past the cooldown and budget checks pay for building the graph
+    graph = get_graph()
+
     if conversation_id:
         try:
             convo = Conversation.objects.get(id=conversation_id, user=user)
@@ -69,18 +109,24 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
             title=title,
         )
 
-    run = GraphRun.objects.create(
+    # Not inserted here: the row is written once, behind the reply, when the turn ends
+    run = GraphRun(
         conversation=convo,
         user=user,
         input_text=prompt,
         status="running",
     )
 
+    turn_span = current_span()
+    if turn_span:
+        turn_span.set_attribute("graph_run_id", str(run.id))
+
     thread_id = f"convo-{convo.id}"
 
     config = RunnableConfig(
         configurable={"thread_id": thread_id},
         metadata={"graph_run_id": str(run.id)},
+        callbacks=[get_llm_callback()] if tracing_enabled() else None,
     )
 
     checkpoint = graph.get_state(config=config)
@@ -99,8 +145,14 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
     # Summary logging instead of full dump to avoid Unicode errors and massive logs
     logger.debug(f"Graph invoke. User: {user.username}, Msg Count: {len(state_input.get('messages', []))}")
 
+    profile = ProfileResult()
     try:
-        result = graph.invoke(state_input, config=config)
+        with turn_context(
+            organization_id=user.organization_id,
+            user_id=user.id,
+            graph_run_id=str(run.id),
+        ), profile_run(user, run) as profile:
+            result = graph.invoke(state_input, config=config)
         # Reduce log verbosity: only show keys and last message preview
         msgs = result.get("messages", [])
         last_msg = msgs[-1].content[:50] + "..." if msgs else "No messages"
@@ -118,7 +170,8 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
             if tool_func:
                 tool_args["user"] = user
                 try:
-                    raw = tool_func(**tool_args)
+                    with TOOL_SECONDS.time(tool=tool_name), span("tool", tool=tool_name):
+                        raw = tool_func(**tool_args)
                     data = json.loads(raw)
                     tool_msg = data.get("message", "Action completed.")
                     # Append tool result to messages for history
@@ -146,16 +199,13 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
         else:
             final_text = "Action completed."
 
-        # Save DB run metadata
+        # Run metadata + chat history are flushed by the write-behind buffer
         run.status = "success"
         run.output_text = final_text
         run.trace = result.get("trace", [])
         run.finished_at = timezone.now()
-        run.save()
 
-        # Save chat history
-        # Save chat history
-        ai_msg = _save_chat(convo, user, prompt, final_text)
+        ai_msg = _save_chat(convo, user, prompt, final_text, run, profile.records)
 
         return LLMResponse(
             response=final_text,
@@ -171,7 +221,8 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
         
         run.status = "error"
         run.error_message = "Rate Limit Exceeded (429)"
-        run.save()
+        run.finished_at = timezone.now()
+        _save_run(run, profile.records)
         
         return LLMResponse(
             response=" API Rate limit reached. System is cooling down. Please wait 60 seconds.",
@@ -186,7 +237,7 @@ def generate_llm_reply(prompt: str, user, conversation_id=None, request=None):
         run.error_message = str(e)
         run.finished_at = timezone.now()
         try:
-            run.save()
+            _save_run(run, profile.records)
         except Exception as db_err:
             logger.error(f"Failed to update GraphRun status: {db_err}")
 
@@ -1,40 +1,83 @@
+import functools
+import threading
 
-import sqlite3
-from langgraph.graph import StateGraph
-from langgraph.checkpoint.sqlite import SqliteSaver
-from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from core.observability.context import turn_context
+from core.observability.metrics import GRAPH_NODE_SECONDS
+from core.observability.tracing import span
 
-from .state import HarveyState
-from .nodes import harvey_node, execute_node, should_execute, summary_node, router_node
+# Built on first use (or by core.warmup): importing this module must stay cheap, because
+# the consumer, the chat view and therefore every `manage.py` command's URL check import it.
+_graph = None
+_checkpointer = None
+_lock = threading.Lock()
 
-# Ensure DB creates tables automatically with pickle fallback enabled
-serde = JsonPlusSerializer(pickle_fallback=True)
 
-conn = sqlite3.connect("checkpoints.db", check_same_thread=False)
+def instrumented(name, node):
+    """Wraps a node so every execution is timed (latency histogram), traced (span) and token usage is attributed to it."""
+    @functools.wraps(node)
+    def wrapper(state):
+        with GRAPH_NODE_SECONDS.time(node=name), span(f"node.{name}"), turn_context(node=name):
+            return node(state)
+    return wrapper
 
-checkpointer = SqliteSaver(
-    conn,
-    serde=serde
-)
 
-workflow = StateGraph(HarveyState)
+def _build():
+    import sqlite3
+    from langgraph.graph import StateGraph
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
 
-workflow.add_node("ROUTER", router_node)
-workflow.add_node("HARVEY", harvey_node)
-workflow.add_node("TOOL", execute_node)
-workflow.add_node("SUM", summary_node)
+    from .state import HarveyState
+    from .nodes import harvey_node, execute_node, should_execute, summary_node, router_node
 
-workflow.set_entry_point("ROUTER")
-workflow.add_edge("ROUTER", "HARVEY")
+    # Ensure DB creates tables automatically with pickle fallback enabled
+    serde = JsonPlusSerializer(pickle_fallback=True)
 
-# ... (rest of edges) ...
+    conn = sqlite3.connect("checkpoints.db", check_same_thread=False)
 
-workflow.add_conditional_edges(
-    "HARVEY",
-    should_execute,
-    {True: "TOOL", False: "SUM"}
-)
+    checkpointer = SqliteSaver(
+        conn,
+        serde=serde
+    )
 
-workflow.add_edge("TOOL", "HARVEY")
+    workflow = StateGraph(HarveyState)
 
-graph = workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
+    workflow.add_node("ROUTER", instrumented("ROUTER", router_node))
+    workflow.add_node("HARVEY", instrumented("HARVEY", harvey_node))
+    workflow.add_node("TOOL", instrumented("TOOL", execute_node))
+    workflow.add_node("SUM", instrumented("SUM", summary_node))
+
+    workflow.set_entry_point("ROUTER")
+    workflow.add_edge("ROUTER", "HARVEY")
+
+    # ... (rest of edges) ...
+
+    workflow.add_conditional_edges(
+        "HARVEY",
+        should_execute,
+        {True: "TOOL", False: "SUM"}
+    )
+
+    workflow.add_edge("TOOL", "HARVEY")
+
+    return workflow.compile(checkpointer=checkpointer), checkpointer
+
+
+def get_graph():
+    """The compiled chat graph (with its sqlite checkpointer), built once per process."""
+    global _graph, _checkpointer
+    if _graph is None:
+        with _lock:
+            if _graph is None:
+                _graph, _checkpointer = _build()
+    return _graph
+
+
+def __getattr__(name):
+    # `from core.ai.agentic.graph.graph import graph` keeps working, building on access
+    if name == "graph":
+        return get_graph()
+    if name == "checkpointer":
+        get_graph()
+        return _checkpointer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
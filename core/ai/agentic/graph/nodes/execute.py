@@ -4,6 +4,8 @@ import logging
 from langchain_core.messages import ToolMessage, AIMessage
 from ..tools_registry import tool_registry
 from .utils import get_state_value, append_trace, set_state_value, get_user
+from core.observability.metrics import TOOL_SECONDS
+from core.observability.tracing import span
 
 logger = logging.getLogger("harvey")
 
@@ -36,7 +38,8 @@ def execute_node(state):
         if "user" in args:
             del args["user"]
 
-        result = func(user=user, **args)
+        with TOOL_SECONDS.time(tool=call["name"]), span("tool", tool=call["name"]):
+            result = func(user=user, **args)
         parsed = json.loads(result)
         message = parsed.get("message", result)
 
@@ -47,7 +47,7 @@ def get_user(state):
     return None
 
 def log_token_usage(response, model_label):
-    """Extract and log token usage from AIMessage metadata."""
+    """Extract and log token usage from AIMessage metadata (also counted in metrics and usage rollups)."""
     if hasattr(response, "response_metadata"):
         usage = response.response_metadata.get("token_usage")
         if usage:
@@ -55,3 +55,12 @@ def log_token_usage(response, model_label):
             completion = usage.get("completion_tokens", 0)
             total = usage.get("total_tokens", 0)
             logger.info(f"-> [TOKENS] {model_label} (Prompt: {prompt}, Completion: {completion}, Total: {total})")
+
+            from core.observability.context import get_turn_value
+            from core.observability.metrics import LLM_TOKENS
+            from core.observability.usage import record_usage
+            model = response.response_metadata.get("model_name") or model_label
+            org = get_turn_value("organization_id") or "none"
+            LLM_TOKENS.inc(prompt, model=model, organization=org, kind="prompt")
+            LLM_TOKENS.inc(completion, model=model, organization=org, kind="completion")
+            record_usage(model, prompt, completion)
@@ -1,4 +1,5 @@
 import os
+import logging
 from dotenv import load_dotenv
 load_dotenv()
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -46,38 +47,35 @@ tool_registry = {t.name: t.func for t in AVAILABLE_TOOLS}
 
 from langchain_groq import ChatGroq
 
+logger = logging.getLogger("harvey")
+
+def _groq(model, temperature):
+    """ChatGroq for `model`, wrapped in the active LLM cassette if one is configured."""
+    from .cassette import wrap, replaying
+
+    groq_key = os.getenv("GROQ_API_KEY")
+    if not groq_key:
+        if not replaying():
+            raise ValueError("GROQ_API_KEY not set")
+        groq_key = "replay"  # never sent: every response comes from the cassette
+
+    return wrap(ChatGroq(model=model, temperature=temperature, api_key=groq_key), model)
+
+
 def get_router_llm():
     """Small, fast model for intent classification"""
-    groq_key = os.getenv("GROQ_API_KEY")
-    if not groq_key: 
-        raise ValueError("GROQ_API_KEY not set")
-        
-    return ChatGroq(
-        model="llama-3.1-8b-instant",
-        temperature=0.0,
-        api_key=groq_key
-    )
+    return _groq("llama-3.1-8b-instant", 0.0)
 
 def get_reasoner_llm():
     """Llama 4 Scout: specialized 2026-gen model for agentic reasoning and tool use"""
-    groq_key = os.getenv("GROQ_API_KEY")
-    if not groq_key:
-         raise ValueError("GROQ_API_KEY not set")
+    from core.observability.usage import budget_state, BUDGET_OK
+    if budget_state() != BUDGET_OK:
+        # Organization is over its downgrade budget for today
+        logger.info("Token budget reached: reasoner downgraded to 8B")
+        return get_router_llm()
 
-    return ChatGroq(
-        model="meta-llama/llama-4-scout-17b-16e-instruct",
-        temperature=0.0,
-        api_key=groq_key
-    )
+    return _groq("meta-llama/llama-4-scout-17b-16e-instruct", 0.0)
 
 def get_lite_llm():
     """Fast model for simple NLP normalization and rephrasing"""
-    groq_key = os.getenv("GROQ_API_KEY")
-    if not groq_key:
-         raise ValueError("GROQ_API_KEY not set")
-
-    return ChatGroq(
-        model="llama-3.1-8b-instant",
-        temperature=0.1,
-        api_key=groq_key
-    )
+    return _groq("llama-3.1-8b-instant", 0.1)
@@ -0,0 +1,289 @@
+"""
+Write-behind persistence for chat turns.
+
+`generate_llm_reply` hands its Message/GraphRun rows to `submit()` instead of
+saving them inline. Each turn becomes one entry on a Redis stream; a background
+flusher reads entries in small batches, writes them with `bulk_create` inside a
+single transaction and only then acknowledges them. Entries left pending by a
+crashed worker are reclaimed by the next flusher, and `shutdown()` drains the
+stream on process exit. If Redis is unreachable (or HARVEY_WRITE_BEHIND is off)
+records are written synchronously so nothing is dropped.
+
+A batch that fails because the database is unreachable (OperationalError,
+InterfaceError) is left pending and retried through XAUTOCLAIM. Only an entry
+that fails on its own for any other reason (IntegrityError, DataError, a
+record that no longer deserializes) goes to the dead-letter stream;
+`manage.py redrive_write_behind` replays it once the cause is fixed.
+"""
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import InterfaceError, OperationalError, close_old_connections, models, transaction
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger("harvey")
+
+STREAM_KEY = "harvey:write_behind"
+DEAD_LETTER_KEY = "harvey:write_behind:dead"
+GROUP = "harvey-writers"
+
+# The database, not the entry, is the problem: retry later rather than dead-letter
+TRANSIENT_ERRORS = (OperationalError, InterfaceError)
+
+# Parents first, so FK targets exist when children are inserted in the same batch
+FLUSH_ORDER = ["core.graphrun", "core.graphruntrace", "core.graphrunprofile", "core.message"]
+
+# bulk_create options per model. Replays after a crash must be idempotent.
+WRITE_POLICIES = {
+    "core.graphrun": {
+        "update_conflicts": True,
+        "unique_fields": ["id"],
+        "update_fields": ["output_text", "status", "error_message", "trace", "finished_at"],
+    },
+    "core.graphruntrace": {
+        "update_conflicts": True,
+        "unique_fields": ["run"],
+        "update_fields": ["spans"],
+    },
+    "core.graphrunprofile": {"ignore_conflicts": True},
+    "core.message": {"ignore_conflicts": True},
+}
+
+
+def to_record(instance):
+    """Serializable snapshot of a model instance: {"model": label, "fields": {...}}."""
+    fields = {}
+    for field in instance._meta.concrete_fields:
+        value = field.value_from_object(instance)
+        if field.primary_key and value is None:
+            continue
+        fields[field.attname] = value
+    return {"model": instance._meta.label_lower, "fields": fields}
+
+
+def _from_record(record):
+    model = apps.get_model(record["model"])
+    fields = {}
+    for name, value in record["fields"].items():
+        field = model._meta.get_field(name)  # accepts attnames like conversation_id
+        if isinstance(value, str) and isinstance(field, models.DateTimeField):
+            value = parse_datetime(value)
+        elif isinstance(value, str) and isinstance(field, models.UUIDField):
+            value = uuid.UUID(value)
+        fields[name] = value
+    return model(**fields)
+
+
+def apply_records(records):
+    """Writes records in FLUSH_ORDER, one bulk_create per model, in a single transaction."""
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record["model"], []).append(_from_record(record))
+
+    order = FLUSH_ORDER + [label for label in grouped if label not in FLUSH_ORDER]
+    with transaction.atomic():
+        for label in order:
+            objs = grouped.get(label)
+            if objs:
+                objs[0].__class__.objects.bulk_create(objs, **WRITE_POLICIES.get(label, {}))
+
+
+class WriteBehindBuffer:
+    def __init__(self, stream_key=STREAM_KEY):
+        self.stream_key = stream_key
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    # --- settings (read per call so override_settings works in tests) ---
+
+    @property
+    def enabled(self):
+        return getattr(settings, "HARVEY_WRITE_BEHIND", True)
+
+    @property
+    def batch_size(self):
+        return getattr(settings, "HARVEY_WRITE_BEHIND_BATCH", 50)
+
+    @property
+    def interval_ms(self):
+        return getattr(settings, "HARVEY_WRITE_BEHIND_INTERVAL_MS", 200)
+
+    def _client(self):
+        from core.redis_utils import get_redis_client
+        return get_redis_client()
+
+    # --- producer side ---
+
+    def submit(self, records):
+        """Queues one turn's records. Falls back to a synchronous write if the stream is unavailable."""
+        if not records:
+            return
+        if self.enabled:
+            try:
+                self._ensure_started()
+                payload = json.dumps(records, cls=DjangoJSONEncoder)
+                self._client().xadd(self.stream_key, {"data": payload})
+                return
+            except Exception as e:
+                logger.warning(f"Write-behind unavailable, writing inline: {e}")
+        apply_records(records)
+
+    # --- consumer side ---
+
+    def _ensure_started(self):
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._ensure_group()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="harvey-write-behind", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+
+    def _ensure_group(self):
+        import redis
+        try:
+            self._client().xgroup_create(self.stream_key, GROUP, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _reclaim(self):
+        """Takes over entries another (dead) consumer read but never acknowledged."""
+        idle_ms = getattr(settings, "HARVEY_WRITE_BEHIND_RECLAIM_MS", 30000)
+        result = self._client().xautoclaim(
+            self.stream_key, GROUP, self.consumer,
+            min_idle_time=idle_ms, start_id="0-0", count=self.batch_size,
+        )
+        entries = result[1] if len(result) > 1 else []
+        if entries:
+            logger.info(f"Write-behind: reclaimed {len(entries)} pending entries")
+            self._process(entries)
+
+    def flush(self, block_ms=None):
+        """Reads and writes one batch. Returns the number of stream entries persisted."""
+        response = self._client().xreadgroup(
+            GROUP, self.consumer, {self.stream_key: ">"},
+            count=self.batch_size, block=block_ms,
+        )
+        entries = response[0][1] if response else []
+        return self._process(entries)
+
+    def _process(self, entries):
+        if not entries:
+            return 0
+
+        batch = []
+        for entry_id, data in entries:
+            raw = data.get(b"data") or data.get("data")
+            batch.append((entry_id, json.loads(raw)))
+
+        close_old_connections()
+        try:
+            apply_records([r for _, records in batch for r in records])
+            done = [entry_id for entry_id, _ in batch]
+        except TRANSIENT_ERRORS as e:
+            logger.warning(f"Write-behind batch of {len(batch)} left pending, database unavailable: {e}")
+            done = []
+        except Exception as e:
+            # Isolate the poisoned entry so the rest of the batch still lands
+            logger.error(f"Write-behind batch failed, retrying entries one by one: {e}")
+            done = []
+            for entry_id, records in batch:
+                try:
+                    apply_records(records)
+                except TRANSIENT_ERRORS as entry_err:
+                    # This entry and the rest stay pending for the next reclaim
+                    logger.warning(f"Write-behind entry {entry_id} left pending, database unavailable: {entry_err}")
+                    break
+                except Exception as entry_err:
+                    logger.error(f"Write-behind entry {entry_id} moved to dead letter: {entry_err}")
+                    self._client().xadd(DEAD_LETTER_KEY, {"data": json.dumps(records), "error": str(entry_err)})
+                done.append(entry_id)
+        finally:
+            close_old_connections()
+
+        if done:
+            client = self._client()
+            client.xack(self.stream_key, GROUP, *done)
+            client.xdel(self.stream_key, *done)
+        return len(done)
+
+    def redrive(self, limit=None):
+        """
+        Replays dead-lettered entries, oldest first. An entry that now writes is removed
+        from the dead-letter stream; one that still fails stays there with its new error.
+        Returns (replayed, still failing).
+        """
+        client = self._client()
+        replayed = failed = 0
+        start = "-"
+        while limit is None or replayed + failed < limit:
+            count = self.batch_size if limit is None else min(self.batch_size, limit - replayed - failed)
+            entries = client.xrange(DEAD_LETTER_KEY, min=start, count=count)
+            if not entries:
+                break
+            for entry_id, data in entries:
+                raw = data.get(b"data") or data.get("data")
+                try:
+                    apply_records(json.loads(raw))
+                except TRANSIENT_ERRORS:
+                    raise
+                except Exception as e:
+                    logger.error(f"Dead-lettered write-behind entry {entry_id} still fails: {e}")
+                    failed += 1
+                    continue
+                finally:
+                    close_old_connections()
+                client.xdel(DEAD_LETTER_KEY, entry_id)
+                replayed += 1
+            last = entries[-1][0]
+            start = "(" + (last.decode() if isinstance(last, bytes) else last)
+        return replayed, failed
+
+    def _run(self):
+        self._safe(self._reclaim)
+        loops = 0
+        while not self._stop.is_set():
+            self._safe(lambda: self.flush(block_ms=self.interval_ms))
+            loops += 1
+            if loops % 100 == 0:
+                self._safe(self._reclaim)
+
+    def _safe(self, fn):
+        try:
+            fn()
+        except Exception as e:
+            logger.error(f"Write-behind flusher error: {e}")
+            self._stop.wait(1)
+
+    def shutdown(self, timeout=5):
+        """Stops the flusher and drains whatever this process still has queued."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        try:
+            while self.flush(block_ms=None):
+                pass
+        except Exception as e:
+            logger.error(f"Write-behind drain on shutdown failed: {e}")
+
+
+write_behind = WriteBehindBuffer()
@@ -4,6 +4,7 @@ from langchain_core.tools import tool
 from core.models.recruitment import Candidate, CandidateJobScore, JobRole
 from core.ai.utils.resume_parser import ResumeParser
 from core.ai.utils.candidate_scorer import CandidateScorer
+from core.ai.rag.candidate_search import search_candidates
 from core.ai.agentic.tools.utils import ok, err, get_org
 import os
 
@@ -81,38 +82,30 @@ def add_candidate_with_resume(file_path: str, name: str = "", email: str = "", p
 
 
 @tool("list_candidates", return_direct=True)
-def list_candidates(name: str = "", email: str = "", status: str = "", limit: int = 10, user=None) -> str:
+def list_candidates(name: str = "", email: str = "", status: str = "", skills: str = "", query: str = "", limit: int = 10, user=None) -> str:
     """
     Lists candidates with optional filters.
     Use this to search for candidates or see who has applied.
+    skills is a comma-separated list the candidate must all have; query ranks by
+    resume relevance (e.g. "kubernetes migrations").
     """
     org = get_org(user)
     if not org:
         return err("User is not associated with any organization.")
 
-    candidates = Candidate.objects.filter(organization=org)
-
-    if name:
-        candidates = candidates.filter(name__icontains=name)
-    if email:
-        candidates = candidates.filter(email__icontains=email)
-    if status:
-        candidates = candidates.filter(status__iexact=status)
-
-    count = candidates.count()
-    candidates = candidates.order_by("-created_at")[:limit]
+    page = search_candidates(org.id, query=query, name=name, email=email, status=status, skills=skills, limit=limit)
 
-    if count == 0:
+    if page.total == 0:
         return ok("No candidates found matching your criteria.")
 
     # NLP-friendly output
-    lines = [f"I found {count} candidate(s) (showing top {len(candidates)}):"]
+    lines = [f"I found {page.total} candidate(s) (showing top {len(page.hits)}):"]
     results = []
     
-    for c in candidates:
+    for c in page.hits:
         line = f"• {c.name} ({c.email}) - {c.status}"
         lines.append(line)
-        results.append({"id": c.id, "name": c.name, "email": c.email, "status": c.status})
+        results.append(c.as_dict())
 
     return ok("\n".join(lines), results=results)
 
@@ -178,18 +171,11 @@ def shortlist_candidates(skills: str = "", job_role_id: int = None, limit: int =
     if job_role_id:
         try:
             job_role = JobRole.objects.get(id=job_role_id, organization=org)
-            scorer = CandidateScorer()
-            
+            # Stored scores in one query; the rest scored in concurrent batches and saved together
+            scores = CandidateScorer().score_candidates(candidates, job_role)
+
             for c in candidates:
-                # Check if score exists
-                score_obj = CandidateJobScore.objects.filter(candidate=c, job_role=job_role).first()
-                if score_obj:
-                    score = score_obj.score
-                    justification = score_obj.justification
-                else:
-                    # Compute score
-                    score, justification = scorer.score_candidate(c, job_role)
-                
+                score, justification = scores[c.id]
                 scored_results.append({
                     "id": c.id,
                     "name": c.name,
@@ -213,14 +199,12 @@ def shortlist_candidates(skills: str = "", job_role_id: int = None, limit: int =
     if not skills:
         return err("Please provide either a job_role_id or skills to shortlist.")
 
-    skills_list = [s.strip().lower() for s in skills.split(",")]
-    
+    # Candidates with any of the skills, best resume match first (not yet indexed ones last)
+    page = search_candidates(org.id, query=f"Skills: {skills}", skills=skills, skills_match="any", limit=limit)
     matched = [
-        {"id": c.id, "name": c.name}
-        for c in candidates
-        if any(skill in (",".join(c.skills or [])).lower() for skill in skills_list)
+        {"id": c.id, "name": c.name, "score": round(c.score, 3) if c.score is not None else None}
+        for c in page.hits
     ]
-    matched = matched[:limit]
 
     msg = f"I found the following candidates matching the skills: {', '.join(c['name'] for c in matched) or 'None found'}."
     return ok(msg, results=matched)
@@ -238,18 +238,11 @@ def shortlist_candidates(skills: str = "", job_role_id: int = None, limit: int =
     if job_role_id:
         try:
             job_role = JobRole.objects.get(id=job_role_id, organization=org)
-            scorer = CandidateScorer()
-            
+            # Stored scores in one query; the rest scored in concurrent batches and saved together
+            scores = CandidateScorer().score_candidates(candidates, job_role)
+
             for c in candidates:
-                # Check if score exists
-                score_obj = CandidateJobScore.objects.filter(candidate=c, job_role=job_role).first()
-                if score_obj:
-                    score = score_obj.score
-                    justification = score_obj.justification
-                else:
-                    # Compute score
-                    score, justification = scorer.score_candidate(c, job_role)
-                
+                score, justification = scores[c.id]
                 scored_results.append({
                     "id": c.id,
                     "name": c.name,
@@ -0,0 +1,210 @@
+"""
+Candidate search: structured filters and semantic ranking in one SQL statement.
+
+search_candidates() is what the recruiting tools and the admin candidates page
+share. The structured predicates (organization, status, source, name, email,
+skills) run against core_candidate, served by the (organization, status) btree
+and a GIN index on the lower-cased skills array. With a query, the same
+statement also:
+
+1. scans the organization's candidate vectors nearest to the query (skills,
+   summary and resume chunks, see model_indexer.candidate_documents), keeping
+   only rows whose candidate passes the predicates. The semi-join is inside the
+   HNSW scan, and with pgvector's iterative scan (HARVEY_VECTOR_ITERATIVE_SCAN)
+   the index keeps walking until enough matching rows are found, so a
+   selective filter doesn't starve the result;
+2. groups the hits per candidate (the dedup step), scored by the MAX or SUM of
+   their cosine similarities (HARVEY_CANDIDATE_AGGREGATE), with the
+   best-matching text as the snippet;
+3. LEFT JOINs those scores onto every matching candidate and pages with
+   LIMIT / OFFSET.
+
+The predicates alone decide who is in the result; vectors only order it.
+Candidates with no vectors yet (index job queued or failed) or none within the
+scan window come after the scored ones, newest first, with score None. `total`
+is the exact number of matching candidates either way.
+
+Without a query the filtered candidates are listed newest first, through the
+ORM (filtered_candidates, the same predicates) so a plain listing never loads
+the embedding model.
+"""
+import json
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db.models import JSONField, TextField
+from django.db.models.functions import Cast, Lower
+
+from core.models.recruitment import Candidate
+from core.observability.metrics import EMBEDDING_BATCH_SIZE, VECTOR_SEARCH_SECONDS
+from core.observability.tracing import span
+from .vector_store import EMBEDDING_DIMS, get_vector_store
+
+# Vectors scanned per requested candidate: each candidate has a skills and a summary
+# vector plus one per resume chunk
+FANOUT = 8
+SKILL_MATCHES = ("all", "any")
+
+
+@dataclass
+class CandidateHit:
+    id: int
+    name: str
+    email: str
+    status: str
+    source: str
+    skills: list
+    phone: str = None
+    score: float = None
+    matched_fields: list = field(default_factory=list)
+    snippet: str = ""
+
+    def as_dict(self):
+        result = {"id": self.id, "name": self.name, "email": self.email, "status": self.status}
+        if self.score is not None:
+            result["score"] = round(self.score, 3)
+            result["matched_fields"] = self.matched_fields
+        return result
+
+
+@dataclass
+class CandidatePage:
+    hits: list
+    total: int
+    limit: int
+    offset: int
+
+    @property
+    def has_more(self):
+        return self.offset + len(self.hits) < self.total
+
+
+def _skills(skills):
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    return [s.strip().lower() for s in skills or [] if s and s.strip()]
+
+
+def candidate_predicates(organization_id, status="", source="", name="", email="", skills=(), skills_match="all"):
+    """The WHERE clause over core_candidate (aliased c) and its bind params; see filtered_candidates."""
+    if skills_match not in SKILL_MATCHES:
+        raise ValueError(f"Unknown skills_match {skills_match!r}, expected one of {SKILL_MATCHES}")
+    clauses, params = ["c.organization_id = :organization_id"], {"organization_id": int(organization_id)}
+    if status:
+        clauses.append("lower(c.status) = lower(:status)")
+        params["status"] = status
+    if source:
+        clauses.append("lower(c.source) = lower(:source)")
+        params["source"] = source
+    if name:
+        clauses.append("c.name ILIKE :name")
+        params["name"] = f"%{name}%"
+    if email:
+        clauses.append("c.email ILIKE :email")
+        params["email"] = f"%{email}%"
+    skills = _skills(skills)
+    if skills:
+        # Same expression as the candidate_skills_gin index
+        if skills_match == "all":
+            clauses.append("(lower(c.skills::text))::jsonb @> CAST(:skills AS jsonb)")
+            params["skills"] = json.dumps(skills)
+        else:
+            clauses.append("(lower(c.skills::text))::jsonb ?| CAST(:skills AS text[])")
+            params["skills"] = skills
+    return " AND ".join(clauses), params
+
+
+def filtered_candidates(organization_id, status="", source="", name="", email="", skills=(), skills_match="all"):
+    """The same predicates as a queryset, for listings that need no ranking."""
+    if skills_match not in SKILL_MATCHES:
+        raise ValueError(f"Unknown skills_match {skills_match!r}, expected one of {SKILL_MATCHES}")
+    candidates = Candidate.objects.filter(organization_id=organization_id)
+    if status:
+        candidates = candidates.filter(status__iexact=status)
+    if source:
+        candidates = candidates.filter(source__iexact=source)
+    if name:
+        candidates = candidates.filter(name__icontains=name)
+    if email:
+        candidates = candidates.filter(email__icontains=email)
+    skills = _skills(skills)
+    if skills:
+        candidates = candidates.annotate(
+            skills_lower=Cast(Lower(Cast("skills", output_field=TextField())), output_field=JSONField())
+        )
+        if skills_match == "all":
+            candidates = candidates.filter(skills_lower__contains=skills)
+        else:
+            candidates = candidates.filter(skills_lower__has_any_keys=skills)
+    return candidates
+
+
+def search_candidates(
+    organization_id, query="", status="", source="", name="", email="", skills=(), skills_match="all",
+    limit=10, offset=0, aggregate=None, vector_store=None,
+):
+    """One page of an organization's candidates matching the filters, ranked by query relevance when given."""
+    aggregate = aggregate or getattr(settings, "HARVEY_CANDIDATE_AGGREGATE", "max")
+    if aggregate not in ("max", "sum"):
+        raise ValueError(f"Unknown aggregate {aggregate!r}, expected 'max' or 'sum'")
+    limit, offset = max(1, int(limit)), max(0, int(offset))
+
+    query = (query or "").strip()
+    vector_store = (vector_store or get_vector_store()) if query else None
+    scan, scan_params = (None, None)
+    if query:
+        scan, scan_params = vector_store._scan_sql(
+            {"doc_type": "candidate", "organization_id": str(organization_id)},
+            extra=" AND cmetadata->>'candidate_id' IN (SELECT id::text FROM matching)",
+        )
+    if scan is None:
+        # No query, or no vectors at all yet: nothing to rank by
+        with span("candidate.search", semantic=False, limit=limit, offset=offset):
+            candidates = filtered_candidates(organization_id, status, source, name, email, skills, skills_match)
+            total = candidates.count()
+            hits = [
+                CandidateHit(
+                    id=c.id, name=c.name, email=c.email, status=c.status, source=c.source,
+                    skills=c.skills or [], phone=c.phone,
+                )
+                for c in candidates.order_by("-id")[offset:offset + limit]
+            ]
+        return CandidatePage(hits=hits, total=total, limit=limit, offset=offset)
+
+    where, params = candidate_predicates(organization_id, status, source, name, email, skills, skills_match)
+    params.update(limit=limit, offset=offset)
+    table = Candidate._meta.db_table
+    EMBEDDING_BATCH_SIZE.observe(1, operation="query")
+    with VECTOR_SEARCH_SECONDS.time(doc_type="candidate"), span(
+        "candidate.search", semantic=True, limit=limit, offset=offset,
+    ):
+        sql = (
+            f"WITH matching AS (SELECT c.id FROM {table} c WHERE {where}), "
+            "hits AS ("
+            "SELECT cmetadata->>'candidate_id' AS candidate_id, cmetadata->>'field' AS field, document, "
+            f"1 - (embedding <=> CAST(:query AS vector({EMBEDDING_DIMS}))) AS score FROM ({scan}) scanned"
+            "), grouped AS ("
+            f"SELECT candidate_id, {aggregate.upper()}(score) AS score, "
+            "array_agg(DISTINCT field) AS fields, (array_agg(document ORDER BY score DESC))[1] AS snippet "
+            "FROM hits GROUP BY candidate_id"
+            ") "
+            "SELECT c.id, c.name, c.email, c.status, c.source, c.skills, c.phone, g.score, g.fields, g.snippet, COUNT(*) OVER () "
+            f"FROM matching m JOIN {table} c ON c.id = m.id LEFT JOIN grouped g ON g.candidate_id = c.id::text "
+            "ORDER BY g.score DESC NULLS LAST, c.id DESC LIMIT :limit OFFSET :offset"
+        )
+        scan_size = (offset + limit) * FANOUT * vector_store.rescore_factor
+        rows = vector_store._query(
+            sql, query, {**params, **scan_params}, scan=scan_size, k=limit, iterative=True,
+        )
+
+    hits = [
+        CandidateHit(
+            id=row[0], name=row[1], email=row[2], status=row[3], source=row[4], skills=row[5] or [], phone=row[6],
+            score=float(row[7]) if row[7] is not None else None,
+            matched_fields=sorted(f for f in row[8] or [] if f),
+            snippet=row[9] or "",
+        )
+        for row in rows
+    ]
+    total = rows[0][10] if rows else 0
+    return CandidatePage(hits=hits, total=total, limit=limit, offset=offset)
@@ -0,0 +1,127 @@
+"""
+Structure-aware chunking for policy documents.
+
+SectionChunker finds the heading hierarchy in extracted text and chunks within
+sections, so a chunk never straddles two sections and carries its place in the
+document as metadata:
+
+- numbered headings ("5. Leave Policy", "5.1 Types of Leave"), the usual shape in
+  PDF handbooks; depth is the number of components;
+- markdown-style "#" headings, which the DOCX and HTML extractors emit for
+  Heading styles and <h1>-<h6>.
+
+A section that fits in chunk_size becomes one chunk; longer ones are split with
+the recursive splitter and every continuation is prefixed with the section
+heading. Text before the first heading, or without any headings, is split as before.
+
+`chunk_stream()` takes an iterable of text segments (e.g. PDF pages) and yields
+chunks as soon as each section closes, so indexing memory is bounded by the
+largest section rather than the document. A section longer than
+MAX_SECTION_CHUNKS chunks is flushed in parts under the same heading.
+"""
+import re
+from dataclasses import dataclass, field
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+_MARKDOWN = re.compile(r"^(#{1,6})\s+(\S.*)$")
+_NUMBERED = re.compile(r"^(\d{1,2}(?:\.\d{1,3}){0,3})\.?\s+([A-Z][^\n]*)$")
+MAX_HEADING_CHARS = 120
+MAX_SECTION_CHUNKS = 20
+PATH_SEPARATOR = " > "
+
+
+def parse_heading(line):
+    """(level, heading) if the line is a section heading, else None."""
+    line = line.strip()
+    if not line or len(line) > MAX_HEADING_CHARS:
+        return None
+    match = _MARKDOWN.match(line)
+    if match:
+        return len(match.group(1)), match.group(2).strip()
+    match = _NUMBERED.match(line)
+    # Sentences in numbered lists end with punctuation; headings don't
+    if match and not line.endswith((".", ":", ";", ",")):
+        return match.group(1).count(".") + 1, line
+    return None
+
+
+@dataclass
+class Section:
+    path: list
+    lines: list = field(default_factory=list)
+
+    @property
+    def heading(self):
+        return self.path[-1] if self.path else ""
+
+    @property
+    def body(self):
+        return "\n".join(self.lines).strip()
+
+
+def iter_sections(lines, max_chars=None):
+    """
+    Sections in document order from an iterable of lines; headings without body text
+    only contribute to their children's path. Bodies longer than max_chars are
+    yielded in line-aligned parts that share the section's path.
+    """
+    section, size = Section(path=[]), 0
+    stack = []  # (level, heading)
+    for line in lines:
+        heading = parse_heading(line)
+        if heading is None:
+            section.lines.append(line)
+            size += len(line) + 1
+            if max_chars and size >= max_chars:
+                yield section
+                section, size = Section(path=section.path), 0
+            continue
+        if section.body:
+            yield section
+        level, title = heading
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, title))
+        section, size = Section(path=[h for _, h in stack]), 0
+    if section.body:
+        yield section
+
+
+def split_sections(text):
+    return [s for s in iter_sections(text.splitlines()) if s.body]
+
+
+class SectionChunker:
+    def __init__(self, chunk_size=400, chunk_overlap=50):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def _splitter(self, size):
+        size = max(size, 50)
+        return RecursiveCharacterTextSplitter(chunk_size=size, chunk_overlap=min(self.chunk_overlap, size // 4))
+
+    def chunk(self, text):
+        """Yields (chunk_text, section metadata) pairs."""
+        return self.chunk_stream([text])
+
+    def chunk_stream(self, segments):
+        """Like chunk(), over an iterable of text segments consumed lazily."""
+        lines = (line for segment in segments for line in segment.splitlines())
+        for section in iter_sections(lines, max_chars=self.chunk_size * MAX_SECTION_CHUNKS):
+            if not section.body:
+                continue
+            meta = {"section_path": PATH_SEPARATOR.join(section.path), "heading": section.heading}
+            if not section.heading:
+                for piece in self._splitter(self.chunk_size).split_text(section.body):
+                    yield piece, meta
+                continue
+
+            whole = f"{section.heading}\n{section.body}"
+            if len(whole) <= self.chunk_size:
+                yield whole, meta
+                continue
+            # Leave room for the heading that prefixes every piece
+            budget = self.chunk_size - len(section.heading) - 1
+            for piece in self._splitter(budget).split_text(section.body):
+                yield f"{section.heading}\n{piece}", meta
@@ -0,0 +1,140 @@
+"""
+Context compression for search_policies.
+
+The retrieved chunks go into the rephrasing prompt of the lite LLM, and most of
+their sentences are about something other than the question. compress() keeps
+the sentences that are:
+
+- numeric: any sentence with a digit, always. The answerability gate and the
+  post-answer numeric grader both look for the policy's numbers, so a
+  compressed context must still contain every one of them;
+- relevant: the rest, by cosine similarity to the query (all-MiniLM vectors
+  are unit length, so a dot product), best first, while at least
+  HARVEY_CONTEXT_MIN_SIMILARITY and while the total stays within
+  HARVEY_CONTEXT_TOKEN_BUDGET.
+
+Kept sentences stay in document order; "..." marks where text was cut. Sentence
+vectors come from the vector store's embedding model and are kept in an
+in-process LRU keyed by the sentence hash, so the same chunks coming back for
+related questions are embedded once. Context already within budget is passed
+through untouched, without embedding anything.
+"""
+import hashlib
+import logging
+import re
+import threading
+
+from django.conf import settings
+from langchain_core.documents import Document
+
+from core.observability.metrics import record_cache
+from core.observability.tracing import span
+from .reranker import ScoreCache
+
+logger = logging.getLogger("harvey")
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+(?=[A-Z0-9\"'(])")
+_DIGIT = re.compile(r"\d")
+
+_vectors = None
+_vectors_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose (the same estimate fake_llm reports)
+    return max(1, len(text) // 4)
+
+
+def split_sentences(text):
+    """Sentences of a chunk; lines are split first, so list items and table rows stay separate."""
+    sentences = []
+    for line in text.splitlines():
+        sentences.extend(s.strip() for s in _SENTENCE_END.split(line) if s.strip())
+    return sentences
+
+
+def sentence_cache():
+    global _vectors
+    if _vectors is None:
+        with _vectors_lock:
+            if _vectors is None:
+                _vectors = ScoreCache(getattr(settings, "HARVEY_SENTENCE_VECTOR_CACHE_SIZE", 20000))
+    return _vectors
+
+
+def sentence_vectors(sentences, embeddings):
+    """Vectors for sentences, embedding only those not already cached (in one batch)."""
+    cache = sentence_cache()
+    keys = [hashlib.sha1(s.encode()).hexdigest() for s in sentences]
+    vectors = [cache.get(k) for k in keys]
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    record_cache("sentence_vectors", not missing)
+    if missing:
+        fresh = embeddings.embed_documents([sentences[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            cache.put(keys[i], vector)
+    return vectors
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def compress(query, docs, token_budget=None, min_similarity=None, embeddings=None):
+    """Returns docs with page_content reduced to the relevant and numeric sentences (see module docstring)."""
+    if token_budget is None:
+        token_budget = getattr(settings, "HARVEY_CONTEXT_TOKEN_BUDGET", 200)
+    if min_similarity is None:
+        min_similarity = getattr(settings, "HARVEY_CONTEXT_MIN_SIMILARITY", 0.2)
+    if not token_budget or not docs or sum(estimate_tokens(d.page_content) for d in docs) <= token_budget:
+        return docs
+
+    # (doc index, position, sentence); the section heading is already in the Source line
+    sentences = [
+        (i, pos, sentence)
+        for i, doc in enumerate(docs)
+        for pos, sentence in enumerate(
+            s for s in split_sentences(doc.page_content) if s != doc.metadata.get("heading")
+        )
+    ]
+    if not sentences:
+        return docs
+
+    with span("policy.compress", sentences=len(sentences), budget=token_budget):
+        try:
+            if embeddings is None:
+                from .vector_store import VectorStore
+                embeddings = VectorStore.get_embeddings()
+            query_vector = embeddings.embed_query(query)
+            vectors = sentence_vectors([s for _, _, s in sentences], embeddings)
+        except Exception as e:
+            logger.warning(f"Context compression skipped: {e}")
+            return docs
+        scores = [_dot(query_vector, v) for v in vectors]
+
+        keep = {n for n, (_, _, s) in enumerate(sentences) if _DIGIT.search(s)}
+        used = sum(estimate_tokens(sentences[n][2]) for n in keep)
+        for n in sorted(range(len(sentences)), key=scores.__getitem__, reverse=True):
+            if n in keep:
+                continue
+            cost = estimate_tokens(sentences[n][2])
+            # With nothing kept yet, the best sentence goes in regardless
+            if keep and (scores[n] < min_similarity or used + cost > token_budget):
+                continue
+            keep.add(n)
+            used += cost
+
+    compressed = []
+    for i, doc in enumerate(docs):
+        kept = [(pos, s) for n, (d, pos, s) in enumerate(sentences) if d == i and n in keep]
+        if not kept:
+            continue
+        parts, last = [], -1
+        for pos, sentence in kept:
+            if parts and pos != last + 1:
+                parts.append("...")
+            parts.append(sentence)
+            last = pos
+        compressed.append(Document(page_content=" ".join(parts), metadata=dict(doc.metadata), id=getattr(doc, "id", None)))
+    return compressed
@@ -0,0 +1,133 @@
+"""
+Embedding backends for the vector store.
+
+`get_embeddings()` builds the LangChain `Embeddings` named by HARVEY_EMBEDDINGS:
+"huggingface" (sentence-transformers on torch, the original), "onnx", or a dotted
+path to a factory. OnnxEmbeddings runs the same all-MiniLM-L6-v2 graph in ONNX
+Runtime with the model's own tokenizer and reproduces sentence-transformers'
+pooling (attention-masked mean, then L2 normalisation), so its 384-dim vectors are
+interchangeable with the torch ones and existing collections need no re-embedding.
+
+HARVEY_EMBEDDING_QUANTIZED selects the int8 export shipped in the model repo
+(AVX2 on x86, the arm64 build elsewhere). Its vectors drift slightly from the fp32
+ones (cosine ~0.99), which is enough to keep rankings but not bit-identical.
+"""
+import logging
+import os
+import platform
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("harvey")
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_FILE = "onnx/model.onnx"
+QUANTIZED_FILES = {"x86_64": "onnx/model_quint8_avx2.onnx", "AMD64": "onnx/model_quint8_avx2.onnx"}
+QUANTIZED_FALLBACK = "onnx/model_qint8_arm64.onnx"
+
+
+def mean_pool(hidden, mask):
+    """sentence-transformers' pooling: mean of token vectors, ignoring padding, then unit length."""
+    import numpy as np
+
+    mask = mask[..., None].astype(hidden.dtype)
+    summed = (hidden * mask).sum(axis=1)
+    pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+    return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+
+class OnnxEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 on ONNX Runtime (CPU); no torch needed at runtime."""
+
+    def __init__(self, model_name=None, model_file=None, quantized=None, batch_size=32, max_length=256, threads=None):
+        # A local directory (e.g. baked into the image) or a Hugging Face repo id
+        self.model_name = model_name or getattr(settings, "HARVEY_EMBEDDING_ONNX_PATH", "") or MODEL_NAME
+        if quantized is None:
+            quantized = getattr(settings, "HARVEY_EMBEDDING_QUANTIZED", False)
+        self.model_file = model_file or (
+            QUANTIZED_FILES.get(platform.machine(), QUANTIZED_FALLBACK) if quantized else ONNX_FILE
+        )
+        self.batch_size = batch_size
+        self.max_length = max_length  # sentence-transformers' max_seq_length for this model
+        self.threads = threads if threads is not None else getattr(settings, "HARVEY_EMBEDDING_THREADS", 0)
+        self._session = None
+        self._tokenizer = None
+        self._input_names = ()
+        self._lock = threading.Lock()
+
+    def _resolve(self, filename):
+        if os.path.isdir(self.model_name):
+            return os.path.join(self.model_name, filename)
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(self.model_name, filename)
+
+    def _load(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    try:
+                        import onnxruntime
+                        from tokenizers import Tokenizer
+                    except ImportError as e:
+                        raise ImproperlyConfigured(
+                            "HARVEY_EMBEDDINGS=onnx needs the onnxruntime and tokenizers packages"
+                        ) from e
+                    tokenizer = Tokenizer.from_file(self._resolve("tokenizer.json"))
+                    tokenizer.enable_truncation(max_length=self.max_length)
+                    tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+                    options = onnxruntime.SessionOptions()
+                    options.intra_op_num_threads = self.threads or 0
+                    session = onnxruntime.InferenceSession(
+                        self._resolve(self.model_file), options, providers=["CPUExecutionProvider"]
+                    )
+                    self._input_names = {i.name for i in session.get_inputs()}
+                    self._tokenizer = tokenizer
+                    self._session = session
+                    logger.info(f"Loaded ONNX embeddings {self.model_name}/{self.model_file}")
+        return self._session
+
+    def _embed(self, texts):
+        import numpy as np
+
+        session = self._load()
+        vectors = [None] * len(texts)
+        # Batch similar lengths together so padding stays short
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            encodings = self._tokenizer.encode_batch([texts[i] for i in batch])
+            ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+            hidden = session.run(None, feeds)[0]
+            for i, vector in zip(batch, mean_pool(hidden, mask)):
+                vectors[i] = vector.tolist()
+        return vectors
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)) if texts else []
+
+    def embed_query(self, text):
+        return self._embed([text])[0]
+
+
+def huggingface_embeddings():
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2", model_kwargs={'device': 'cpu'})
+
+
+BACKENDS = {"huggingface": huggingface_embeddings, "onnx": OnnxEmbeddings}
+
+
+def get_embeddings(name=None):
+    """Builds the backend named by HARVEY_EMBEDDINGS; callers cache it (see VectorStore.get_embeddings)."""
+    name = name or getattr(settings, "HARVEY_EMBEDDINGS", "huggingface")
+    factory = BACKENDS.get(name) or import_string(name)
+    return factory()
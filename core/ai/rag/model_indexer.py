@@ -1,48 +1,97 @@
 import json
+import re
 from core.models.recruitment import Candidate, JobRole
+from .chunking import SectionChunker
 from .vector_store import get_vector_store
 
+# Resume section titles seen on their own line ("EXPERIENCE", "Work History:")
+RESUME_HEADINGS = {
+    "summary", "professional summary", "profile", "objective", "about me",
+    "experience", "work experience", "professional experience", "employment history", "work history",
+    "skills", "technical skills", "key skills", "core competencies",
+    "projects", "education", "certifications", "achievements", "publications", "languages", "interests",
+}
+SUMMARY_HEADINGS = ("summary", "profile", "objective", "about me")
+EXPERIENCE_HEADINGS = ("experience", "employment history", "work history")
+SUMMARY_CHARS = 1000  # ~256 MiniLM tokens; anything longer is truncated by the model
+_HEADING_LINE = re.compile(r"^\s*([A-Za-z][A-Za-z &/]{1,40}?)\s*:?\s*$")
+
+
+def resume_markdown(parsed_data):
+    """
+    Resume text with its section titles as markdown headings, so SectionChunker keeps
+    each chunk inside one section. Dict resumes become one section per key.
+    """
+    if isinstance(parsed_data, dict):
+        return "\n".join(
+            f"## {key}\n{value if isinstance(value, str) else json.dumps(value)}"
+            for key, value in parsed_data.items() if value
+        )
+    lines = []
+    for line in str(parsed_data or "").splitlines():
+        match = _HEADING_LINE.match(line)
+        if match and match.group(1).strip().lower() in RESUME_HEADINGS:
+            lines.append(f"## {match.group(1).strip().title()}")
+        else:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def candidate_documents(candidate, chunker):
+    """
+    (texts, metadatas) for one candidate: a skills vector, an experience-summary vector
+    and one vector per resume section chunk, all tagged with candidate_id and a `field`
+    so search can group them back into a single hit per candidate.
+    """
+    skills_str = ", ".join(candidate.skills) if candidate.skills else "None"
+    base = {
+        "source": candidate.name,
+        "name": candidate.name,
+        "email": candidate.email,
+        "skills": skills_str,
+        "type": "candidate",
+        "doc_type": "candidate",
+        "candidate_id": str(candidate.id),
+        "organization_id": str(candidate.organization.id)
+    }
+    texts = [f"Candidate Name: {candidate.name}\nSkills: {skills_str}"]
+    metadatas = [{**base, "field": "skills"}]
+
+    chunks = list(chunker.chunk(resume_markdown(candidate.parsed_data)))
+    by_heading = {}
+    for chunk_text, section in chunks:
+        by_heading.setdefault(section["heading"].lower(), []).append(chunk_text)
+
+    def find_section(names):
+        return next((pieces for heading, pieces in by_heading.items() if any(n in heading for n in names)), None)
+
+    # Summary: the resume's own summary section, else its experience section, else its opening
+    summary = find_section(SUMMARY_HEADINGS) or find_section(EXPERIENCE_HEADINGS) or [c for c, _ in chunks[:2]]
+    if summary:
+        texts.append(f"Candidate Name: {candidate.name}\n" + "\n".join(summary)[:SUMMARY_CHARS])
+        metadatas.append({**base, "field": "summary"})
+
+    for i, (chunk_text, section) in enumerate(chunks):
+        texts.append(chunk_text)
+        metadatas.append({**base, **section, "field": "resume", "chunk_index": i})
+    return texts, metadatas
+
+
 class ModelIndexer:
     def __init__(self):
         self.vector_store = get_vector_store()
+        # Resume chunks sized to what MiniLM embeds (256 tokens)
+        self.chunker = SectionChunker(chunk_size=800, chunk_overlap=100)
 
     def index_candidate(self, candidate_id):
         try:
             candidate = Candidate.objects.get(id=candidate_id)
-            
-            # Construct a rich text representation
-            skills_str = ", ".join(candidate.skills) if candidate.skills else "None"
-            resume_data = ""
-            if candidate.parsed_data:
-                 # Extract summary or key details if available
-                 if isinstance(candidate.parsed_data, dict):
-                     resume_data = json.dumps(candidate.parsed_data)
-                 else:
-                     resume_data = str(candidate.parsed_data)
-
-            text_content = (
-                f"Candidate Name: {candidate.name}\n"
-                f"Email: {candidate.email}\n"
-                f"Skills: {skills_str}\n"
-                f"Resume Data: {resume_data}\n"
-                f"Organization: {candidate.organization.name}"
-            )
+            texts, metadatas = candidate_documents(candidate, self.chunker)
 
-            metadata = {
-                "source": candidate.name,
-                "name": candidate.name,
-                "email": candidate.email,
-                "skills": skills_str,
-                "type": "candidate",
-                "doc_type": "candidate",
-                "candidate_id": str(candidate.id),
-                "organization_id": str(candidate.organization.id)
-            }
-
-            # Add to vector store (we add a SINGLE document for the candidate for now)
-            # In a real system we might split resume text if it's huge
-            self.vector_store.add_documents([text_content.strip()], [metadata])
-            print(f"✅ Indexed Candidate: {candidate.name}")
+            # Replace rather than append so re-runs of the job don't duplicate the candidate.
+            self.vector_store.delete_by_candidate_id(candidate.id)
+            self.vector_store.add_documents(texts, metadatas)
+            print(f"✅ Indexed Candidate: {candidate.name} ({len(texts)} vectors)")
             return True
 
         except Exception as e:
@@ -71,6 +120,7 @@ class ModelIndexer:
                 "organization_id": str(job.organization.id)
             }
 
+            self.vector_store.delete_by_job_id(job.id)
             self.vector_store.add_documents([text_content.strip()], [metadata])
             print(f"✅ Indexed Job Role: {job.title}")
             return True
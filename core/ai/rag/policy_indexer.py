@@ -1,110 +1,213 @@
 import os
-import requests
-from bs4 import BeautifulSoup
-import pdfminer.high_level
-import docx
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
 from core.models.policy import Policy, PolicyChunk
-from .vector_store import get_vector_store
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from core.ai.utils.extraction import iter_page_batches
+from . import url_source
+from .chunking import SectionChunker
+from .policy_refresh import take_fetched
+from .vector_store import get_vector_store, staged_doc_type
+
+logger = logging.getLogger("harvey")
+
 
 class PolicyIndexer:
-    def __init__(self):
-        self.vector_store = get_vector_store()
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=400,
-            chunk_overlap=50
-        )
+    def __init__(self, chunk_size=400, chunk_overlap=50, vector_store=None, batch_size=64):
+        self.vector_store = vector_store or get_vector_store()
+        self.batch_size = batch_size
+        self.chunker = SectionChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def build_chunks(self, text, base_metadata):
+        """Splits text into section-aligned chunks; returns (texts, metadatas) ready for the vector store."""
+        texts, metadatas = [], []
+        for i, (chunk_text, section) in enumerate(self.chunker.chunk(text)):
+            texts.append(chunk_text)
+            metadatas.append({**base_metadata, **section, "chunk_index": i})
+        return texts, metadatas
 
     def index_policy(self, policy_id):
+        """
+        Streams the policy through extract -> chunk -> embed -> write in batches of
+        batch_size chunks, so memory stays bounded by one page plus one batch.
+        Progress is kept in Policy.metadata["indexing"] ({pages_done, pages_total, chunks}).
+
+        The batches land as a staged copy (PolicyChunk.staged, "policy:staged"
+        vectors) that no search sees. Only once the whole source is indexed does
+        one transaction swap it in for the previous index; a failed or empty
+        extraction drops the staged copy and leaves the previous index serving.
+        """
+        policy, previous_fetch = None, None
         try:
             policy = Policy.objects.get(id=policy_id)
+            previous_fetch = policy.metadata.get("fetch")
             policy.status = 'indexing'
             policy.save()
 
-            text = self._extract_text(policy)
-            if not text:
-                raise ValueError("No text extracted from policy source")
+            # Leftovers of a run that died mid-way
+            self._drop_staged(policy)
+
+            base_metadata = {
+                "source": policy.title,
+                "title": policy.title,
+                "policy_id": str(policy.id),
+                "type": "policy",
+                "doc_type": "policy",
+                "organization_id": str(policy.created_by.organization.id) if policy.created_by.organization else None
+            }
+            progress = {"pages_done": 0, "pages_total": None, "chunks": 0}
+            self._report(policy, progress)
 
-            # Clear existing chunks
-            policy.chunks.all().delete()
-            self.vector_store.delete_by_policy_id(policy.id)
-
-            chunks = self.text_splitter.split_text(text)
-            
-            # Prepare for vector store
-            texts = []
-            metadatas = []
-            
-            for i, chunk_text in enumerate(chunks):
-                # Save to DB
-                PolicyChunk.objects.create(
-                    policy=policy,
-                    chunk_index=i,
-                    text=chunk_text,
-                    metadata={"source": policy.title}
-                )
-                
+            texts, metadatas = [], []
+            for chunk_text, section in self.chunker.chunk_stream(self._iter_text(policy, progress)):
                 texts.append(chunk_text)
-                metadatas.append({
-                    "source": policy.title,
-                    "title": policy.title,
-                    "policy_id": str(policy.id),
-                    "chunk_index": i,
-                    "type": "policy",
-                    "doc_type": "policy",
-                    "organization_id": str(policy.created_by.organization.id) if policy.created_by.organization else None
-                })
-
-            # Add to Vector Store
-            self.vector_store.add_documents(texts, metadatas)
-
-            policy.status = 'indexed'
-            policy.save()
+                metadatas.append({**base_metadata, **section, "chunk_index": progress["chunks"] + len(texts) - 1})
+                if len(texts) >= self.batch_size:
+                    self._write_batch(policy, texts, metadatas, progress)
+                    texts, metadatas = [], []
+            if texts:
+                self._write_batch(policy, texts, metadatas, progress)
+
+            if not progress["chunks"]:
+                raise ValueError("No text extracted from policy source")
+
+            with transaction.atomic():
+                policy.chunks.filter(staged=False).delete()
+                policy.chunks.filter(staged=True).update(staged=False)
+                with connection.cursor() as cursor:
+                    self.vector_store.promote_staged("policy_id", policy.id, cursor)
+                policy.status = 'indexed'
+                policy.indexed_at = timezone.now()
+                policy.save()
             return True
 
         except Exception as e:
-            print(f"Indexing failed: {e}")
+            logger.error(f"Indexing failed for policy {policy_id}: {e}")
             if policy:
-                policy.status = 'failed'
+                self._drop_staged(policy)
+                # A policy indexed before keeps serving its previous index, and the
+                # refresh scheduler keeps comparing against what that index was built from
+                policy.metadata.pop("fetch", None)
+                if previous_fetch:
+                    policy.metadata["fetch"] = previous_fetch
+                policy.status = 'indexed' if policy.indexed_at else 'failed'
+                policy.metadata["indexing"] = {**policy.metadata.get("indexing", {}), "error": str(e)}
                 policy.save()
             return False
 
-    def _extract_text(self, policy):
+    def _drop_staged(self, policy):
+        policy.chunks.filter(staged=True).delete()
+        self.vector_store.delete_staged("policy_id", policy.id)
+
+    def index_policies(self, policy_ids, workers=None):
+        """
+        Indexes many policies concurrently; yields (policy_id, success) as each finishes.
+        Threads mostly wait on the extraction pool and the embedder (which releases the GIL),
+        so this keeps every extraction worker busy during bulk (re)indexing.
+        """
+        def run(policy_id):
+            try:
+                return policy_id, self.index_policy(policy_id)
+            finally:
+                close_old_connections()
+
+        workers = workers or max(getattr(settings, "HARVEY_EXTRACT_WORKERS", None) or os.cpu_count() or 1, 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="harvey-index") as pool:
+            yield from pool.map(run, policy_ids)
+
+    def write_chunks(self, texts, metadatas, staged=False):
+        """
+        Bulk-inserts PolicyChunk rows and their vectors, linked both ways: the chunk
+        stores its vector's id (PolicyChunk.vector_id) and the vector's metadata
+        carries chunk_id. With HARVEY_VECTOR_STORE_TEXT off the chunk text lives only
+        in PolicyChunk and retrieval hydrates it (see hydrate_chunks). staged=True
+        writes them hidden from search until index_policy swaps them in.
+        """
+        vector_ids = [str(uuid.uuid4()) for _ in texts]
+        chunks = PolicyChunk.objects.bulk_create([
+            PolicyChunk(
+                policy_id=meta["policy_id"],
+                chunk_index=meta["chunk_index"],
+                text=chunk_text,
+                vector_id=vector_id,
+                staged=staged,
+                metadata={"source": meta["source"], "section_path": meta["section_path"], "heading": meta["heading"]}
+            )
+            for chunk_text, meta, vector_id in zip(texts, metadatas, vector_ids)
+        ], batch_size=1000)
+        doc_type = {"doc_type": staged_doc_type("policy")} if staged else {}
+        self.vector_store.add_documents(
+            texts,
+            [{**meta, **doc_type, "chunk_id": chunk.pk} for meta, chunk in zip(metadatas, chunks)],
+            ids=vector_ids,
+            store_text=getattr(settings, "HARVEY_VECTOR_STORE_TEXT", True),
+        )
+        return chunks
+
+    def _write_batch(self, policy, texts, metadatas, progress):
+        """Embeds and stores one batch of staged chunks in both PolicyChunk and the vector store."""
+        self.write_chunks(texts, metadatas, staged=True)
+        progress["chunks"] += len(texts)
+        self._report(policy, progress)
+
+    def _report(self, policy, progress):
+        # update() rather than save() so progress writes never race the status fields
+        policy.metadata["indexing"] = dict(progress)
+        Policy.objects.filter(id=policy.id).update(metadata=policy.metadata)
+
+    def _iter_text(self, policy, progress):
+        """Yields the policy's text in segments (a page for PDFs and crawled sites); fills in progress["pages_*"]."""
         if policy.source_type == 'url':
-            return self._extract_from_url(policy.external_url)
+            # Crawling is opt-in per policy (metadata["crawl"]); otherwise only external_url is indexed
+            if policy.metadata.get("crawl") and getattr(settings, "HARVEY_POLICY_CRAWL_MAX_PAGES", 50) > 1:
+                yield from self._iter_site(policy, progress)
+            else:
+                yield self._extract_from_url(policy)
         elif policy.source_type == 'upload':
-            return self._extract_from_file(policy.uploaded_file)
-        return ""
+            yield from self._iter_file(policy.uploaded_file, progress)
 
-    def _extract_from_url(self, url):
+    def _extract_from_url(self, policy):
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            return soup.get_text(separator=' ', strip=True)
+            # A refresh that saw the page change hands over what it fetched
+            page = take_fetched(policy.id) or url_source.fetch(policy.external_url)
+            # Validators for the refresh scheduler's conditional GETs (see policy_refresh)
+            policy.metadata["fetch"] = {**page.validators(), "checked_at": timezone.now().isoformat()}
+            return page.text
         except Exception as e:
-            print(f"URL extraction failed: {e}")
-            return ""
+            logger.warning(f"URL extraction failed for policy {policy.id} ({policy.external_url}): {e}")
+            raise
 
-    def _extract_from_file(self, file_field):
-        try:
-            file_path = file_field.path
-            ext = os.path.splitext(file_path)[1].lower()
-
-            if ext == '.pdf':
-                return pdfminer.high_level.extract_text(file_path)
-            elif ext == '.docx':
-                doc = docx.Document(file_path)
-                return "\n".join([para.text for para in doc.paragraphs])
-            elif ext == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    return f.read()
-            else:
-                return "" # Unsupported format
-        except Exception as e:
-            print(f"File extraction failed: {e}")
-            return ""
+    def _iter_site(self, policy, progress):
+        """
+        Crawls from external_url (url_source.crawl, scoped to its directory) and yields
+        each page as its own top-level section, titled by the page, with the page's
+        headings nested under it. An unreachable start page raises.
+        """
+        pages = url_source.crawl(
+            policy.external_url,
+            max_pages=getattr(settings, "HARVEY_POLICY_CRAWL_MAX_PAGES", 50),
+            max_depth=getattr(settings, "HARVEY_POLICY_CRAWL_MAX_DEPTH", 2),
+            concurrency=getattr(settings, "HARVEY_POLICY_CRAWL_CONCURRENCY", 8),
+        )
+        progress["pages_total"] = len(pages)
+        start, rest = pages[0], pages[1:]
+        policy.metadata["fetch"] = {
+            **start.validators(),
+            "checked_at": timezone.now().isoformat(),
+            # Every page's validators, so the refresh scheduler notices edits below the start page
+            "pages": {page.url: page.validators() for page in rest},
+        }
+        for page in pages:
+            yield f"# {(page.title or page.url)[:100]}\n{url_source.demote_headings(page.text)}\n"
+            progress["pages_done"] += 1
+
+    def _iter_file(self, file_field, progress):
+        # Parsing runs in the extraction process pool a batch of pages at a time; only page texts come back
+        for pages, total in iter_page_batches(file_field.path):
+            progress["pages_total"] = total
+            for page in pages:
+                yield page
+                progress["pages_done"] += 1
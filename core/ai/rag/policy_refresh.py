@@ -0,0 +1,200 @@
+"""
+Scheduled refresh of URL-sourced policies.
+
+refresh_url_policies() re-checks every URL policy whose last check
+(Policy.metadata["fetch"]["checked_at"]) is older than
+HARVEY_POLICY_REFRESH_SECONDS. It sends a conditional GET with the stored ETag /
+Last-Modified, and a 304 or an unchanged text hash only moves checked_at
+forward. A policy is queued for re-indexing (the "index_policy" job, which
+records the new validators) only when its extracted text actually changed, so a
+sweep over a few hundred linked policies costs a few hundred small requests, not
+a few hundred re-embeddings. The changed page is handed to the job through the
+cache (stash_fetched / take_fetched) so a single-page policy isn't fetched
+twice; a crawled policy is re-crawled.
+
+A policy crawled from several pages (url_source.crawl) keeps every page's
+validators under "pages", and each of them is re-checked the same way. A policy
+indexed before validators were recorded has no hash to compare with: its first
+check stores the current one as the baseline instead of re-indexing.
+
+Checks run on HARVEY_POLICY_REFRESH_CONCURRENCY threads. HostThrottle keeps at
+most HARVEY_POLICY_REFRESH_PER_HOST requests in flight per host and starts them
+at least HARVEY_POLICY_REFRESH_HOST_DELAY seconds apart, so a tenant's intranet
+is never hit by the whole pool at once.
+
+The sweep runs as the self-rescheduling "refresh_url_policies" background job
+(seeded by `run_jobs`) or on demand with `manage.py refresh_policies`.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.models.policy import Policy
+from . import url_source
+
+logger = logging.getLogger("harvey")
+
+SWEEP_SECONDS = 3600
+# How long a changed page waits in the cache for its index job before the job fetches it itself
+FETCHED_TTL = 3600
+
+
+class HostThrottle:
+    """Per-host concurrency cap plus a minimum gap between request starts to the same host."""
+
+    def __init__(self, per_host=1, delay=1.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            semaphore = self._slots.setdefault(host, threading.Semaphore(self.per_host))
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, now))
+                self._next_start[host] = start + self.delay
+            time.sleep(start - now)
+            yield
+
+
+def is_due(policy, cutoff):
+    checked_at = (policy.metadata or {}).get("fetch", {}).get("checked_at")
+    return not checked_at or datetime.fromisoformat(checked_at) < cutoff
+
+
+def _record(policy, fetch):
+    policy.metadata["fetch"] = fetch
+    Policy.objects.filter(id=policy.id).update(metadata=policy.metadata)
+
+
+def _fetched_key(policy_id):
+    return f"harvey:policy_fetched:{policy_id}"
+
+
+def stash_fetched(policy_id, page):
+    """Keeps a changed page for the policy's index job (see take_fetched)."""
+    try:
+        cache.set(_fetched_key(policy_id), page, timeout=FETCHED_TTL)
+    except Exception as e:
+        logger.warning(f"Could not stash the fetched page of policy {policy_id}: {e}")
+
+
+def take_fetched(policy_id):
+    """The page check_policy fetched for this policy, at most once, or None if there is none (or it expired)."""
+    try:
+        page = cache.get(_fetched_key(policy_id))
+        if page is not None:
+            cache.delete(_fetched_key(policy_id))
+        return page
+    except Exception as e:
+        logger.warning(f"Fetched page of policy {policy_id} unavailable: {e}")
+        return None
+
+
+def _check(url, validators, throttle, session):
+    """(changed, current page) for one page, compared by extracted-text hash."""
+    with throttle.slot(url):
+        page = url_source.fetch(url, previous=validators, session=session)
+    return not page.not_modified and page.content_hash != validators.get("content_hash"), page
+
+
+def check_policy(policy, throttle, session=None):
+    """
+    Conditionally re-fetches one policy (and, for a crawled site, every page it was
+    indexed from); returns "unchanged", "baseline", "changed" or "error".
+    """
+    from core.jobs import enqueue
+    previous = policy.metadata.get("fetch") or {}
+    now = timezone.now().isoformat()
+    pages = {}
+    try:
+        changed, start = _check(policy.external_url, previous, throttle, session)
+        current = start.validators()
+        if not previous.get("content_hash") and policy.status == "indexed":
+            _record(policy, {**current, "checked_at": now})
+            return "baseline"
+        for url, validators in previous.get("pages", {}).items():
+            if changed:
+                break
+            try:
+                changed, page = _check(url, validators, throttle, session)
+                pages[url] = page.validators()
+            except requests.HTTPError:
+                # Removed or moved: the re-crawl finds out what the site looks like now
+                changed = True
+    except Exception as e:
+        logger.warning(f"Refresh of policy {policy.id} ({policy.external_url}) failed: {e}")
+        _record(policy, {**previous, "checked_at": now, "error": str(e)})
+        return "error"
+
+    if not changed:
+        _record(policy, {**current, **({"pages": pages} if pages else {}), "checked_at": now})
+        return "unchanged"
+
+    # The index job records the new validators once the re-index succeeds
+    _record(policy, {**previous, "checked_at": now, "changed_at": now})
+    if not policy.metadata.get("crawl"):
+        stash_fetched(policy.id, start)
+    enqueue("index_policy", policy.id, organization_id=policy.created_by.organization_id)
+    logger.info(f"Policy {policy.id} changed at {policy.external_url}; re-index queued")
+    return "changed"
+
+
+def refresh_url_policies(all_policies=False):
+    """Checks every due URL policy (or all of them); returns a Counter of check outcomes."""
+    interval = getattr(settings, "HARVEY_POLICY_REFRESH_SECONDS", 86400)
+    cutoff = timezone.now() - timedelta(seconds=interval)
+    policies = [
+        policy for policy in Policy.objects.filter(
+            source_type="url", status__in=["indexed", "failed"], external_url__isnull=False
+        ).select_related("created_by")
+        if all_policies or is_due(policy, cutoff)
+    ]
+    if not policies:
+        return Counter()
+
+    throttle = HostThrottle(
+        per_host=getattr(settings, "HARVEY_POLICY_REFRESH_PER_HOST", 1),
+        delay=getattr(settings, "HARVEY_POLICY_REFRESH_HOST_DELAY", 1.0),
+    )
+    workers = getattr(settings, "HARVEY_POLICY_REFRESH_CONCURRENCY", 8)
+
+    def run(policy):
+        try:
+            return check_policy(policy, throttle, session=session)
+        finally:
+            close_old_connections()
+
+    with requests.Session() as session:
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="harvey-refresh") as pool:
+            outcomes = Counter(pool.map(run, policies))
+    logger.info(f"URL policy refresh: {dict(outcomes)}")
+    return outcomes
+
+
+def schedule_refresh(delay=SWEEP_SECONDS):
+    """Queues the next sweep (coalesced with one already queued); no-op when refresh is disabled."""
+    from core.jobs import enqueue
+    if getattr(settings, "HARVEY_POLICY_REFRESH_SECONDS", 86400) > 0:
+        return enqueue("refresh_url_policies", "all", delay=delay)
+    return None
@@ -0,0 +1,167 @@
+"""
+Reranker stage for retrieval tools.
+
+`get_reranker()` returns the implementation named by HARVEY_RERANKER (a dotted
+path, or "none"). The default CrossEncoderReranker scores (query, chunk) pairs
+with a small MS MARCO cross-encoder in one batched forward pass on CPU:
+
+- scores are cached per (query hash, chunk id + text hash) in a bounded LRU, so
+  retries and repeated questions only pay for chunks they have not seen, and a
+  re-indexed chunk is scored afresh;
+- HARVEY_RERANKER_BUDGET_MS caps the pairs scored per query. The per-pair cost is
+  tracked as a moving average; candidates beyond the budget keep their retrieval
+  order after the scored ones instead of blowing the request's latency.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.observability.metrics import RERANK_SECONDS, record_cache
+from core.observability.tracing import span
+
+logger = logging.getLogger("harvey")
+
+_ID_FIELDS = ("policy_id", "candidate_id", "job_id", "source")
+
+
+def chunk_id(doc):
+    """
+    Cache id for a retrieved chunk: its owning record and chunk index (when known) plus a
+    hash of its text. Re-indexing reuses chunk indexes for new text, so the index alone
+    would keep serving the old text's scores.
+    """
+    metadata = doc.metadata or {}
+    owner = next((f"{f}={metadata[f]}" for f in _ID_FIELDS if metadata.get(f) is not None), "")
+    if owner and metadata.get("chunk_index") is not None:
+        owner = f"{owner}#{metadata['chunk_index']}"
+    text = " ".join(doc.page_content.split())
+    return f"{owner}#{hashlib.sha1(text.encode()).hexdigest()[:16]}"
+
+
+def query_hash(query):
+    return hashlib.sha1(" ".join(query.lower().split()).encode()).hexdigest()[:16]
+
+
+class Reranker:
+    """Pass-through reranker; subclasses implement `score`."""
+
+    name = "none"
+
+    def rerank(self, query, docs, top_n=None):
+        return list(docs)[:top_n] if top_n else list(docs)
+
+    def warmup(self):
+        pass
+
+
+class ScoreCache:
+    def __init__(self, size):
+        self.size = size
+        self._scores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+            return score
+
+    def put(self, key, score):
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.size:
+                self._scores.popitem(last=False)
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class CrossEncoderReranker(Reranker):
+    name = "cross-encoder"
+
+    def __init__(self, model_name=None, budget_ms=None, cache_size=None, max_length=256):
+        self.model_name = model_name or getattr(
+            settings, "HARVEY_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        )
+        self.budget_ms = budget_ms if budget_ms is not None else getattr(settings, "HARVEY_RERANKER_BUDGET_MS", 30)
+        self.cache = ScoreCache(cache_size or getattr(settings, "HARVEY_RERANKER_CACHE_SIZE", 4096))
+        self.max_length = max_length
+        self.pair_ms = None  # moving average of forward-pass cost per pair
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name, device="cpu", max_length=self.max_length)
+        return self._model
+
+    def warmup(self):
+        self._predict([("warmup", "warmup")])
+
+    def _predict(self, pairs):
+        started = time.perf_counter()
+        scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        per_pair = (time.perf_counter() - started) * 1000 / len(pairs)
+        self.pair_ms = per_pair if self.pair_ms is None else 0.8 * self.pair_ms + 0.2 * per_pair
+        return [float(s) for s in scores]
+
+    def _affordable(self, count):
+        if not self.budget_ms or self.pair_ms is None:
+            return count
+        return max(1, min(count, int(self.budget_ms / self.pair_ms)))
+
+    def score(self, query, docs):
+        """Cross-encoder scores for docs (None where the latency budget ran out), in input order."""
+        qhash = query_hash(query)
+        keys = [(qhash, chunk_id(d)) for d in docs]
+        scores = [self.cache.get(k) for k in keys]
+        missing = [i for i, s in enumerate(scores) if s is None]
+        record_cache("rerank", not missing)
+
+        missing = missing[:self._affordable(len(missing))]
+        if missing:
+            fresh = self._predict([(query, docs[i].page_content) for i in missing])
+            for i, value in zip(missing, fresh):
+                scores[i] = value
+                self.cache.put(keys[i], value)
+        return scores
+
+    def rerank(self, query, docs, top_n=None):
+        docs = list(docs)
+        if len(docs) < 2:
+            return docs[:top_n] if top_n else docs
+        with RERANK_SECONDS.time(reranker=self.name), span("rerank", reranker=self.name, candidates=len(docs)):
+            try:
+                scores = self.score(query, docs)
+            except Exception as e:
+                logger.warning(f"Reranker {self.name} failed, keeping retrieval order: {e}")
+                return docs[:top_n] if top_n else docs
+        scored = sorted((i for i, s in enumerate(scores) if s is not None), key=lambda i: scores[i], reverse=True)
+        unscored = [i for i, s in enumerate(scores) if s is None]
+        ranked = [docs[i] for i in scored + unscored]
+        return ranked[:top_n] if top_n else ranked
+
+
+_reranker = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker():
+    global _reranker
+    if _reranker is None:
+        with _reranker_lock:
+            if _reranker is None:
+                path = getattr(settings, "HARVEY_RERANKER", "core.ai.rag.reranker.CrossEncoderReranker")
+                _reranker = Reranker() if path in ("", "none") else import_string(path)()
+    return _reranker
@@ -0,0 +1,102 @@
+"""
+Result cache for VectorStore.similarity_search.
+
+An entry holds the hit ids and distances for one (collection, filter, k,
+normalized query) and is keyed under its tenant's index version. Every vector
+write or delete bumps the version of the organizations it touched
+(bump_index_version), so older entries are simply never read again and age out
+on HARVEY_RETRIEVAL_CACHE_SECONDS: no scans, no pattern deletes.
+
+Searches without an organization filter live under the "*" scope, which every
+write bumps; VectorStore.delete_all() bumps a global epoch that is part of
+every key. Versions start from a clock reading rather than 0, so a version key
+evicted from Redis never resumes at a number older entries were stored under.
+"""
+import hashlib
+import json
+import logging
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("harvey")
+
+GLOBAL_SCOPE = "*"
+_EPOCH = "epoch"
+# Sentence punctuation at the end of a question; symbols inside tokens (C++, C#, .NET) are kept
+_TRAILING_PUNCTUATION = re.compile(r"[\s?.!]+$")
+
+
+def _version_key(scope):
+    return f"harvey:rag:version:{scope}"
+
+
+def _ttl():
+    return getattr(settings, "HARVEY_RETRIEVAL_CACHE_SECONDS", 600)
+
+
+def normalize_query(query):
+    """
+    Case, whitespace and a trailing ?/./! don't change the hits: "Holidays in December?" ==
+    "holidays in december". Other punctuation does: "C++ developer" != "C developer".
+    """
+    return _TRAILING_PUNCTUATION.sub("", " ".join(query.lower().split()))
+
+
+def _versions(*scopes):
+    keys = [_version_key(s) for s in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def lookup(collection, query, k, filter=None):
+    """
+    (key, hits) where hits is the cached [(id, distance)] or None on a miss.
+    key is None when caching is off or the cache is unreachable (search uncached).
+    """
+    if not _ttl():
+        return None, None
+    scope = str((filter or {}).get("organization_id", GLOBAL_SCOPE))
+    try:
+        epoch, version = _versions(_EPOCH, scope)
+        digest = hashlib.sha1(
+            json.dumps([collection, filter, k, normalize_query(query)], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        key = f"harvey:rag:{scope}:{epoch}.{version}:{digest}"
+        return key, cache.get(key)
+    except Exception as e:
+        logger.warning(f"Retrieval cache unavailable: {e}")
+        return None, None
+
+
+def store(key, hits):
+    try:
+        cache.set(key, hits, timeout=_ttl())
+    except Exception as e:
+        logger.warning(f"Retrieval cache write failed: {e}")
+
+
+def bump_index_version(*organization_ids):
+    """Invalidates cached searches of these organizations (and unscoped ones)."""
+    scopes = {str(o) for o in organization_ids if o is not None} | {GLOBAL_SCOPE}
+    for scope in scopes:
+        _bump(scope)
+
+
+def bump_all():
+    _bump(_EPOCH)
+
+
+def _bump(scope):
+    key = _version_key(scope)
+    try:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        cache.incr(key)
+    except Exception as e:
+        logger.warning(f"Could not bump retrieval cache version {scope}: {e}")
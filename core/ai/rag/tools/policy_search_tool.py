@@ -1,6 +1,138 @@
 from langchain.tools import tool
+from langchain_core.documents import Document
+from concurrent.futures import ThreadPoolExecutor
 import json
+import logging
+import re
+from core.ai.rag.compression import compress
+from core.ai.rag.reranker import get_reranker
 from core.ai.rag.vector_store import get_vector_store
+from core.observability.tracing import span
+
+logger = logging.getLogger("harvey")
+
+RRF_K = 60  # reciprocal rank fusion constant (Cormack et al.); damps the weight of top ranks
+_WORD = re.compile(r"\w+")
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="harvey-lexical")
+
+
+def lexical_search(query, organization_id, k=5):
+    """
+    Full-text search over the org's PolicyChunk rows (GIN-indexed tsvector), best ts_rank first.
+    Terms are OR-ed: a natural-language question rarely has every word in one chunk,
+    but the rare ones ("ICC", "notice period") should still pull their chunk in.
+    Matches in the chunk's section heading rank above matches in its body (weight A vs B).
+    """
+    from django.contrib.postgres.search import SearchQuery, SearchRank
+    from django.db import close_old_connections
+    from django.db.models import F
+    from core.models.policy import PolicyChunk
+
+    terms = list(dict.fromkeys(w.lower() for w in _WORD.findall(query)))
+    if not terms:
+        return []
+    search = SearchQuery(terms[0], config="english")
+    for term in terms[1:]:
+        search |= SearchQuery(term, config="english")
+
+    close_old_connections()
+    try:
+        chunks = (
+            PolicyChunk.objects
+            .filter(policy__created_by__organization_id=organization_id, staged=False, search_vector=search)
+            .annotate(rank=SearchRank(F("search_vector"), search))
+            .order_by("-rank")
+            .values("policy_id", "chunk_index", "text", "metadata", "policy__title")[:k]
+        )
+        return [
+            Document(
+                page_content=c["text"],
+                metadata={
+                    "source": c["policy__title"],
+                    "title": c["policy__title"],
+                    "policy_id": str(c["policy_id"]),
+                    "chunk_index": c["chunk_index"],
+                    "section_path": c["metadata"].get("section_path", ""),
+                    "heading": c["metadata"].get("heading", ""),
+                    "doc_type": "policy",
+                    "organization_id": str(organization_id),
+                },
+            )
+            for c in chunks
+        ]
+    finally:
+        close_old_connections()
+
+
+def hydrate_chunks(docs):
+    """
+    Fills in page_content for vectors stored without their text (HARVEY_VECTOR_STORE_TEXT
+    off), joining on the chunk_id the indexer writes into each vector's metadata.
+    Documents that already carry text are left alone, so mixed collections work.
+    """
+    from core.models.policy import PolicyChunk
+
+    missing = [d for d in docs if not d.page_content and d.metadata.get("chunk_id") is not None]
+    if not missing:
+        return docs
+    texts = dict(
+        PolicyChunk.objects.filter(id__in={d.metadata["chunk_id"] for d in missing}).values_list("id", "text")
+    )
+    for doc in missing:
+        doc.page_content = texts.get(doc.metadata["chunk_id"], "")
+    # A vector whose chunk row is gone has nothing to show
+    return [d for d in docs if d.page_content]
+
+
+def _chunk_key(doc):
+    # Vectors indexed before chunk_index was stored in metadata only match on text
+    return doc.metadata.get("policy_id"), " ".join(doc.page_content.split())
+
+
+def reciprocal_rank_fusion(*rankings, k=RRF_K):
+    """Merges ranked Document lists; each list contributes 1 / (k + rank) per chunk."""
+    scores, docs = {}, {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = _chunk_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def retrieve_policy_chunks(query, organization_id=None, k=5, top_n=3, rerank=True, hybrid=True, vector_store=None):
+    """
+    Retrieval half of search_policies: vector search and full-text search over the org's
+    policy chunks (k candidates each, run concurrently), fused with reciprocal rank fusion,
+    then reranked (HARVEY_RERANKER) down to top_n results.
+    Shared with the benchmark_retrieval command so tuning measures the real path.
+    """
+    vector_store = vector_store or get_vector_store()
+
+    # Combining org_id AND doc_type='policy'
+    search_filter = {"doc_type": "policy"}
+    if organization_id is not None:
+        search_filter["organization_id"] = str(organization_id)
+
+    logger.info(f"Searching policies for: '{query}'")
+
+    # Lexical search is tenant-scoped through Policy.created_by, so it needs an organization
+    lexical = None
+    if hybrid and organization_id is not None:
+        lexical = _lexical_pool.submit(lexical_search, query, organization_id, k)
+
+    with span("policy.retrieve", k=k, hybrid=lexical is not None):
+        results = hydrate_chunks(vector_store.similarity_search(query, k=k, filter=search_filter))
+        if lexical is not None:
+            try:
+                results = reciprocal_rank_fusion(results, lexical.result())
+            except Exception as e:
+                logger.warning(f"Lexical policy search failed, using vector results only: {e}")
+
+    if rerank:
+        return get_reranker().rerank(query, results, top_n=top_n)
+    return results[:top_n]
+
 
 @tool
 def search_policies(query: str, user=None) -> str:
@@ -9,82 +141,11 @@ def search_policies(query: str, user=None) -> str:
     Use this tool when the user asks about company rules, leave policies, benefits, code of conduct, etc.
     Returns relevant policy excerpts.
     """
-    vector_store = get_vector_store()
-    
-    display_filter = {}
-    if user and user.organization:
-        # We need to construct the filter carefully. 
-        # combining org_id AND doc_type='policy'
-        display_filter = {
-             "organization_id": str(user.organization.id),
-             "doc_type": "policy"
-        }
-    else:
-        display_filter = {"doc_type": "policy"}
-
-    # 1. Intent Mapping for Section Scoring
-    INTENT_SECTIONS = {
-        "working hours": ["4. Working Hours and Attendance", "4.1 Working Hours"],
-        "attendance": ["4. Working Hours and Attendance", "4.2 Attendance and Punctuality"],
-        "late": ["4.2 Attendance and Punctuality", "11. Disciplinary Action"],
-        "leave": ["5. Leave Policy", "5.1 Types of Leave", "12. Separation and Exit Policy"],
-        "harassment": ["7. Workplace Harassment Policy"],
-        "disciplinary": ["11. Disciplinary Action", "6. Code of Conduct"],
-        "performance": ["8. Performance Management"],
-        "promotion": ["8. Performance Management", "9. Compensation and Benefits"],
-        "salary": ["9. Compensation and Benefits", "9.1 Salary"],
-        "resignation": ["12. Separation and Exit Policy", "12.1 Resignation"],
-        "termination": ["12. Separation and Exit Policy", "12.2 Termination", "11. Disciplinary Action"]
-    }
-
-    # Query Expansion (keep for better base retrieval)
-    expansion_map = {
-        "late": "late attendance punctuality discipline",
-        "working hours": "working hours shift timing attendance",
-        "salaries": "salary payment monthly compensation",
-        "intern": "internship intern stipend"
-    }
-    expanded_query = query
-    for word, expansion in expansion_map.items():
-        if word.lower() in query.lower():
-            expanded_query += f" {expansion}"
-
-    import logging
-    logger = logging.getLogger("harvey")
-    logger.info(f"Searching policies for: '{query}' (Expanded: '{expanded_query}')")
-
-    # 2. Base Retrieval (Increase K to ensure scoring captures specific sections)
-    results = vector_store.similarity_search(expanded_query, k=15, filter=display_filter)
-    
-    if not results:
-        return json.dumps({"ok": True, "message": "The policy does not specify information regarding this query."})
+    organization_id = user.organization.id if user and user.organization else None
+    final_docs = retrieve_policy_chunks(query, organization_id=organization_id)
 
-    # 3. Intent-to-Section Scoring
-    def get_doc_score(doc, user_query):
-        score = 0
-        content = doc.page_content.lower()
-        title = doc.metadata.get("title", "").lower()
-        
-        # Match intents from map
-        for key, sections in INTENT_SECTIONS.items():
-            if key in user_query.lower():
-                for section in sections:
-                    s_lower = section.lower()
-                    if s_lower in content:
-                        # High priority for matches near the start (likely a header in micro-chunk)
-                        if s_lower in content[:100]:
-                            score += 10
-                        else:
-                            score += 5
-        
-        # Penalize generic boilerplate
-        if "purpose and scope" in content or "harvey effective date" in content:
-            score -= 5
-            
-        return score
-
-    scored_results = sorted(results, key=lambda d: get_doc_score(d, query), reverse=True)
-    final_docs = scored_results[:3]
+    if not final_docs:
+        return json.dumps({"ok": True, "message": "The policy does not specify information regarding this query."})
 
     # 4. Answerability Gate (Pre-LLM)
     # Refined Check: Look for numbers that aren't just section headers (e.g., "5.1")
@@ -109,7 +170,14 @@ def search_policies(query: str, user=None) -> str:
             logger.info("Answerability Gate: No meaningful digits found for quantitative query. Short-circuiting.")
             return json.dumps({"ok": True, "message": "The policy mentions the relevant section but does not specify the exact number, duration, or frequency for this request."})
 
-    formatted_results = [f"Source: {d.metadata.get('title', 'Unknown')}\nExcerpt: {' '.join(d.page_content.split())}" for d in final_docs]
+    # Only the relevant (and every numeric) sentence of each excerpt goes to the LLM
+    final_docs = compress(query, final_docs)
+
+    def source(d):
+        section = d.metadata.get("section_path")
+        return f"{d.metadata.get('title', 'Unknown')} > {section}" if section else d.metadata.get("title", "Unknown")
+
+    formatted_results = [f"Source: {source(d)}\nExcerpt: {' '.join(d.page_content.split())}" for d in final_docs]
     context = "\n\n".join(formatted_results)
 
     # 5. Professional LLM Rephrasing
@@ -1,6 +1,9 @@
+from langchain_core.documents import Document
 from langchain_core.tools import tool
+from core.ai.rag.candidate_search import search_candidates
+from core.ai.rag.reranker import get_reranker
 from core.ai.rag.vector_store import get_vector_store
-from core.ai.agentic.tools.utils import ok
+from core.ai.agentic.tools.utils import ok, err, get_org
 
 @tool
 def search_knowledge_base(query: str, user=None):
@@ -8,10 +11,28 @@ def search_knowledge_base(query: str, user=None):
     Searches the internal knowledge base for candidates, job roles, and other indexed information.
     Use this to find people with specific skills or details about job openings.
     """
-    store = get_vector_store()
-    # Filter for candidates and jobs
-    filter_spec = {"doc_type": {"$in": ["candidate", "job"]}}
-    results = store.similarity_search(query, k=3, filter=filter_spec)
+    org = get_org(user)
+    if not org:
+        return err("User is not associated with any organization.")
+
+    # Candidates: one hit per candidate across their skills/summary/resume vectors, in one
+    # org-scoped SQL query. Job roles: the org's nearest job vectors. The reranker picks three
+    page = search_candidates(org.id, query=query, limit=10)
+    candidates = [
+        Document(
+            page_content=hit.snippet,
+            metadata={
+                "doc_type": "candidate", "candidate_id": str(hit.id), "name": hit.name, "email": hit.email,
+                "skills": ", ".join(hit.skills), "score": hit.score, "matched_fields": hit.matched_fields,
+            },
+        )
+        for hit in page.hits
+        if hit.score is not None
+    ]
+    jobs = get_vector_store().similarity_search(
+        query, k=5, filter={"doc_type": "job", "organization_id": str(org.id)}
+    )
+    results = get_reranker().rerank(query, candidates + jobs, top_n=3)
     
     if not results:
         return ok("No relevant information found in the knowledge base.")
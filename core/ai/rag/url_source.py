@@ -0,0 +1,256 @@
+"""
+Fetching URL-sourced policies.
+
+fetch() does one GET and returns the page text (headings kept as markdown lines
+for SectionChunker) together with what a later conditional GET needs: the ETag,
+Last-Modified and a hash of the extracted text. Passing those back as
+`previous` sends If-None-Match / If-Modified-Since, and a 304 comes back with
+no text. The hash covers the extracted text rather than the raw bytes, so
+markup-only changes (a rotated CSRF token, a new analytics snippet) don't count
+as a content change.
+
+crawl() follows links from a policy's start page for handbooks spread over
+many pages: breadth-first up to max_depth link hops and max_pages pages, HTML
+only, and only below the start page's directory on the same host (a start page
+of /hr/handbook/ never wanders into /blog/ or /careers/). Each level is fetched
+concurrently on one pooled httpx.AsyncClient, and parsing runs off the event
+loop. Pages whose text hash was already seen (the same page under two URLs) are
+kept once. Linked pages that fail are skipped; a start page that fails raises,
+so a re-index never mistakes an unreachable site for an empty one.
+
+Text extraction walks the lxml tree directly (parse_html), several times
+faster than BeautifulSoup's html.parser on large intranet pages.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+from dataclasses import dataclass, field
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+import requests
+from lxml import etree
+from lxml import html as lxml_html
+
+logger = logging.getLogger("harvey")
+
+USER_AGENT = "HarveyPolicyFetcher/1.0"
+TIMEOUT = 10
+
+_SKIP = {"script", "style", "noscript", "template", "svg", "head", "iframe"}
+_HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+_BLOCK = {
+    "p", "li", "tr", "br", "div", "section", "article", "main", "header", "footer", "nav", "aside",
+    "ul", "ol", "dl", "dt", "dd", "table", "blockquote", "pre", "hr", "form", "figure", "figcaption",
+}
+_CELL = {"td", "th"}
+# Links the HTML extractor can't use
+_NON_HTML = re.compile(r"\.(pdf|docx?|xlsx?|pptx?|zip|gz|png|jpe?g|gif|svg|ico|css|js|mp4|mp3|xml|json)$", re.IGNORECASE)
+_MARKDOWN_HEADING = re.compile(r"^(#{1,5}) ", re.MULTILINE)
+
+
+@dataclass
+class SourcePage:
+    url: str
+    status: int
+    text: str = ""
+    etag: str = None
+    last_modified: str = None
+    content_hash: str = None
+    title: str = ""
+    depth: int = 0
+    links: list = field(default_factory=list)
+
+    @property
+    def not_modified(self):
+        return self.status == 304
+
+    def validators(self):
+        """What Policy.metadata["fetch"] keeps for the next conditional GET."""
+        return {"etag": self.etag, "last_modified": self.last_modified, "content_hash": self.content_hash}
+
+
+def _walk(element, out):
+    tag = element.tag if isinstance(element.tag, str) else None  # comments and PIs have callable tags
+    if tag in _HEADINGS:
+        out.append(f"\n{'#' * int(tag[1])} {' '.join(element.text_content().split())}\n")
+    elif tag is not None and tag not in _SKIP:
+        if element.text:
+            out.append(element.text)
+        for child in element:
+            _walk(child, out)
+        if tag in _BLOCK:
+            out.append("\n")
+        elif tag in _CELL:
+            out.append(" ")
+    if element.tail:
+        out.append(element.tail)
+
+
+def parse_html(content, base_url=None):
+    """(title, text, links) of an HTML document; links are absolute when base_url is given."""
+    if not content or not content.strip():
+        return "", "", []
+    try:
+        root = lxml_html.fromstring(content, base_url=base_url)
+    except (etree.ParserError, ValueError):
+        return "", "", []
+    title = " ".join((root.findtext(".//title") or "").split())
+    body = root.find("body")
+    out = []
+    _walk(body if body is not None else root, out)
+    lines = (" ".join(line.split()) for line in "".join(out).splitlines())
+    text = "\n".join(line for line in lines if line)
+    links = []
+    if base_url:
+        links = [urljoin(base_url, a.get("href").strip()) for a in root.iter("a") if a.get("href")]
+    return title, text, links
+
+
+def html_to_text(content):
+    return parse_html(content)[1]
+
+
+def demote_headings(text, levels=1):
+    """Pushes markdown headings down so a crawled page can sit under its own top-level heading."""
+    for _ in range(levels):
+        text = _MARKDOWN_HEADING.sub(r"#\1 ", text)
+    return text
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def conditional_headers(previous):
+    headers = {"User-Agent": USER_AGENT}
+    if previous and previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous and previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+def fetch(url, previous=None, session=None):
+    """GETs url (conditionally when `previous` validators are given); raises on HTTP errors."""
+    response = (session or requests).get(url, headers=conditional_headers(previous), timeout=TIMEOUT)
+    if response.status_code == 304:
+        # A 304 may omit the validators; keep the ones we sent
+        previous = previous or {}
+        return SourcePage(
+            url=url,
+            status=304,
+            etag=response.headers.get("ETag") or previous.get("etag"),
+            last_modified=response.headers.get("Last-Modified") or previous.get("last_modified"),
+            content_hash=previous.get("content_hash"),
+        )
+    response.raise_for_status()
+    title, text, _ = parse_html(response.content)
+    return SourcePage(
+        url=url,
+        status=response.status_code,
+        text=text,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        content_hash=content_hash(text),
+        title=title,
+    )
+
+
+def crawl_scope(url):
+    """(host, path prefix) a crawl from url stays within: the directory the page sits in."""
+    parts = urlsplit(url)
+    return parts.netloc.lower(), parts.path[:parts.path.rfind("/") + 1] or "/"
+
+
+def canonical_url(url, host, prefix="/"):
+    """
+    The fragment-less URL if the crawler should follow it (same host, under prefix,
+    http(s), not a binary file), else None.
+    """
+    url, _ = urldefrag(url)
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or parts.netloc.lower() != host:
+        return None
+    if not (parts.path or "/").startswith(prefix):
+        return None
+    if _NON_HTML.search(parts.path):
+        return None
+    return url
+
+
+async def _fetch_page(client, semaphore, url, depth):
+    async with semaphore:
+        try:
+            response = await client.get(url)
+            response.raise_for_status()
+        except Exception as e:
+            if depth == 0:
+                raise
+            logger.warning(f"Crawl: skipping {url}: {e}")
+            return None
+    if "html" not in response.headers.get("content-type", "text/html"):
+        return None
+    final_url = str(response.url)
+    title, text, links = await asyncio.to_thread(parse_html, response.content, final_url)
+    if not text:
+        return None
+    return SourcePage(
+        url=final_url,
+        status=response.status_code,
+        text=text,
+        etag=response.headers.get("ETag"),
+        last_modified=response.headers.get("Last-Modified"),
+        content_hash=content_hash(text),
+        title=title,
+        depth=depth,
+        links=links,
+    )
+
+
+async def _crawl(start_url, max_pages, max_depth, concurrency):
+    import httpx
+
+    host = prefix = None
+    seen_urls, seen_hashes, pages = set(), set(), []
+    frontier = [start_url]
+    seen_urls.add(urldefrag(start_url)[0])
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        limits=limits, timeout=TIMEOUT, follow_redirects=True, headers={"User-Agent": USER_AGENT}
+    ) as client:
+        for depth in range(max_depth + 1):
+            budget = max_pages - len(pages)
+            if not frontier or budget <= 0:
+                break
+            results = await asyncio.gather(*(_fetch_page(client, semaphore, url, depth) for url in frontier[:budget]))
+            if depth == 0:
+                if results[0] is None:
+                    raise ValueError(f"No HTML text at {start_url}")
+                # Scoped by where the start page landed, so /handbook redirecting to /handbook/ covers /handbook/*
+                host, prefix = crawl_scope(results[0].url)
+            frontier = []
+            # Document order within a level keeps crawls (and chunk order) deterministic
+            for page in results:
+                if page is None or page.content_hash in seen_hashes:
+                    continue
+                if depth and not canonical_url(page.url, host, prefix):
+                    continue  # redirected out of scope
+                seen_hashes.add(page.content_hash)
+                seen_urls.add(urldefrag(page.url)[0])
+                pages.append(page)
+                for link in page.links:
+                    url = canonical_url(link, host, prefix)
+                    if url and url not in seen_urls:
+                        seen_urls.add(url)
+                        frontier.append(url)
+    return pages[:max_pages]
+
+
+def crawl(start_url, max_pages=50, max_depth=2, concurrency=8):
+    """
+    Pages reachable from start_url (itself first), breadth-first, below its directory;
+    see the module docstring. Raises if start_url itself can't be fetched.
+    """
+    return asyncio.run(_crawl(start_url, max_pages, max_depth, concurrency))
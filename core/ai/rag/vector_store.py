@@ -1,20 +1,85 @@
 import os
+import re
 from django.conf import settings
+from core.observability.metrics import VECTOR_SEARCH_SECONDS, EMBEDDING_BATCH_SIZE, record_cache
+from core.observability.tracing import span
+from . import retrieval_cache
+
+ANN_INDEX_TYPES = ("none", "hnsw", "ivfflat")
+EMBEDDING_DIMS = 384  # all-MiniLM-L6-v2
+
+# Compact forms of the embedding column for the ANN scan. Each entry is the indexed
+# expression, its operator class, its distance operator and the matching query probe.
+# The float32 column stays as is and is used to rescore the scanned candidates.
+QUANTIZATIONS = ("none", "halfvec", "binary")
+_QUANTIZED = {
+    "halfvec": (
+        f"(embedding::halfvec({EMBEDDING_DIMS}))", "halfvec_cosine_ops", "<=>",
+        f"CAST(:query AS halfvec({EMBEDDING_DIMS}))",
+    ),
+    "binary": (
+        f"(binary_quantize(embedding)::bit({EMBEDDING_DIMS}))", "bit_hamming_ops", "<~>",
+        f"binary_quantize(CAST(:query AS vector({EMBEDDING_DIMS})))::bit({EMBEDDING_DIMS})",
+    ),
+}
+# Candidates scanned per result before rescoring; 1 bit per dimension needs a wider net
+RESCORE_FACTORS = {"halfvec": 2, "binary": 8}
+_FIELD = re.compile(r"^\w+$")
+ITERATIVE_SCAN_MODES = ("relaxed_order", "strict_order")
+
+
+def staged_doc_type(doc_type):
+    """The doc_type vectors are written under until promote_staged swaps them in; no search asks for it."""
+    return f"{doc_type}:staged"
+
+
+def _doc_type_label(spec):
+    doc_type = (spec or {}).get("doc_type", "any")
+    if isinstance(doc_type, dict):
+        doc_type = ",".join(doc_type.get("$in", [])) or "any"
+    return doc_type
+
+
+def metadata_filter(spec):
+    """
+    SQL for the metadata filters the tools pass to similarity_search: {field: value}
+    and {field: {"$in": [...]}}. Returns (" AND ..." clauses, bind params).
+    """
+    clauses, params = [], {}
+    for i, (field, value) in enumerate((spec or {}).items()):
+        if not _FIELD.match(field):
+            raise ValueError(f"Unsupported filter field {field!r}")
+        if isinstance(value, dict):
+            if set(value) != {"$in"}:
+                raise ValueError(f"Unsupported filter operator {value!r}")
+            clauses.append(f"cmetadata->>'{field}' = ANY(:f{i})")
+            params[f"f{i}"] = [str(v) for v in value["$in"]]
+        else:
+            clauses.append(f"cmetadata->>'{field}' = :f{i}")
+            params[f"f{i}"] = str(value)
+    return "".join(f" AND {c}" for c in clauses), params
+
 
 class VectorStore:
     _embeddings_instance = None
 
-    def __init__(self):
+    def __init__(self, collection_name="harvey_vectors", quantization=None):
+        self.collection_name = collection_name
+        self.quantization = quantization or getattr(settings, "HARVEY_VECTOR_QUANTIZATION", "none")
+        if self.quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {self.quantization!r}, expected one of {QUANTIZATIONS}")
+        self.rescore_factor = (
+            getattr(settings, "HARVEY_VECTOR_RESCORE_FACTOR", 0) or RESCORE_FACTORS.get(self.quantization, 1)
+        )
+        self._engine = None
         self._initialize()
 
     @classmethod
     def get_embeddings(cls):
-        from langchain_huggingface import HuggingFaceEmbeddings
+        from .embeddings import get_embeddings
         if cls._embeddings_instance is None:
-            cls._embeddings_instance = HuggingFaceEmbeddings(
-                model_name="all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'}
-            )
+            # HARVEY_EMBEDDINGS: torch ("huggingface") or ONNX Runtime ("onnx"), same vectors
+            cls._embeddings_instance = get_embeddings()
 
         return cls._embeddings_instance
 
@@ -30,9 +95,9 @@ class VectorStore:
             f"postgresql+psycopg://{db_config['USER']}:{db_config['PASSWORD']}"
             f"@{db_config['HOST']}:{db_config['PORT']}/{db_config['NAME']}"
         )
-        
-        self.collection_name = "harvey_vectors"
-        
+
+        self._collection_id = None
+
         # Initialize PGVector
         self.db = PGVector(
             embeddings=self.embeddings,
@@ -48,25 +113,129 @@ class VectorStore:
         # For now, we'll just add, or we could drop the table via SQL if needed.
         # To keep it simple and safe, we just add.
         if texts:
+            EMBEDDING_BATCH_SIZE.observe(len(texts), operation="documents")
             self.db.add_texts(texts, metadatas=metadatas)
+            retrieval_cache.bump_index_version(*{m.get("organization_id") for m in metadatas or []})
 
-    def add_documents(self, texts, metadatas):
-        """Adds documents to existing index"""
+    def add_documents(self, texts, metadatas, ids=None, store_text=True):
+        """
+        Adds documents to existing index. ids pins the langchain_pg_embedding row ids
+        (so callers can link vectors back to their own rows). With store_text=False the
+        texts are embedded but the document column is left empty; the caller keeps
+        the text and hydrates search results itself.
+        """
         if texts:
-            self.db.add_texts(texts, metadatas=metadatas)
+            EMBEDDING_BATCH_SIZE.observe(len(texts), operation="documents")
+            if store_text:
+                self.db.add_texts(texts, metadatas=metadatas, ids=ids)
+            else:
+                embeddings = self.embeddings.embed_documents(list(texts))
+                self.db.add_embeddings(texts=[""] * len(texts), embeddings=embeddings, metadatas=metadatas, ids=ids)
+            retrieval_cache.bump_index_version(*{m.get("organization_id") for m in metadatas or []})
+
+
+
+
+    def _execute(self, sql, params=None):
+        from sqlalchemy import text, create_engine
+        if self._engine is None:
+            self._engine = create_engine(self.connection_string)
+        with self._engine.connect() as conn:
+            result = conn.execute(text(sql), params or {})
+            # Buffer rows so they can be read after the connection goes back to the pool
+            result = result.freeze()() if result.returns_rows else result
+            conn.commit()
+            return result
+
+    def collection_id(self):
+        if self._collection_id is None:
+            row = self._execute(
+                "SELECT uuid FROM langchain_pg_collection WHERE name = :name", {"name": self.collection_name}
+            ).first()
+            self._collection_id = str(row[0]) if row else None
+        return self._collection_id
+
+    def embedding_dimension(self):
+        """The embedding column's declared dimension, or None while it is a bare `vector`."""
+        typmod = self._execute(
+            "SELECT atttypmod FROM pg_attribute "
+            "WHERE attrelid = 'langchain_pg_embedding'::regclass AND attname = 'embedding'"
+        ).scalar()
+        return typmod if typmod and typmod > 0 else None
+
+    def ensure_ann_index(
+        self, kind="hnsw", m=16, ef_construction=64, lists=100, scoped=False, quantization="none", pin_dimension=False
+    ):
+        """
+        Builds an approximate-nearest-neighbour index (cosine ops) on the embedding
+        column and returns its name, or None for kind="none" (exact scan).
 
+        pgvector needs a fixed dimension to index. Pinning the shared column to
+        vector(384) rewrites the whole table under an ACCESS EXCLUSIVE lock, so it
+        only happens with pin_dimension=True; otherwise an unpinned column raises
+        ValueError. With scoped=True the index is partial on this collection only
+        (used by benchmark_retrieval to leave production indexes alone).
+        quantization="halfvec"/"binary" indexes the compact expression instead of
+        the float32 column (half / 1/32 of the size); search with a VectorStore of
+        the same quantization so queries use it.
+        """
+        if kind not in ANN_INDEX_TYPES:
+            raise ValueError(f"Unknown index type {kind!r}, expected one of {ANN_INDEX_TYPES}")
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization {quantization!r}, expected one of {QUANTIZATIONS}")
+        if kind == "none":
+            return None
 
+        if self.embedding_dimension() != EMBEDDING_DIMS:
+            if not pin_dimension:
+                raise ValueError(
+                    f"langchain_pg_embedding.embedding is not vector({EMBEDDING_DIMS}); pin it in a migration "
+                    f"(ALTER COLUMN embedding TYPE vector({EMBEDDING_DIMS})) before building an ANN index"
+                )
+            self._execute(f"ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector({EMBEDDING_DIMS})")
+
+        if kind == "hnsw":
+            options = f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+            name = f"harvey_embedding_hnsw_m{int(m)}_ef{int(ef_construction)}"
+        else:
+            options = f"WITH (lists = {int(lists)})"
+            name = f"harvey_embedding_ivfflat_l{int(lists)}"
+
+        column = "embedding vector_cosine_ops"
+        if quantization != "none":
+            expression, opclass, _, _ = _QUANTIZED[quantization]
+            column = f"{expression} {opclass}"
+            name = f"{name}_{quantization}"
+
+        where = ""
+        if scoped:
+            collection_id = self.collection_id()
+            where = f"WHERE collection_id = '{collection_id}'"
+            name = f"{name}_{collection_id.replace('-', '')[:12]}"
+
+        self._execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON langchain_pg_embedding "
+            f"USING {kind} ({column}) {options} {where}"
+        )
+        self._execute("ANALYZE langchain_pg_embedding")
+        return name
+
+    def drop_ann_index(self, name):
+        if name:
+            self._execute(f"DROP INDEX IF EXISTS {name}")
+
+    def ann_indexes(self):
+        """[(name, size in bytes)] for the harvey_embedding_* ANN indexes on langchain_pg_embedding."""
+        rows = self._execute(
+            "SELECT indexname, pg_relation_size(quote_ident(indexname)::regclass) FROM pg_indexes "
+            "WHERE tablename = 'langchain_pg_embedding' AND indexname LIKE 'harvey_embedding_%' ORDER BY indexname"
+        ).fetchall()
+        return [(name, size) for name, size in rows]
 
     def delete_by_policy_id(self, policy_id):
         """Deletes all chunks for a specific policy from the vector store."""
         try:
-            from sqlalchemy import text, create_engine
-            # create a temporary engine to execute the deletion
-            engine = create_engine(self.connection_string)
-            sql = text("DELETE FROM langchain_pg_embedding WHERE cmetadata->>'policy_id' = :policy_id")
-            with engine.connect() as conn:
-                conn.execute(sql, {"policy_id": str(policy_id)})
-                conn.commit()
+            self._delete_where("policy_id", policy_id)
             return True
         except Exception as e:
             print(f"Error deleting vectors for policy {policy_id}: {e}")
@@ -75,12 +244,7 @@ class VectorStore:
     def delete_by_candidate_id(self, candidate_id):
         """Deletes all vectors for a specific candidate from the vector store."""
         try:
-            from sqlalchemy import text, create_engine
-            engine = create_engine(self.connection_string)
-            sql = text("DELETE FROM langchain_pg_embedding WHERE cmetadata->>'candidate_id' = :candidate_id")
-            with engine.connect() as conn:
-                conn.execute(sql, {"candidate_id": str(candidate_id)})
-                conn.commit()
+            self._delete_where("candidate_id", candidate_id)
             return True
         except Exception as e:
             print(f"Error deleting vectors for candidate {candidate_id}: {e}")
@@ -89,24 +253,65 @@ class VectorStore:
     def delete_by_job_id(self, job_id):
         """Deletes all vectors for a specific job role from the vector store."""
         try:
-            from sqlalchemy import text, create_engine
-            engine = create_engine(self.connection_string)
-            sql = text("DELETE FROM langchain_pg_embedding WHERE cmetadata->>'job_id' = :job_id")
-            with engine.connect() as conn:
-                conn.execute(sql, {"job_id": str(job_id)})
-                conn.commit()
+            self._delete_where("job_id", job_id)
             return True
         except Exception as e:
             print(f"Error deleting vectors for job {job_id}: {e}")
             return False
 
+    def _delete_where(self, field, value, staged=False):
+        """Deletes this metadata match and invalidates cached searches of the organizations it touched."""
+        only_staged = " AND cmetadata->>'doc_type' LIKE :staged" if staged else ""
+        rows = self._execute(
+            "WITH deleted AS (DELETE FROM langchain_pg_embedding "
+            f"WHERE cmetadata->>'{field}' = :value{only_staged} RETURNING cmetadata->>'organization_id' AS organization_id) "
+            "SELECT DISTINCT organization_id FROM deleted",
+            {"value": str(value), "staged": "%" + staged_doc_type("")},
+        ).fetchall()
+        retrieval_cache.bump_index_version(*(organization_id for (organization_id,) in rows))
+
+    def delete_staged(self, field, value):
+        """Deletes the staged (not yet promoted) vectors of this metadata match."""
+        if not _FIELD.match(field):
+            raise ValueError(f"Invalid metadata field {field!r}")
+        self._delete_where(field, value, staged=True)
+
+    def promote_staged(self, field, value, cursor):
+        """
+        Swaps this metadata match's staged vectors in for its live ones: the live rows
+        are deleted and the staged rows get their doc_type back, in one statement.
+        Runs on the caller's DB-API cursor, so it commits (or rolls back) with the
+        caller's transaction; cached searches are invalidated once that commits.
+        """
+        from django.db import transaction
+
+        if not _FIELD.match(field):
+            raise ValueError(f"Invalid metadata field {field!r}")
+        cursor.execute(
+            "WITH dropped AS ("
+            "DELETE FROM langchain_pg_embedding "
+            f"WHERE cmetadata->>'{field}' = %(value)s AND coalesce(cmetadata->>'doc_type', '') NOT LIKE '%%:staged' "
+            "RETURNING cmetadata->>'organization_id' AS organization_id"
+            "), promoted AS ("
+            "UPDATE langchain_pg_embedding "
+            "SET cmetadata = jsonb_set(cmetadata, '{doc_type}', to_jsonb(left(cmetadata->>'doc_type', -7))) "
+            f"WHERE cmetadata->>'{field}' = %(value)s AND cmetadata->>'doc_type' LIKE '%%:staged' "
+            "RETURNING cmetadata->>'organization_id' AS organization_id"
+            ") SELECT organization_id FROM dropped UNION SELECT organization_id FROM promoted",
+            {"value": str(value)},
+        )
+        organization_ids = [organization_id for (organization_id,) in cursor.fetchall()]
+        transaction.on_commit(lambda: retrieval_cache.bump_index_version(*organization_ids))
+        return organization_ids
+
     def delete_all(self):
         """Clears all vectors in the collection."""
         try:
              # Dropping the collection is the cleanest way to clear everything
              self.db.delete_collection()
-             # Re-initialize to recreate the collection if needed
+             # Re-initialize to recreate the collection if needed (new collection id too)
              self._initialize()
+             retrieval_cache.bump_all()
              return True
         except Exception as e:
              # Fallback if delete_collection is not available or fails
@@ -114,7 +319,114 @@ class VectorStore:
              return False
 
     def similarity_search(self, query, k=3, **kwargs):
-        return self.db.similarity_search(query, k=k, **kwargs)
+        """
+        Nearest k documents. Results (ids and distances) are cached per tenant index
+        version (see retrieval_cache); a hit costs one primary-key lookup instead of
+        embedding the query and scanning pgvector.
+        """
+        filter = kwargs.get("filter")
+        doc_type = _doc_type_label(filter)
+        # Only plain (query, k, filter) searches are cacheable
+        cacheable = set(kwargs) <= {"filter"}
+        key, hits = retrieval_cache.lookup(self.collection_name, query, k, filter) if cacheable else (None, None)
+        if key:
+            record_cache("retrieval", hits is not None)
+            docs = self._fetch(hits) if hits is not None else None
+            if docs is not None:
+                return docs
+
+        EMBEDDING_BATCH_SIZE.observe(1, operation="query")
+        with VECTOR_SEARCH_SECONDS.time(doc_type=doc_type), span("vector.similarity_search", k=k, doc_type=doc_type):
+            if self.quantization != "none":
+                scored = self._quantized_search(query, k, filter)
+            else:
+                scored = self.db.similarity_search_with_score(query, k=k, **kwargs)
+        if key and all(doc.id for doc, _ in scored):
+            retrieval_cache.store(key, [(doc.id, float(distance)) for doc, distance in scored])
+        return [doc for doc, _ in scored]
+
+    def _fetch(self, hits):
+        """Documents for cached (id, distance) hits in their ranked order, or None if any row is gone."""
+        from langchain_core.documents import Document
+
+        if not hits:
+            return []
+        rows = self._execute(
+            "SELECT id, document, cmetadata FROM langchain_pg_embedding WHERE id = ANY(:ids)",
+            {"ids": [vector_id for vector_id, _ in hits]},
+        ).fetchall()
+        found = {vector_id: (document, metadata) for vector_id, document, metadata in rows}
+        if len(found) != len(hits):
+            return None
+        return [
+            Document(id=vector_id, page_content=found[vector_id][0], metadata=found[vector_id][1])
+            for vector_id, _ in hits
+        ]
+
+    def _quantized_search(self, query, k, filter=None):
+        """
+        Two-phase search for HARVEY_VECTOR_QUANTIZATION: the ANN scan orders by the
+        compact expression (served by the index compact_vectors builds) and keeps
+        k * rescore_factor candidates, which are then re-ranked by exact cosine
+        distance on the full-precision column. Returns [(Document, distance)].
+        """
+        from langchain_core.documents import Document
+
+        scan, params = self._scan_sql(filter)
+        if scan is None:
+            return []
+        sql = (
+            f"SELECT id, document, cmetadata, embedding <=> CAST(:query AS vector({EMBEDDING_DIMS})) AS distance "
+            f"FROM ({scan}) scanned ORDER BY distance LIMIT :k"
+        )
+        rows = self._query(sql, query, params, scan=k * self.rescore_factor, k=k)
+        return [
+            (Document(id=vector_id, page_content=document, metadata=metadata), distance)
+            for vector_id, document, metadata, distance in rows
+        ]
+
+    def _scan_sql(self, filter, extra=""):
+        """
+        The ANN candidate scan (LIMIT :scan rows, nearest first) over this collection:
+        by the compact expression when quantized, else the float32 column. `extra` is
+        appended to the WHERE clause as is (e.g. a semi-join on the caller's own table).
+        Returns (sql, filter params), or (None, None) before the collection exists.
+        """
+        collection_id = self.collection_id()
+        if collection_id is None:
+            return None, None
+        where, params = metadata_filter(filter)
+        if self.quantization != "none":
+            expression, _, operator, probe = _QUANTIZED[self.quantization]
+            order = f"{expression} {operator} {probe}"
+        else:
+            order = f"embedding <=> CAST(:query AS vector({EMBEDDING_DIMS}))"
+        # The collection id is inlined so a partial (scoped) index can match the predicate
+        return (
+            "SELECT id, document, cmetadata, embedding FROM langchain_pg_embedding "
+            f"WHERE collection_id = '{collection_id}'{where}{extra} ORDER BY {order} LIMIT :scan"
+        ), params
+
+    def _query(self, sql, query, params, scan, k, iterative=False):
+        """
+        Runs a scan query with the embedded query bound to :query. iterative=True is for
+        scans whose WHERE clause rejects many of the nearest rows: with pgvector >= 0.8
+        (HARVEY_VECTOR_ITERATIVE_SCAN) the HNSW scan keeps going until :scan rows pass it.
+        """
+        from sqlalchemy import text, create_engine
+
+        vector = "[" + ",".join(str(float(x)) for x in self.embeddings.embed_query(query)) + "]"
+        if self._engine is None:
+            self._engine = create_engine(self.connection_string)
+        with self._engine.connect() as conn:
+            # HNSW returns at most ef_search rows per scan
+            conn.execute(text(f"SET LOCAL hnsw.ef_search = {max(int(scan), 40)}"))
+            mode = getattr(settings, "HARVEY_VECTOR_ITERATIVE_SCAN", "relaxed_order")
+            if iterative and mode in ITERATIVE_SCAN_MODES:
+                conn.execute(text(f"SET LOCAL hnsw.iterative_scan = {mode}"))
+            rows = conn.execute(text(sql), {**params, "query": vector, "scan": scan, "k": k}).fetchall()
+            conn.commit()
+        return rows
 
 _vector_store_instance = None
 
@@ -1,64 +1,168 @@
+"""
+LLM match scores for candidates against a job role (CandidateJobScore).
+
+score_candidates() is what shortlisting uses. It reads the scores already
+stored for the role in one query, packs the unscored candidates
+HARVEY_SCORING_BATCH_SIZE to a prompt, runs up to HARVEY_SCORING_CONCURRENCY
+prompts at once, and saves the new scores with a single upsert. The worker
+threads only talk to the LLM; every query runs on the calling thread.
+"""
+import contextvars
 import json
-from core.models.recruitment import CandidateJobScore
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.conf import settings
 from langchain_core.messages import HumanMessage
+from langchain_core.output_parsers import JsonOutputParser
+from pydantic import BaseModel, Field
+
+from core.models.recruitment import CandidateJobScore
+from core.observability.tracing import span
+
+logger = logging.getLogger("harvey")
+
+# Resume text per candidate in a scoring prompt; a few pages of a typical resume
+RESUME_CHARS = 4000
+
+
+class CandidateScore(BaseModel):
+    candidate_id: int = Field(description="The id given for the candidate")
+    score: int = Field(description="Match score from 0 to 100")
+    justification: str = Field(description="One or two sentences on the match")
+
+
+class BatchScores(BaseModel):
+    scores: List[CandidateScore]
+
+
+BATCH_TEMPLATE = """You are an expert HR recruiter. Evaluate each of the following candidates for the given job role.
+
+Job Role:
+{job_info}
+
+Candidates:
+{candidates}
+
+Score every candidate independently: a match score from 0 to 100 and a brief justification.
+Return a valid JSON object of the form
+{{"scores": [{{"candidate_id": <id>, "score": <integer>, "justification": "<string>"}}, ...]}}
+with one entry per candidate. Do not include any other text.
+"""
+
+
+def _job_info(job_role):
+    return f"Title: {job_role.title}\nDescription: {job_role.description}\nRequirements: {job_role.requirements}"
+
+
+def _candidate_info(candidate):
+    resume = candidate.parsed_data
+    if not isinstance(resume, str):
+        resume = json.dumps(resume) if resume else ""
+    return (
+        f"[Candidate id {candidate.id}]\nName: {candidate.name}\nSkills: {candidate.skills}\n"
+        f"Resume Text: {resume[:RESUME_CHARS]}"
+    )
+
 
 class CandidateScorer:
     def __init__(self):
         from core.ai.agentic.graph.tools_registry import get_reasoner_llm
         self.llm = get_reasoner_llm()
+        self.parser = JsonOutputParser(pydantic_object=BatchScores)
+
+    def score_batch(self, candidates, job_role):
+        """
+        Scores several candidates in one prompt. Returns {candidate_id: (score, justification)}
+        for the candidates the model scored; nothing is saved.
+        """
+        from core.ai.agentic.graph.nodes.utils import log_token_usage
+
+        prompt = BATCH_TEMPLATE.format(
+            job_info=_job_info(job_role),
+            candidates="\n\n".join(_candidate_info(c) for c in candidates),
+        )
+        with span("candidate.score_batch", candidates=len(candidates), job_role=job_role.id):
+            response = self.llm.invoke([HumanMessage(content=prompt)])
+        log_token_usage(response, "Candidate scoring (17B)")
+
+        data = self.parser.parse(response.content)
+        if isinstance(data, dict) and "score" in data and len(candidates) == 1:
+            # A lone candidate sometimes comes back as the bare object
+            data = {"scores": [{**data, "candidate_id": candidates[0].id}]}
+        ids = {c.id for c in candidates}
+        scores = {}
+        for item in (data or {}).get("scores", []):
+            try:
+                candidate_id = int(item["candidate_id"])
+                score = max(0, min(100, int(item.get("score", 0))))
+            except (KeyError, TypeError, ValueError):
+                continue
+            if candidate_id in ids:
+                scores[candidate_id] = (score, item.get("justification") or "No justification provided.")
+        return scores
+
+    def score_candidates(self, candidates, job_role, batch_size=None, concurrency=None):
+        """
+        {candidate_id: (score, justification)} for every candidate: stored scores as is,
+        the rest scored in concurrent batches and saved. A batch that fails scores its
+        candidates 0 with the error (not saved, so the next shortlist retries them).
+        """
+        batch_size = batch_size or getattr(settings, "HARVEY_SCORING_BATCH_SIZE", 5)
+        concurrency = concurrency or getattr(settings, "HARVEY_SCORING_CONCURRENCY", 4)
+        candidates = list(candidates)
+        results = {
+            s.candidate_id: (s.score, s.justification)
+            for s in CandidateJobScore.objects.filter(job_role=job_role, candidate__in=candidates)
+        }
+        missing = [c for c in candidates if c.id not in results]
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+
+        def run(batch):
+            try:
+                return batch, self.score_batch(batch, job_role), None
+            except Exception as e:
+                logger.warning(f"Scoring {len(batch)} candidates for job role {job_role.id} failed: {e}")
+                return batch, {}, e
+
+        if len(batches) > 1 and concurrency > 1:
+            # Each task gets its own copy of the caller's turn context (token attribution, trace
+            # parent); it has to be copied here, on the submitting thread, not inside the worker
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches)), thread_name_prefix="harvey-score") as pool:
+                futures = [pool.submit(contextvars.copy_context().run, run, batch) for batch in batches]
+                outcomes = [future.result() for future in futures]
+        else:
+            outcomes = [run(batch) for batch in batches]
+
+        fresh = []
+        for batch, scores, error in outcomes:
+            for candidate in batch:
+                if candidate.id in scores:
+                    score, justification = scores[candidate.id]
+                    fresh.append(CandidateJobScore(candidate=candidate, job_role=job_role, score=score, justification=justification))
+                    results[candidate.id] = scores[candidate.id]
+                elif error:
+                    results[candidate.id] = (0, f"Error during scoring: {error}")
+                else:
+                    results[candidate.id] = (0, "The model returned no score for this candidate.")
+
+        if fresh:
+            CandidateJobScore.objects.bulk_create(
+                fresh,
+                update_conflicts=True,
+                unique_fields=["candidate", "job_role"],
+                update_fields=["score", "justification"],
+            )
+        logger.info(
+            f"Scored {len(fresh)} of {len(missing)} unscored candidates for job role {job_role.id} "
+            f"in {len(batches)} batch(es); {len(candidates) - len(missing)} already scored"
+        )
+        return results
 
     def score_candidate(self, candidate, job_role):
         """
         Scores a candidate against a job role using LLM.
         Returns the score (0-100) and justification.
         """
-        
-        # Prepare the prompt
-        candidate_info = f"Name: {candidate.name}\nSkills: {candidate.skills}\nResume Text: {candidate.parsed_data}"
-        job_info = f"Title: {job_role.title}\nDescription: {job_role.description}\nRequirements: {job_role.requirements}"
-        
-        prompt = f"""
-        You are an expert HR recruiter. Evaluate the following candidate for the given job role.
-        
-        Job Role:
-        {job_info}
-        
-        Candidate:
-        {candidate_info}
-        
-        Provide a match score from 0 to 100 and a brief justification.
-        Return the output as a valid JSON object with keys "score" (integer) and "justification" (string).
-        Do not include any other text.
-        """
-        
-        try:
-            response = self.llm.invoke([HumanMessage(content=prompt)])
-            content = response.content
-            
-            # Clean up potential markdown formatting
-            if "```json" in content:
-                content = content.split("```json")[1].split("```")[0].strip()
-            elif "```" in content:
-                content = content.split("```")[1].split("```")[0].strip()
-                
-            data = json.loads(content)
-            score = data.get("score", 0)
-            justification = data.get("justification", "No justification provided.")
-            
-            # Save or update the score in the database
-            CandidateJobScore.objects.update_or_create(
-                candidate=candidate,
-                job_role=job_role,
-                defaults={
-                    "score": score,
-                    "justification": justification
-                }
-            )
-            
-            return score, justification
-            
-        except Exception as e:
-            print(f"Error scoring candidate: {e}")
-            return 0, f"Error during scoring: {e}"
-
-# I need to check ChatService to implement this correctly.
+        return self.score_candidates([candidate], job_role)[candidate.id]
@@ -0,0 +1,237 @@
+"""
+Process-pool text extraction for policies and resumes.
+
+pdfminer, pypdf and python-docx are pure Python and CPU-bound; run on threads
+inside the web process they serialize on the GIL and stall request handling.
+`extract_pages()` runs them in a pool of HARVEY_EXTRACT_WORKERS spawned
+processes, and only the extracted page texts come back across the boundary.
+`iter_page_batches()` does the same HARVEY_EXTRACT_BATCH_PAGES pages of a PDF
+at a time (the next batch extracting while the caller handles the current one),
+so an indexer can stream a long PDF and report progress page by page.
+
+Per task (a file, or a batch of its pages):
+- HARVEY_EXTRACT_TIMEOUT seconds, enforced inside the worker with an interval
+  timer (the worker survives) and in the parent as a backstop that recycles the pool;
+- HARVEY_EXTRACT_MEMORY_MB of address space per worker (RLIMIT_AS), so a
+  pathological PDF fails with MemoryError instead of swapping the host.
+
+HARVEY_EXTRACT_WORKERS = 0 extracts inline (tests, single-core boxes).
+"""
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+logger = logging.getLogger("harvey")
+
+BACKSTOP_GRACE_SECONDS = 10
+TASKS_PER_WORKER = 50  # recycle workers to shed pdfminer's heap fragmentation
+
+
+class ExtractionError(Exception):
+    """Text could not be extracted from a file."""
+
+
+class ExtractionTimeout(ExtractionError):
+    pass
+
+
+# ─────────────────────────────
+# Worker side (no Django, no ORM)
+# ─────────────────────────────
+def _init_worker(memory_mb):
+    if memory_mb:
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout("extraction timed out")
+
+
+def docx_line(para):
+    """Paragraph text, with Title/Heading N styles marked as markdown headings for SectionChunker."""
+    style = para.style.name if para.style is not None else ""
+    if style == "Title":
+        return f"# {para.text}"
+    if style.startswith("Heading ") and style[8:].isdigit() and para.text.strip():
+        return f"{'#' * min(int(style[8:]), 6)} {para.text}"
+    return para.text
+
+
+def _pdf_pages_pdfminer(path, first=0, last=None):
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+    pages = extract_pages(path) if last is None else extract_pages(path, page_numbers=range(first, last), maxpages=last)
+    return [
+        "".join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+        for page in pages
+    ]
+
+
+def _pdf_pages_pypdf(path, first=0, last=None):
+    from pypdf import PdfReader
+    return [f"{page.extract_text() or ''}\n" for page in PdfReader(path).pages[first:last]]
+
+
+def _pdf_page_count(path):
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+
+def _extract(path, pdf_engine="pdfminer", headings=True, timeout=None, pages=None):
+    """
+    Runs in the worker: page texts for a PDF (only pages[0]:pages[1] when a range is
+    given), one 'page' for DOCX/TXT.
+    """
+    if timeout and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".pdf":
+            first, last = pages or (0, None)
+            if pdf_engine == "pypdf":
+                return _pdf_pages_pypdf(path, first, last)
+            return _pdf_pages_pdfminer(path, first, last)
+        if ext in (".docx", ".doc"):
+            import docx
+            doc = docx.Document(path)
+            return ["\n".join(docx_line(p) if headings else p.text for p in doc.paragraphs) + "\n"]
+        if ext == ".txt":
+            with open(path, encoding="utf-8") as f:
+                return [f.read()]
+        raise ExtractionError(f"Unsupported file format: {ext}")
+    finally:
+        if timeout and threading.current_thread() is threading.main_thread():
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ─────────────────────────────
+# Parent side
+# ─────────────────────────────
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _workers():
+    workers = getattr(settings, "HARVEY_EXTRACT_WORKERS", None)
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that runs Django, Channels and model threads is not safe
+            options = {"max_tasks_per_child": TASKS_PER_WORKER} if sys.version_info >= (3, 11) else {}
+            _pool = ProcessPoolExecutor(
+                max_workers=_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(getattr(settings, "HARVEY_EXTRACT_MEMORY_MB", 1024),),
+                **options,
+            )
+        return _pool
+
+
+def _recycle_pool(pool):
+    """Kills a wedged or broken pool's workers; the next call starts a fresh pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        process.kill()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(fn, *args):
+    """(pool, future) for fn(*args) in the worker pool, replacing a broken pool once."""
+    pool = _get_pool()
+    try:
+        return pool, pool.submit(fn, *args)
+    except (BrokenProcessPool, RuntimeError):
+        _recycle_pool(pool)
+        pool = _get_pool()
+        return pool, pool.submit(fn, *args)
+
+
+def _result(pool, future, path, timeout):
+    try:
+        return future.result(timeout=timeout + BACKSTOP_GRACE_SECONDS)
+    except FutureTimeout:
+        logger.error(f"Extraction of {path} exceeded {timeout}s and did not stop; recycling the worker pool")
+        _recycle_pool(pool)
+        raise ExtractionTimeout(f"Extraction of {os.path.basename(path)} timed out after {timeout}s")
+    except BrokenProcessPool:
+        _recycle_pool(pool)
+        raise ExtractionError(f"Extraction worker died on {os.path.basename(path)} (memory limit?)")
+    except MemoryError:
+        raise ExtractionError(f"{os.path.basename(path)} exceeds the extraction memory limit")
+
+
+def extract_pages(path, pdf_engine="pdfminer", headings=True, timeout=None):
+    """Page texts of a policy or resume file, extracted in the worker pool."""
+    timeout = timeout or getattr(settings, "HARVEY_EXTRACT_TIMEOUT", 120)
+    if _workers() == 0:
+        return _extract(path, pdf_engine, headings)
+    pool, future = _submit(_extract, path, pdf_engine, headings, timeout)
+    return _result(pool, future, path, timeout)
+
+
+def iter_page_batches(path, pdf_engine="pdfminer", headings=True, timeout=None, batch_pages=None):
+    """
+    Yields (page texts, total pages) a batch of pages at a time; the whole file is one
+    batch unless it is a PDF. Each batch is its own task in the worker pool, and the
+    next one is submitted before the current one is handed back.
+    """
+    timeout = timeout or getattr(settings, "HARVEY_EXTRACT_TIMEOUT", 120)
+    batch_pages = batch_pages or getattr(settings, "HARVEY_EXTRACT_BATCH_PAGES", 16)
+    if os.path.splitext(path)[1].lower() != ".pdf":
+        pages = extract_pages(path, pdf_engine, headings, timeout)
+        yield pages, len(pages)
+        return
+
+    if _workers() == 0:
+        total = _pdf_page_count(path)
+        for first in range(0, total, batch_pages):
+            yield _extract(path, pdf_engine, headings, pages=(first, first + batch_pages)), total
+        return
+
+    pool, future = _submit(_pdf_page_count, path)
+    total = _result(pool, future, path, timeout)
+    ranges = [(first, first + batch_pages) for first in range(0, total, batch_pages)]
+    pending = None
+    try:
+        for i, pages in enumerate(ranges):
+            pool, future = pending or _submit(_extract, path, pdf_engine, headings, timeout, pages)
+            pending = None
+            if i + 1 < len(ranges):
+                pending = _submit(_extract, path, pdf_engine, headings, timeout, ranges[i + 1])
+            yield _result(pool, future, path, timeout), total
+    finally:
+        if pending:
+            # The caller stopped early or a batch failed
+            pending[1].cancel()
+
+
+def extract_text(path, **kwargs):
+    return "".join(extract_pages(path, **kwargs))
+
+
+def shutdown():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -1,11 +1,11 @@
 import os
-from pypdf import PdfReader
-from docx import Document
+from core.ai.utils.extraction import extract_text
 
 class ResumeParser:
     def parse(self, file_path):
         """
         Parses a resume file (PDF or DOCX) and extracts text.
+        Parsing runs in the extraction process pool (core.ai.utils.extraction).
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
@@ -21,20 +21,12 @@ class ResumeParser:
 
     def _parse_pdf(self, file_path):
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+            return extract_text(file_path, pdf_engine="pypdf", headings=False)
         except Exception as e:
             raise ValueError(f"Error parsing PDF: {e}")
 
     def _parse_docx(self, file_path):
         try:
-            doc = Document(file_path)
-            text = ""
-            for para in doc.paragraphs:
-                text += para.text + "\n"
-            return text
+            return extract_text(file_path, headings=False)
         except Exception as e:
             raise ValueError(f"Error parsing DOCX: {e}")
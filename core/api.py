@@ -1,9 +1,8 @@
 from rest_framework import serializers, viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from .models import Policy, Conversation, Message
-from core.ai.rag.policy_indexer import PolicyIndexer
-import threading
+from .models import Policy, Conversation, Message, BackgroundJob
+from core.jobs import enqueue, job_payload
 from django.http import JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
@@ -27,11 +26,9 @@ class PolicyViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def index(self, request, pk=None):
         policy = self.get_object()
-        indexer = PolicyIndexer()
-        # Run in thread
-        thread = threading.Thread(target=indexer.index_policy, args=(policy.id,))
-        thread.start()
-        return Response({'status': 'indexing started'}, status=status.HTTP_202_ACCEPTED)
+        # Durable, coalesced job; poll /api/jobs/<job_id>/ for progress
+        job = enqueue("index_policy", policy.id, organization_id=request.user.organization_id)
+        return Response({'status': 'queued', 'job_id': job.id if job else None}, status=status.HTTP_202_ACCEPTED)
 
 
 # --- Multiple Conversations API ---
@@ -106,3 +103,37 @@ def delete_conversation(request, conversation_id):
         return JsonResponse({"error": "Conversation not found"}, status=404)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
+
+
+# --- Background jobs ---
+
+JOBS_LIMIT_MAX = 200
+
+@login_required
+def list_jobs(request):
+    """
+    Recent background jobs for the user's organization, newest first.
+    Optional filters: kind, entity_id, status; limit (1-200, default 50).
+    """
+    try:
+        limit = int(request.GET.get("limit", 50))
+    except ValueError:
+        return JsonResponse({"error": "limit must be an integer"}, status=400)
+    if limit < 1:
+        return JsonResponse({"error": "limit must be at least 1"}, status=400)
+    limit = min(limit, JOBS_LIMIT_MAX)
+
+    jobs = BackgroundJob.objects.filter(organization_id=request.user.organization_id)
+    for field in ("kind", "entity_id", "status"):
+        if request.GET.get(field):
+            jobs = jobs.filter(**{field: request.GET[field]})
+    return JsonResponse({"jobs": [job_payload(j) for j in jobs.order_by("-created_at", "-id")[:limit]]})
+
+
+@login_required
+def get_job(request, job_id):
+    try:
+        job = BackgroundJob.objects.get(id=job_id, organization_id=request.user.organization_id)
+    except BackgroundJob.DoesNotExist:
+        return JsonResponse({"error": "Job not found"}, status=404)
+    return JsonResponse(job_payload(job))
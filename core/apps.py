@@ -7,3 +7,6 @@ class CoreConfig(AppConfig):
 
     def ready(self):
         import core.signals
+        from django.db.backends.signals import connection_created
+        from core.observability.tracing import install_db_tracing
+        connection_created.connect(install_db_tracing)
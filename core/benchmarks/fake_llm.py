@@ -0,0 +1,142 @@
+"""
+Local OpenAI-compatible stand-in for the Groq API, used by `benchmark_chat`.
+
+Serves POST /openai/v1/chat/completions (the path the Groq SDK calls) and
+/v1/chat/completions. Each response waits `latency_ms` (time to first token)
+plus `completion_tokens / tokens_per_sec`, and reports usage so token
+accounting behaves as in production. Replies are shaped by request type:
+
+- router prompt ("Classify intent") → intent JSON; prompts mentioning
+  "policy" are routed to `search_policies`, everything else is chat;
+- summarizer prompt → empty context JSON;
+- tool-enabled request → a `search_policies` tool call;
+- anything else → filler text of the profile's completion length.
+"""
+import json
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+@dataclass
+class LatencyProfile:
+    latency_ms: float = 200
+    tokens_per_sec: float = 300
+    completion_tokens: int = 60
+
+
+PROFILES = {
+    "instant": LatencyProfile(latency_ms=0, tokens_per_sec=1e9, completion_tokens=20),
+    "groq": LatencyProfile(latency_ms=250, tokens_per_sec=500, completion_tokens=80),
+    "slow": LatencyProfile(latency_ms=1500, tokens_per_sec=60, completion_tokens=150),
+}
+
+
+def _last_user_text(prompt):
+    lines = re.findall(r"^\s*human:\s*(.*)$", prompt, flags=re.MULTILINE)
+    return lines[-1] if lines else prompt
+
+
+def build_reply(body, profile):
+    """Returns (message dict, completion token count) for a chat completion request body."""
+    messages = body.get("messages", [])
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+
+    if "Classify intent" in prompt:
+        wants_policy = "policy" in _last_user_text(prompt).lower()
+        content = json.dumps({
+            "intent": "tool" if wants_policy else "chat",
+            "tool_name": "search_policies" if wants_policy else "None",
+        })
+        return {"role": "assistant", "content": content}, 12
+
+    if "update the context" in prompt:
+        content = json.dumps({"current_goal": None, "extracted_info": {}, "last_active_topic": None, "topic_shift": False})
+        return {"role": "assistant", "content": content}, 20
+
+    if body.get("tools"):
+        user_text = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "policy")
+        call = {
+            "id": f"call_{uuid.uuid4().hex[:12]}",
+            "type": "function",
+            "function": {"name": "search_policies", "arguments": json.dumps({"query": str(user_text)[:200]})},
+        }
+        return {"role": "assistant", "content": "", "tool_calls": [call]}, 25
+
+    n = profile.completion_tokens
+    return {"role": "assistant", "content": " ".join(["benchmark"] * n)}, n
+
+
+def _make_handler(profile, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            message, completion_tokens = build_reply(body, profile)
+            prompt_tokens = sum(len(str(m.get("content", ""))) // 4 for m in body.get("messages", []))
+
+            time.sleep(profile.latency_ms / 1000 + completion_tokens / profile.tokens_per_sec)
+            with stats["lock"]:
+                stats["requests"] += 1
+
+            payload = json.dumps({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": message,
+                    "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+class FakeLLMServer:
+    """Runs the stub on 127.0.0.1 in a daemon thread. `base_url` is what GROQ_API_BASE should point at."""
+
+    def __init__(self, profile=None, port=0):
+        self.profile = profile or PROFILES["groq"]
+        self.stats = {"requests": 0, "lock": threading.Lock()}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self.profile, self.stats))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self):
+        return self.stats["requests"]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
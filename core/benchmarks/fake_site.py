@@ -0,0 +1,103 @@
+"""
+Local stand-in for an organization's policy website, for tests of URL fetching.
+
+FakeSite serves `pages` ({path: html}) from 127.0.0.1 with an ETag (hash of the
+body) and a Last-Modified header, and answers conditional GETs with 304 when
+either validator still matches. Edit `pages` (or call `touch`) while it runs to
+simulate a policy change. Every request is logged as (path, status, monotonic
+start time) so tests can assert on conditional headers, request counts and
+per-host pacing.
+"""
+import hashlib
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _make_handler(site):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            started = time.monotonic()
+            path = self.path.split("?", 1)[0]
+            with site.lock:
+                body = site.pages.get(path)
+                modified = site.modified.get(path, site.started)
+            if site.latency:
+                time.sleep(site.latency)
+            if body is None:
+                status = self._send(404, b"not found")
+            else:
+                body = body.encode() if isinstance(body, str) else body
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                last_modified = formatdate(modified, usegmt=True)
+                if self._not_modified(etag, modified):
+                    status = self._send(304, b"", etag, last_modified)
+                else:
+                    status = self._send(200, body, etag, last_modified)
+            with site.lock:
+                site.requests.append((path, status, started, dict(self.headers)))
+
+        def _not_modified(self, etag, modified):
+            if "If-None-Match" in self.headers:
+                return self.headers["If-None-Match"] == etag
+            since = self.headers.get("If-Modified-Since")
+            return bool(since) and parsedate_to_datetime(since).timestamp() >= int(modified)
+
+        def _send(self, status, body, etag=None, last_modified=None):
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", last_modified)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return status
+
+    return Handler
+
+
+class FakeSite:
+    """Runs the site on 127.0.0.1 in a daemon thread; `url(path)` builds links to it."""
+
+    def __init__(self, pages=None, latency=0.0, port=0):
+        self.pages = dict(pages or {})
+        self.latency = latency
+        self.started = time.time()
+        self.modified = {}
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-site", daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def touch(self, path, html):
+        """Replaces a page and bumps its Last-Modified, as a CMS edit would."""
+        with self.lock:
+            self.pages[path] = html
+            self.modified[path] = max(time.time(), self.modified.get(path, self.started) + 1)
+
+    def statuses(self, path=None):
+        return [status for p, status, _, _ in self.requests if path is None or p == path]
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,104 @@
+"""
+Synthetic, labelled HR policy corpus for benchmark_retrieval.
+
+Every document is one fictional company's employee handbook with a numbered
+section per topic. Each section opens with a single fact line carrying the
+company name and a concrete value, followed by boilerplate filler. A question
+is labelled with its fact line: a retrieved chunk is relevant if it contains
+that line. The labels therefore survive any chunk size larger than a fact
+(about 100 characters).
+
+Generation is deterministic for a given seed and streams, so 1M-chunk corpora
+never have to fit in memory. `load_corpus` reads the same shapes from JSONL:
+documents as {"id", "title", "text"}, questions as {"question", "answer"}.
+"""
+import json
+import random
+
+TOPICS = [
+    ("Annual Leave", "Employees of {company} receive {n} days of paid annual leave per calendar year.",
+     "How many days of annual leave do employees at {company} get?", (12, 30)),
+    ("Sick Leave", "{company} provides {n} days of paid sick leave every year.",
+     "How much sick leave does {company} give?", (5, 15)),
+    ("Working Hours", "Standard working hours at {company} are {n} hours per day, Monday to Friday.",
+     "What are the daily working hours at {company}?", (7, 10)),
+    ("Notice Period", "Staff resigning from {company} must serve a notice period of {n} days.",
+     "What is the notice period for resignation at {company}?", (15, 90)),
+    ("Probation", "New hires at {company} complete a probation period of {n} months.",
+     "How long is probation at {company}?", (3, 6)),
+    ("Remote Work", "{company} allows up to {n} remote working days per week with manager approval.",
+     "How many days per week can I work remotely at {company}?", (1, 4)),
+    ("Parental Leave", "{company} grants {n} weeks of paid parental leave to new parents.",
+     "How many weeks of parental leave does {company} offer?", (12, 26)),
+    ("Overtime", "Overtime at {company} is compensated at {n} percent of the regular hourly rate.",
+     "How is overtime paid at {company}?", (125, 200)),
+    ("Travel Reimbursement", "{company} reimburses business travel by car at {n} rupees per kilometre.",
+     "What is the mileage reimbursement rate at {company}?", (8, 20)),
+    ("Learning Budget", "Each employee at {company} has an annual learning budget of {n} thousand rupees.",
+     "What is the yearly training budget per employee at {company}?", (10, 100)),
+]
+
+FILLER = [
+    "This policy applies to all permanent employees and is reviewed annually by Human Resources.",
+    "Managers are responsible for ensuring that their teams understand and follow this section.",
+    "Requests must be submitted through the HR portal and are subject to approval by the reporting manager.",
+    "Exceptions may be granted in writing by the HR department on a case-by-case basis.",
+    "Records are retained in accordance with applicable labour laws and the company's data retention policy.",
+    "Employees with questions about this section should contact their HR business partner.",
+    "Failure to comply with this policy may lead to disciplinary action as described in the code of conduct.",
+    "Contractors and interns are covered only where their agreements explicitly reference this handbook.",
+    "The company may amend this section with thirty days of notice published on the intranet.",
+    "Any conflict between this handbook and local statutory requirements is resolved in favour of the law.",
+]
+
+_ADJECTIVES = ["Blue", "Silver", "Northern", "Bright", "Granite", "Coastal", "Summit", "Crimson", "Evergreen", "Golden"]
+_NOUNS = ["Harbor", "Falcon", "Orchard", "Meridian", "Pioneer", "Cedar", "Beacon", "Atlas", "Lotus", "Quarry"]
+_INDUSTRIES = ["Logistics", "Analytics", "Foods", "Textiles", "Software", "Pharma", "Retail", "Energy", "Finance", "Media"]
+
+
+def company_name(i):
+    return (
+        f"{_ADJECTIVES[i % 10]} {_NOUNS[(i // 10) % 10]} {_INDUSTRIES[(i // 100) % 10]} {i:07d}"
+    )
+
+
+def generate_documents(seed=7):
+    """Yields (document, facts) forever; facts are (question, answer) pairs for that document."""
+    rng = random.Random(seed)
+    i = 0
+    while True:
+        company = company_name(i)
+        sections, facts = [], []
+        for number, (title, fact, question, (low, high)) in enumerate(TOPICS, start=1):
+            line = fact.format(company=company, n=rng.randint(low, high))
+            filler = " ".join(rng.sample(FILLER, 3))
+            sections.append(f"{number}. {title}\n{line}\n{filler}")
+            facts.append((question.format(company=company), line))
+        document = {"id": f"doc-{i}", "title": f"{company} Employee Handbook", "text": "\n\n".join(sections)}
+        yield document, facts
+        i += 1
+
+
+def load_corpus(documents_path, questions_path):
+    """Reads a JSONL corpus and its questions. Returns (iterator of documents, list of (question, answer))."""
+    def documents():
+        with open(documents_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    with open(questions_path, encoding="utf-8") as f:
+        questions = [(q["question"], q["answer"]) for q in map(json.loads, filter(str.strip, f))]
+    return documents(), questions
+
+
+def is_relevant(chunk_text, answer):
+    return answer in " ".join(chunk_text.split())
+
+
+def score_ranking(ranked_texts, answer, n):
+    """(hit in top n, hit anywhere, reciprocal rank) for one query's ranked chunk texts."""
+    for rank, text in enumerate(ranked_texts, start=1):
+        if is_relevant(text, answer):
+            return rank <= n, True, 1 / rank
+    return False, False, 0.0
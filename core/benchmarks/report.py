@@ -0,0 +1,73 @@
+"""Small helpers shared by the benchmark commands: percentiles, RSS, JSON results and comparisons."""
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+
+def percentile(values, q):
+    """Nearest-rank percentile (q in 0..100) of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 3),
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+    }
+
+
+def rss_bytes():
+    """Current resident set size (Linux /proc), falling back to peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_metadata(**config):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": sys.version.split()[0],
+        "config": config,
+    }
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, default=str)
+
+
+def compare(baseline, current, key="p95", prefix=""):
+    """Yields (path, before, after, change %) for every `key` statistic present in both result trees."""
+    for name, value in current.items():
+        before = baseline.get(name) if isinstance(baseline, dict) else None
+        path = f"{prefix}{name}"
+        if isinstance(value, dict) and isinstance(before, dict):
+            if key in value and key in before:
+                old, new = before[key], value[key]
+                change = ((new - old) / old * 100) if old else 0.0
+                yield path, old, new, round(change, 1)
+            else:
+                yield from compare(before, value, key, prefix=f"{path}.")
@@ -4,6 +4,7 @@ import django
 from channels.generic.websocket import AsyncWebsocketConsumer
 from asgiref.sync import sync_to_async
 from core.ai.agentic.graph.chat_service import generate_llm_reply
+from core.observability.tracing import span
 
 
 if not django.conf.settings.configured:
@@ -22,6 +23,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
         await self.accept()
 
     async def receive(self, text_data):
+        with span("ws.receive", user_id=self.user.id):
+            await self._handle(text_data)
+
+    async def _handle(self, text_data):
         data = json.loads(text_data)
         prompt = data.get("prompt", "").strip()
         conversation_id = data.get("conversation_id") # May be None for new chat
@@ -0,0 +1,216 @@
+"""
+Durable background jobs on Postgres.
+
+`enqueue(kind, entity_id)` inserts a BackgroundJob with ON CONFLICT DO NOTHING
+against a partial unique index on queued jobs, so saving the same candidate
+1,000 times leaves one queued job. (A job that is already *running* does not
+absorb new enqueues: the entity changed after it started and gets one more run,
+which is not claimed until the running one finishes.)
+Rows are written in the caller's transaction, so a rolled-back save never
+queues work and a committed one is never lost to a restart.
+
+`manage.py run_jobs` claims ready jobs with SELECT ... FOR UPDATE SKIP LOCKED
+(any number of worker processes, HARVEY_JOB_CONCURRENCY threads each), runs the
+handler registered for the job's kind, and retries failures with exponential
+backoff up to max_attempts. Jobs left "running" by a dead worker are re-queued
+after HARVEY_JOB_STALE_SECONDS.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+logger = logging.getLogger("harvey")
+
+HANDLERS = {}
+
+
+def handler(kind):
+    """Registers fn(entity_id) -> bool for a job kind; False or an exception means retry."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, entity_id, organization_id=None, delay=0):
+    """Queues work for an entity unless an identical job is already waiting. Returns the queued job."""
+    from core.models.jobs import BackgroundJob
+    if kind not in HANDLERS:
+        raise ValueError(f"No job handler registered for {kind!r}")
+
+    entity_id = str(entity_id)
+    BackgroundJob.objects.bulk_create(
+        [BackgroundJob(
+            kind=kind,
+            entity_id=entity_id,
+            organization_id=organization_id,
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )],
+        ignore_conflicts=True,
+    )
+    return BackgroundJob.objects.filter(kind=kind, entity_id=entity_id, status="queued").first()
+
+
+def backoff_seconds(attempts):
+    base = getattr(settings, "HARVEY_JOB_BACKOFF_SECONDS", 10)
+    delay = min(base * 2 ** (attempts - 1), 3600)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim(kinds=None):
+    """
+    Atomically takes the next ready job (FOR UPDATE SKIP LOCKED), or None. A job whose
+    entity already has a job of the same kind running waits for it: handlers replace an
+    entity's rows wholesale, and two of them at once would interleave their writes.
+    """
+    from core.models.jobs import BackgroundJob
+    running = BackgroundJob.objects.filter(kind=OuterRef("kind"), entity_id=OuterRef("entity_id"), status="running")
+    with transaction.atomic():
+        ready = BackgroundJob.objects.select_for_update(skip_locked=True).filter(
+            ~Exists(running), status="queued", run_after__lte=timezone.now()
+        )
+        if kinds:
+            ready = ready.filter(kind__in=kinds)
+        job = ready.order_by("run_after", "id").first()
+        if job is None:
+            return None
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = timezone.now()
+        job.worker = worker_name()[:100]
+        job.save(update_fields=["status", "attempts", "started_at", "worker"])
+        return job
+
+
+def run(job):
+    """Executes a claimed job and records the outcome. Returns True on success."""
+    fn = HANDLERS.get(job.kind)
+    error = ""
+    try:
+        if fn is None:
+            raise LookupError(f"No job handler registered for {job.kind!r}")
+        ok = fn(job.entity_id)
+        if ok is False:
+            error = "handler reported failure"
+    except Exception as e:
+        logger.exception(f"Job {job.id} {job.kind}({job.entity_id}) raised")
+        error = f"{e.__class__.__name__}: {e}"
+
+    job.finished_at = timezone.now()
+    job.last_error = error
+    if not error:
+        job.status = "succeeded"
+    elif job.attempts < job.max_attempts:
+        job.status = "queued"
+        job.run_after = job.finished_at + timedelta(seconds=backoff_seconds(job.attempts))
+        logger.warning(f"Job {job.id} {job.kind}({job.entity_id}) failed, retry {job.attempts}/{job.max_attempts}: {error}")
+    else:
+        job.status = "failed"
+        logger.error(f"Job {job.id} {job.kind}({job.entity_id}) failed permanently: {error}")
+
+    try:
+        with transaction.atomic():
+            job.save(update_fields=["status", "finished_at", "last_error", "run_after"])
+    except IntegrityError:
+        # A newer job for this entity was queued meanwhile; it redoes the work, so don't retry this one
+        job.status = "failed"
+        job.last_error = f"{error} (superseded by a newer queued job)"
+        job.save(update_fields=["status", "finished_at", "last_error", "run_after"])
+    return not error
+
+
+def requeue_stale():
+    """Puts jobs whose worker died mid-run back in the queue (or fails them when out of attempts)."""
+    from core.models.jobs import BackgroundJob
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, "HARVEY_JOB_STALE_SECONDS", 1800))
+    count = 0
+    for job in BackgroundJob.objects.filter(status="running", started_at__lt=cutoff):
+        job.last_error = "worker stopped before finishing"
+        job.status = "queued" if job.attempts < job.max_attempts else "failed"
+        job.run_after = timezone.now()
+        try:
+            with transaction.atomic():
+                job.save(update_fields=["status", "last_error", "run_after"])
+        except IntegrityError:
+            job.status = "failed"
+            job.save(update_fields=["status", "last_error", "run_after"])
+        count += 1
+    return count
+
+
+def work(stop, kinds=None, burst=False):
+    """One worker thread's loop: claim, run, repeat; sleeps when the queue is empty."""
+    poll = getattr(settings, "HARVEY_JOB_POLL_SECONDS", 1.0)
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim(kinds)
+        except Exception as e:
+            logger.warning(f"Job claim failed: {e}")
+            job = None
+        if job is None:
+            if burst:
+                return
+            stop.wait(poll)
+            continue
+        run(job)
+    close_old_connections()
+
+
+# ─────────────────────────────
+# Handlers
+# ─────────────────────────────
+@handler("index_policy")
+def _index_policy(entity_id):
+    from core.ai.rag.policy_indexer import PolicyIndexer
+    return PolicyIndexer().index_policy(entity_id)
+
+
+@handler("index_candidate")
+def _index_candidate(entity_id):
+    from core.ai.rag.model_indexer import ModelIndexer
+    return ModelIndexer().index_candidate(int(entity_id))
+
+
+@handler("index_job_role")
+def _index_job_role(entity_id):
+    from core.ai.rag.model_indexer import ModelIndexer
+    return ModelIndexer().index_job_role(int(entity_id))
+
+
+@handler("refresh_url_policies")
+def _refresh_url_policies(entity_id):
+    from core.ai.rag.policy_refresh import refresh_url_policies, schedule_refresh
+    try:
+        refresh_url_policies()
+    finally:
+        schedule_refresh()
+    return True
+
+
+def job_payload(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "entity_id": job.entity_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "max_attempts": job.max_attempts,
+        "last_error": job.last_error,
+        "run_after": job.run_after,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -0,0 +1,268 @@
+import asyncio
+import gc
+import json
+import os
+import random
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import replace
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarks.fake_llm import FakeLLMServer, PROFILES
+from core.benchmarks.report import summarize, rss_bytes, run_metadata, write_results, compare
+from core.models.organization import Organization, User
+
+CHAT_PROMPTS = [
+    "Hi Harvey, how are you today?",
+    "Thanks, that was helpful!",
+    "Can you help me write a short welcome note for a new hire?",
+]
+POLICY_PROMPTS = [
+    "What is the leave policy for sick days?",
+    "What does the policy say about working hours?",
+    "Is there a policy on remote work?",
+]
+
+
+@contextmanager
+def _env(**values):
+    previous = {k: os.environ.get(k) for k in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests the chat pipeline (ChatConsumer WebSocket and the /chat/ endpoint) with concurrent "
+        "virtual users against a local fake LLM server. Writes throughput, per-stage latency percentiles, "
+        "DB queries and memory growth per turn as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Concurrent virtual users")
+        parser.add_argument("--turns", type=int, default=5, help="Chat turns per user")
+        parser.add_argument("--warmup", type=int, default=1, help="Unmeasured turns before each transport run")
+        parser.add_argument("--transport", choices=["ws", "http", "both"], default="both")
+        parser.add_argument("--profile", choices=sorted(PROFILES), default="groq", help="Fake LLM latency profile")
+        parser.add_argument("--latency-ms", type=float, help="Override the profile's time to first token")
+        parser.add_argument("--tokens-per-sec", type=float, help="Override the profile's generation rate")
+        parser.add_argument("--completion-tokens", type=int, help="Override the profile's reply length")
+        parser.add_argument("--tool-ratio", type=float, default=0.3, help="Share of turns that hit search_policies")
+        parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for one reply")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", default="", help="Results path (default benchmarks/chat-<timestamp>.json)")
+        parser.add_argument("--compare", default="", help="Previous results file to diff p95s against")
+        parser.add_argument(
+            "--cassette", default="",
+            help="Serve LLM calls from this cassette instead of the fake server (record modes call the real provider)",
+        )
+        parser.add_argument("--cassette-mode", choices=["replay", "record", "new_episodes"], default="replay")
+        parser.add_argument("--keep-data", action="store_true", help="Keep the benchmark organization and its chats")
+
+    def handle(self, *args, **opts):
+        from core.observability import tracing, usage
+        from core.ai.agentic.graph.write_behind import write_behind
+
+        profile = PROFILES[opts["profile"]]
+        overrides = {
+            "latency_ms": opts["latency_ms"],
+            "tokens_per_sec": opts["tokens_per_sec"],
+            "completion_tokens": opts["completion_tokens"],
+        }
+        profile = replace(profile, **{k: v for k, v in overrides.items() if v is not None})
+        self.timeout = opts["timeout"]
+        rng = random.Random(opts["seed"])
+        transports = ["ws", "http"] if opts["transport"] == "both" else [opts["transport"]]
+
+        results = run_metadata(
+            users=opts["users"], turns=opts["turns"], tool_ratio=opts["tool_ratio"],
+            profile=opts["profile"], llm=vars(profile),
+            cassette=opts["cassette"], cassette_mode=opts["cassette"] and opts["cassette_mode"],
+        )
+        results["transports"] = {}
+
+        org, users = self._create_users(opts["users"])
+        exporter = tracing.MemoryExporter()
+        try:
+            with ExitStack() as stack:
+                llm = stack.enter_context(FakeLLMServer(profile))
+                if opts["cassette"]:
+                    from core.ai.agentic.graph.cassette import use_cassette
+                    stack.enter_context(use_cassette(opts["cassette"], opts["cassette_mode"]))
+                else:
+                    stack.enter_context(_env(GROQ_API_BASE=llm.base_url, GROQ_API_KEY="benchmark"))
+                stack.enter_context(override_settings(HARVEY_TRACING=True))
+                tracing.add_exporter(exporter)
+                for transport in transports:
+                    self.stdout.write(f"Running {transport}: {len(users)} users x {opts['turns']} turns ...")
+                    scripts = [self._script(rng, opts["turns"], opts["tool_ratio"]) for _ in users]
+
+                    if opts["warmup"]:
+                        async_to_sync(self._run)(transport, users[:1], [CHAT_PROMPTS[:opts["warmup"]]])
+                    tracing.flush()
+                    exporter.reset()
+
+                    gc.collect()
+                    rss_before, llm_before = rss_bytes(), llm.request_count
+                    started = time.perf_counter()
+                    latencies, errors = async_to_sync(self._run)(transport, users, scripts)
+                    elapsed = time.perf_counter() - started
+                    tracing.flush()
+                    gc.collect()
+
+                    turns = len(latencies) + errors
+                    results["transports"][transport] = {
+                        "turns": turns,
+                        "errors": errors,
+                        "elapsed_s": round(elapsed, 3),
+                        "throughput_turns_per_s": round(turns / elapsed, 3) if elapsed else 0,
+                        "turn_latency_ms": summarize(latencies),
+                        "llm_requests_per_turn": round((llm.request_count - llm_before) / max(turns, 1), 2),
+                        "memory_growth_bytes_per_turn": int((rss_bytes() - rss_before) / max(turns, 1)),
+                        **self._stage_stats(exporter.reset()),
+                    }
+        finally:
+            tracing.remove_exporter(exporter)
+            # Everything this run queued must land before the org (and its FKs) goes away
+            write_behind.shutdown()
+            usage.ACCUMULATOR.flush()
+            if not opts["keep_data"]:
+                org.delete()
+
+        output = opts["output"] or f"benchmarks/chat-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        write_results(output, results)
+        self._print_summary(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if opts["compare"]:
+            with open(opts["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            self.stdout.write(f"\np95 vs {opts['compare']}:")
+            for path, before, after, change in compare(baseline.get("transports", {}), results["transports"]):
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(f"  {path}: {before} -> {after} ({change:+.1f}%)"))
+
+    # --- setup ---
+
+    def _create_users(self, count):
+        suffix = uuid.uuid4().hex[:8]
+        org = Organization.objects.create(name=f"Benchmark {suffix}", domain=f"bench-{suffix}.invalid")
+        users = [
+            User.objects.create_user(
+                username=f"bench-{suffix}-{i}",
+                email=f"user{i}@bench-{suffix}.invalid",
+                password=None,
+                organization=org,
+                has_chat_access=True,
+            )
+            for i in range(count)
+        ]
+        return org, users
+
+    def _script(self, rng, turns, tool_ratio):
+        return [
+            rng.choice(POLICY_PROMPTS if rng.random() < tool_ratio else CHAT_PROMPTS)
+            for _ in range(turns)
+        ]
+
+    # --- virtual users ---
+
+    async def _run(self, transport, users, scripts):
+        worker = self._ws_user if transport == "ws" else self._http_user
+        outcomes = await asyncio.gather(*(worker(user, script) for user, script in zip(users, scripts)))
+        latencies = [ms for user_latencies, _ in outcomes for ms in user_latencies]
+        return latencies, sum(errors for _, errors in outcomes)
+
+    async def _ws_user(self, user, prompts):
+        from channels.testing import WebsocketCommunicator
+        from core.consumers import ChatConsumer
+
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), "/ws/chat/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        if not connected:
+            return [], len(prompts)
+
+        latencies, errors, conversation_id = [], 0, None
+        try:
+            for prompt in prompts:
+                start = time.perf_counter()
+                try:
+                    await communicator.send_json_to({"prompt": prompt, "conversation_id": conversation_id})
+                    await communicator.receive_json_from(timeout=self.timeout)  # "Thinking..."
+                    reply = await communicator.receive_json_from(timeout=self.timeout)
+                except Exception:
+                    errors += 1
+                    continue
+                if reply.get("title") == "Error":
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+                conversation_id = reply.get("conversation_id") or conversation_id
+        finally:
+            await communicator.disconnect()
+        return latencies, errors
+
+    async def _http_user(self, user, prompts):
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        await client.aforce_login(user)
+        url = reverse("chat_with_llm")
+
+        latencies, errors = [], 0
+        for prompt in prompts:
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    client.post(url, data=json.dumps({"prompt": prompt}), content_type="application/json"),
+                    timeout=self.timeout,
+                )
+            except Exception:
+                errors += 1
+                continue
+            if response.status_code != 200:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, errors
+
+    # --- reporting ---
+
+    def _stage_stats(self, traces):
+        durations, queries, llm_calls = {}, [], []
+        for spans in traces:
+            for s in spans:
+                durations.setdefault(s["name"], []).append(s["duration_ms"])
+            queries.append(sum(1 for s in spans if s["name"] == "db.query"))
+            llm_calls.append(sum(1 for s in spans if s["name"] == "llm.call"))
+        return {
+            "stages_ms": {name: summarize(values) for name, values in sorted(durations.items())},
+            "db_queries_per_turn": summarize(queries),
+            "llm_calls_per_turn": summarize(llm_calls),
+        }
+
+    def _print_summary(self, results):
+        for transport, data in results["transports"].items():
+            latency = data["turn_latency_ms"]
+            self.stdout.write(
+                f"\n[{transport}] {data['turns']} turns, {data['errors']} errors, "
+                f"{data['throughput_turns_per_s']} turns/s, "
+                f"p50 {latency.get('p50')} ms, p95 {latency.get('p95')} ms, p99 {latency.get('p99')} ms, "
+                f"{data['db_queries_per_turn'].get('mean')} queries/turn, "
+                f"{data['memory_growth_bytes_per_turn']} B RSS/turn"
+            )
+            for name, stats in data["stages_ms"].items():
+                self.stdout.write(f"    {name:<32} p50 {stats['p50']:>9} ms  p95 {stats['p95']:>9} ms  (n={stats['count']})")
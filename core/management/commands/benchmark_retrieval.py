@@ -0,0 +1,272 @@
+import json
+import os
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai.rag.policy_indexer import PolicyIndexer
+from core.ai.rag.reranker import get_reranker
+from core.ai.rag.tools.policy_search_tool import retrieve_policy_chunks
+from core.ai.rag.vector_store import ANN_INDEX_TYPES, EMBEDDING_DIMS, QUANTIZATIONS, VectorStore
+from core.benchmarks.policy_corpus import generate_documents, load_corpus, score_ranking
+from core.benchmarks.report import summarize, run_metadata, write_results, compare
+from core.models.organization import Organization, User
+from core.models.policy import Policy
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures policy retrieval quality (recall@n, recall@k, MRR) and latency over a labelled corpus "
+        "at one or more corpus sizes, chunk sizes, ANN index types and k values. Uses the same "
+        "retrieve_policy_chunks path as search_policies, in a separate vector collection and organization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=_csv(int), default=[1000], help="Corpus sizes in chunks, e.g. 1000,100000,1000000")
+        parser.add_argument("--chunk-sizes", type=_csv(int), default=[400], help="Splitter chunk sizes in characters")
+        parser.add_argument("--index", type=_csv(str), default=["none"], help=f"ANN index types from {ANN_INDEX_TYPES}")
+        parser.add_argument(
+            "--quantization", choices=QUANTIZATIONS, default="none",
+            help="Scan a halfvec/binary index and rescore at full precision (see compact_vectors)",
+        )
+        parser.add_argument("--k", type=_csv(int), default=[15], help="Vector candidates fetched per query")
+        parser.add_argument("--top-n", type=int, default=3, help="Results handed to the answer step")
+        parser.add_argument("--rerank", choices=["on", "off", "both"], default="on", help="Rerank fused candidates with HARVEY_RERANKER")
+        parser.add_argument("--hybrid", choices=["on", "off", "both"], default="on", help="Fuse full-text hits with vector hits")
+        parser.add_argument("--questions", type=int, default=200, help="Labelled questions per run (synthetic corpus)")
+        parser.add_argument("--corpus", default="", help="JSONL documents ({id, title, text}) instead of the synthetic corpus")
+        parser.add_argument("--qrels", default="", help="JSONL questions ({question, answer}) for --corpus")
+        parser.add_argument("--export", default="", help="Write the synthetic corpus and questions to this directory")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Chunks per embedding/insert batch")
+        parser.add_argument("--hnsw-m", type=int, default=16)
+        parser.add_argument("--hnsw-ef-construction", type=int, default=64)
+        parser.add_argument("--ivfflat-lists", type=int, default=0, help="IVFFlat lists (default rows/1000, min 10)")
+        parser.add_argument("--seed", type=int, default=7)
+        parser.add_argument("--output", default="", help="Results path (default benchmarks/retrieval-<timestamp>.json)")
+        parser.add_argument("--compare", default="", help="Previous results file to diff p95 latency against")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark collections, indexes and organizations")
+
+    def handle(self, *args, **opts):
+        unknown = set(opts["index"]) - set(ANN_INDEX_TYPES)
+        if unknown:
+            raise CommandError(f"Unknown index type(s) {sorted(unknown)}, expected {ANN_INDEX_TYPES}")
+        if bool(opts["corpus"]) != bool(opts["qrels"]):
+            raise CommandError("--corpus and --qrels go together")
+        switches = {"on": [True], "off": [False], "both": [True, False]}
+        modes = [(hybrid, rerank) for hybrid in switches[opts["hybrid"]] for rerank in switches[opts["rerank"]]]
+
+        results = run_metadata(
+            sizes=opts["sizes"], chunk_sizes=opts["chunk_sizes"], index=opts["index"], k=opts["k"],
+            top_n=opts["top_n"], rerank=opts["rerank"], hybrid=opts["hybrid"], quantization=opts["quantization"],
+            corpus=opts["corpus"] or f"synthetic(seed={opts['seed']})",
+        )
+        results["runs"] = {}
+
+        # Load the embedding and reranker models before anything is timed
+        VectorStore.get_embeddings().embed_query("warmup")
+        get_reranker().warmup()
+
+        for size in opts["sizes"]:
+            for chunk_size in opts["chunk_sizes"]:
+                store = VectorStore(
+                    collection_name=f"harvey_bench_{size}_{chunk_size}", quantization=opts["quantization"],
+                )
+                if set(opts["index"]) != {"none"} and store.embedding_dimension() != EMBEDDING_DIMS:
+                    # Pinning it would rewrite the shared table under an exclusive lock; not a benchmark's call
+                    raise CommandError(
+                        f"langchain_pg_embedding.embedding is not vector({EMBEDDING_DIMS}), so ANN indexes can't be "
+                        f"built. Pin the dimension in a migration (or run compact_vectors --pin-dimension), "
+                        f"or benchmark with --index none."
+                    )
+                store.delete_all()
+                owner = self._create_owner()
+                try:
+                    questions, indexing = self._index(store, owner, size, chunk_size, opts)
+                    if not questions:
+                        raise CommandError("No labelled questions for this corpus")
+                    for kind in opts["index"]:
+                        self.stdout.write(f"Corpus {indexing['chunks']} chunks @ {chunk_size} chars, index {kind} ...")
+                        started = time.perf_counter()
+                        index_name = store.ensure_ann_index(
+                            kind,
+                            m=opts["hnsw_m"],
+                            ef_construction=opts["hnsw_ef_construction"],
+                            lists=opts["ivfflat_lists"] or max(indexing["chunks"] // 1000, 10),
+                            scoped=True,
+                            quantization=opts["quantization"],
+                        )
+                        build_s = time.perf_counter() - started
+                        try:
+                            for k in opts["k"]:
+                                for hybrid, rerank in modes:
+                                    mode = ("hybrid" if hybrid else "vector") + ("+rerank" if rerank else "")
+                                    name = f"{size}/{chunk_size}/{kind}/k{k}/{mode}"
+                                    results["runs"][name] = {
+                                        "corpus_chunks": indexing["chunks"],
+                                        "chunk_size": chunk_size,
+                                        "index": kind,
+                                        "quantization": opts["quantization"],
+                                        "k": k,
+                                        "top_n": min(opts["top_n"], k),
+                                        "hybrid": hybrid,
+                                        "rerank": rerank,
+                                        "index_build_s": round(build_s, 3),
+                                        "indexing": indexing,
+                                        **self._evaluate(
+                                            store, owner.organization_id, questions, k, min(opts["top_n"], k),
+                                            hybrid, rerank,
+                                        ),
+                                    }
+                        finally:
+                            if not opts["keep"]:
+                                store.drop_ann_index(index_name)
+                finally:
+                    if not opts["keep"]:
+                        store.db.delete_collection()
+                        owner.organization.delete()
+
+        output = opts["output"] or f"benchmarks/retrieval-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        write_results(output, results)
+        self._print_summary(results)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {output}"))
+
+        if opts["compare"]:
+            with open(opts["compare"], encoding="utf-8") as f:
+                baseline = json.load(f)
+            self.stdout.write(f"\np95 latency vs {opts['compare']}:")
+            for path, before, after, change in compare(baseline.get("runs", {}), results["runs"]):
+                style = self.style.ERROR if change > 10 else self.style.SUCCESS if change < -10 else str
+                self.stdout.write(style(f"  {path}: {before} -> {after} ({change:+.1f}%)"))
+
+    # --- corpus ---
+
+    def _create_owner(self):
+        """A throwaway organization and user owning the benchmark's Policy/PolicyChunk rows."""
+        suffix = uuid.uuid4().hex[:8]
+        org = Organization.objects.create(name=f"Retrieval benchmark {suffix}", domain=f"bench-{suffix}.invalid")
+        return User.objects.create_user(
+            username=f"bench-{suffix}", email=f"bench@bench-{suffix}.invalid", password=None, organization=org,
+        )
+
+    def _documents(self, indexer, size, opts):
+        """(documents, questions) for one corpus size; synthetic questions are spread across the corpus."""
+        if opts["corpus"]:
+            return load_corpus(opts["corpus"], opts["qrels"])
+
+        sample, _ = next(generate_documents(opts["seed"]))
+        per_document = len(indexer.build_chunks(sample["text"], {})[0])
+        stride = max(size // per_document // max(opts["questions"], 1), 1)
+        questions = []
+
+        def documents():
+            for i, (document, facts) in enumerate(generate_documents(opts["seed"])):
+                if i % stride == 0 and len(questions) < opts["questions"]:
+                    questions.append(facts[(i // stride) % len(facts)])
+                yield document
+
+        return documents(), questions
+
+    def _index(self, store, owner, size, chunk_size, opts):
+        """Indexes whole documents until the corpus reaches `size` chunks (or a --corpus file runs out)."""
+        indexer = PolicyIndexer(chunk_size=chunk_size, chunk_overlap=min(50, chunk_size // 8), vector_store=store)
+        documents, questions = self._documents(indexer, size, opts)
+        export = self._exporter(opts["export"], size, chunk_size)
+        batch = opts["batch_size"]
+
+        chunks, texts, metadatas, policies, seconds = 0, [], [], [], 0.0
+        # Pull lazily and stop before generating the next document, so every sampled question is indexed
+        while chunks + len(texts) < size:
+            document = next(documents, None)
+            if document is None:
+                break
+            if export:
+                export.write(json.dumps(document) + "\n")
+            policy = Policy(
+                id=uuid.uuid4(), title=document["title"], source_type="upload", status="indexed", created_by=owner,
+            )
+            policies.append(policy)
+            doc_texts, doc_metadatas = indexer.build_chunks(document["text"], {
+                "source": policy.title,
+                "title": policy.title,
+                "policy_id": str(policy.id),
+                "type": "policy",
+                "doc_type": "policy",
+                "organization_id": str(owner.organization_id),
+            })
+            texts.extend(doc_texts)
+            metadatas.extend(doc_metadatas)
+            while len(texts) >= batch:
+                seconds += self._add(indexer, policies, texts[:batch], metadatas[:batch])
+                chunks += batch
+                del texts[:batch], metadatas[:batch]
+                if chunks % (batch * 10) == 0:
+                    self.stdout.write(f"  indexed {chunks}/{size} chunks")
+        if texts:
+            seconds += self._add(indexer, policies, texts, metadatas)
+            chunks += len(texts)
+
+        if export:
+            export.close()
+            with open(os.path.join(opts["export"], f"questions-{size}-{chunk_size}.jsonl"), "w", encoding="utf-8") as f:
+                for question, answer in questions:
+                    f.write(json.dumps({"question": question, "answer": answer}) + "\n")
+
+        return list(questions), {
+            "chunks": chunks,
+            "seconds": round(seconds, 3),
+            "chunks_per_s": round(chunks / seconds, 1) if seconds else 0,
+        }
+
+    def _add(self, indexer, policies, texts, metadatas):
+        """Writes one batch to both sides of hybrid search: PolicyChunk rows and vectors."""
+        started = time.perf_counter()
+        Policy.objects.bulk_create(policies)
+        policies.clear()
+        indexer.write_chunks(texts, metadatas)
+        return time.perf_counter() - started
+
+    def _exporter(self, directory, size, chunk_size):
+        if not directory:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        return open(os.path.join(directory, f"corpus-{size}-{chunk_size}.jsonl"), "w", encoding="utf-8")
+
+    # --- evaluation ---
+
+    def _evaluate(self, store, organization_id, questions, k, top_n, hybrid, rerank):
+        latencies, hits_n, hits_k, reciprocal = [], 0, 0, 0.0
+        for question, answer in questions:
+            started = time.perf_counter()
+            docs = retrieve_policy_chunks(
+                question, organization_id=organization_id, k=k, top_n=k, rerank=rerank, hybrid=hybrid,
+                vector_store=store,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            in_n, in_k, rr = score_ranking([d.page_content for d in docs], answer, top_n)
+            hits_n += in_n
+            hits_k += in_k
+            reciprocal += rr
+        count = len(questions)
+        return {
+            "questions": count,
+            f"recall_at_{top_n}": round(hits_n / count, 4),
+            f"recall_at_{k}": round(hits_k / count, 4),
+            "mrr": round(reciprocal / count, 4),
+            "latency_ms": summarize(latencies),
+        }
+
+    def _print_summary(self, results):
+        self.stdout.write("")
+        for name, run in results["runs"].items():
+            recall_n = run[f"recall_at_{run['top_n']}"]
+            recall_k = run[f"recall_at_{run['k']}"]
+            latency = run["latency_ms"]
+            self.stdout.write(
+                f"{name}: recall@{run['top_n']} {recall_n:.3f}  recall@{run['k']} {recall_k:.3f}  "
+                f"MRR {run['mrr']:.3f}  p50 {latency['p50']:.1f} ms  p95 {latency['p95']:.1f} ms"
+            )
@@ -0,0 +1,83 @@
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.ai.rag.vector_store import ANN_INDEX_TYPES, QUANTIZATIONS, VectorStore
+
+
+# Names ensure_ann_index generates: kind/params, then optional quantization and collection suffixes
+_INDEX_NAME = re.compile(
+    r"^harvey_embedding_(?:hnsw_m\d+_ef\d+|ivfflat_l\d+)(?:_(halfvec|binary))?(?:_([0-9a-f]{12}))?$"
+)
+
+
+def _mb(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts an existing vector collection to compact ANN storage in place: builds a halfvec or "
+        "binary-quantized index over the stored embeddings (no re-embedding) and optionally drops the "
+        "float32 ANN indexes. Set HARVEY_VECTOR_QUANTIZATION to the same mode so searches use it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", choices=[q for q in QUANTIZATIONS if q != "none"], required=True)
+        parser.add_argument("--collection", default="harvey_vectors")
+        parser.add_argument("--index", choices=[i for i in ANN_INDEX_TYPES if i != "none"], default="hnsw")
+        parser.add_argument("--hnsw-m", type=int, default=16)
+        parser.add_argument("--hnsw-ef-construction", type=int, default=64)
+        parser.add_argument("--ivfflat-lists", type=int, default=100)
+        parser.add_argument(
+            "--drop-full-precision", action="store_true",
+            help="Drop the float32 harvey_embedding_* ANN indexes once the compact one is built",
+        )
+        parser.add_argument(
+            "--pin-dimension", action="store_true",
+            help="If the embedding column has no dimension yet, ALTER it to vector(384) first "
+                 "(rewrites langchain_pg_embedding under an exclusive lock)",
+        )
+
+    def handle(self, *args, **opts):
+        store = VectorStore(collection_name=opts["collection"], quantization=opts["mode"])
+        if store.collection_id() is None:
+            raise CommandError(f"No vector collection named {opts['collection']!r}")
+
+        before = store.ann_indexes()
+        for name, size in before:
+            self.stdout.write(f"  {name}: {_mb(size)}")
+
+        self.stdout.write(f"Building {opts['mode']} {opts['index']} index on {opts['collection']} ...")
+        started = time.perf_counter()
+        try:
+            name = store.ensure_ann_index(
+                opts["index"],
+                m=opts["hnsw_m"],
+                ef_construction=opts["hnsw_ef_construction"],
+                lists=opts["ivfflat_lists"],
+                scoped=True,
+                quantization=opts["mode"],
+                pin_dimension=opts["pin_dimension"],
+            )
+        except ValueError as e:
+            raise CommandError(f"{e} (or pass --pin-dimension)")
+        sizes = dict(store.ann_indexes())
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {name} in {time.perf_counter() - started:.1f}s ({_mb(sizes.get(name, 0))})"
+        ))
+
+        if opts["drop_full_precision"]:
+            # Only float32 indexes over the whole table or this collection; other collections keep theirs
+            own = store.collection_id().replace("-", "")[:12]
+            for old, size in before:
+                match = _INDEX_NAME.match(old)
+                if match and match.group(1) is None and match.group(2) in (None, own):
+                    store.drop_ann_index(old)
+                    self.stdout.write(f"Dropped {old} ({_mb(size)})")
+
+        self.stdout.write(
+            f"Set HARVEY_VECTOR_QUANTIZATION={opts['mode']} so searches scan {name} and rescore "
+            f"x{store.rescore_factor} candidates at full precision."
+        )
@@ -35,9 +35,8 @@ class Command(BaseCommand):
         self.stdout.write(f"✅ Indexed {len(roles)} job roles.")
 
         # Index Policies
-        policies = Policy.objects.all()
-        for p in policies:
-            policy_indexer.index_policy(p.id)
-        self.stdout.write(f"✅ Indexed {len(policies)} policies.")
+        policy_ids = list(Policy.objects.values_list("id", flat=True))
+        indexed = sum(success for _, success in policy_indexer.index_policies(policy_ids))
+        self.stdout.write(f"✅ Indexed {indexed}/{len(policy_ids)} policies.")
 
         self.stdout.write(self.style.SUCCESS("Successfully re-indexed all data with strict metadata."))
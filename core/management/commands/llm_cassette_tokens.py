@@ -0,0 +1,78 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _load_log(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("log", [])
+    except (OSError, ValueError) as e:
+        raise CommandError(f"Cannot read cassette {path}: {e}")
+
+
+def _totals(log):
+    totals = {}
+    for call in log:
+        key = (call["model"], call.get("node") or "-")
+        row = totals.setdefault(key, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        row["calls"] += 1
+        row["prompt_tokens"] += call.get("prompt_tokens") or 0
+        row["completion_tokens"] += call.get("completion_tokens") or 0
+    return totals
+
+
+class Command(BaseCommand):
+    help = "Diffs prompt/completion token counts between two LLM cassettes (e.g. recorded on two commits)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline", help="Cassette recorded before the change")
+        parser.add_argument("current", help="Cassette recorded after the change")
+        parser.add_argument("--calls", action="store_true", help="Also diff call by call, in recorded order")
+        parser.add_argument("--json", action="store_true", help="Print the diff as JSON")
+
+    def handle(self, *args, **opts):
+        before_log, after_log = _load_log(opts["baseline"]), _load_log(opts["current"])
+        before, after = _totals(before_log), _totals(after_log)
+
+        rows = []
+        for model, node in sorted(set(before) | set(after)):
+            empty = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            b, a = before.get((model, node), empty), after.get((model, node), empty)
+            rows.append({
+                "model": model,
+                "node": node,
+                "calls": [b["calls"], a["calls"]],
+                "prompt_tokens": [b["prompt_tokens"], a["prompt_tokens"]],
+                "completion_tokens": [b["completion_tokens"], a["completion_tokens"]],
+            })
+
+        calls = []
+        if opts["calls"]:
+            for i in range(max(len(before_log), len(after_log))):
+                b = before_log[i] if i < len(before_log) else {}
+                a = after_log[i] if i < len(after_log) else {}
+                calls.append({
+                    "index": i,
+                    "node": a.get("node") or b.get("node") or "-",
+                    "prompt_tokens": [b.get("prompt_tokens"), a.get("prompt_tokens")],
+                    "prompt_changed": b.get("key") != a.get("key"),
+                })
+
+        if opts["json"]:
+            self.stdout.write(json.dumps({"totals": rows, "calls": calls}, indent=2))
+            return
+
+        self.stdout.write(f"{'model':<45} {'node':<8} {'calls':>11} {'prompt tokens':>23} {'completion':>19}")
+        for row in rows:
+            pb, pa = row["prompt_tokens"]
+            delta = pa - pb
+            style = self.style.ERROR if delta > 0 else self.style.SUCCESS if delta < 0 else str
+            self.stdout.write(style(
+                f"{row['model']:<45} {row['node']:<8} {row['calls'][0]:>5}->{row['calls'][1]:<5} "
+                f"{pb:>9}->{pa:<9}({delta:+d}) {row['completion_tokens'][0]:>8}->{row['completion_tokens'][1]:<8}"
+            ))
+
+        for call in calls:
+            marker = "*" if call["prompt_changed"] else " "
+            self.stdout.write(f"{marker} #{call['index']:<4} {call['node']:<8} {call['prompt_tokens'][0]} -> {call['prompt_tokens'][1]}")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.ai.agentic.graph.write_behind import DEAD_LETTER_KEY, write_behind
+
+
+class Command(BaseCommand):
+    help = (
+        f"Replays chat records from the write-behind dead-letter stream ({DEAD_LETTER_KEY}). "
+        "Entries that now write are removed from it; entries that still fail stay, with the error logged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None, help="Replay at most this many entries")
+
+    def handle(self, *args, **opts):
+        replayed, failed = write_behind.redrive(limit=opts["limit"])
+        if not replayed and not failed:
+            self.stdout.write("Dead-letter stream is empty")
+            return
+        self.stdout.write(self.style.SUCCESS(f"replayed: {replayed}"))
+        if failed:
+            self.stdout.write(self.style.ERROR(f"still failing: {failed} (left in {DEAD_LETTER_KEY})"))
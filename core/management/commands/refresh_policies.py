@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from core.ai.rag.policy_refresh import refresh_url_policies
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-checks URL-sourced policies with conditional GETs and queues a re-index for pages whose "
+        "text changed. `run_jobs` already does this every hour for policies older than HARVEY_POLICY_REFRESH_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Check every URL policy, not only those due")
+
+    def handle(self, *args, **opts):
+        outcomes = refresh_url_policies(all_policies=opts["all"])
+        if not outcomes:
+            self.stdout.write("No URL policies due for a refresh")
+            return
+        for outcome in ("unchanged", "baseline", "changed", "error"):
+            if outcomes[outcome]:
+                style = self.style.ERROR if outcome == "error" else self.style.SUCCESS
+                self.stdout.write(style(f"{outcome}: {outcomes[outcome]}"))
+        if outcomes["changed"]:
+            self.stdout.write("Re-index jobs queued; `run_jobs` picks them up")
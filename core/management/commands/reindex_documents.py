@@ -13,15 +13,14 @@ class Command(BaseCommand):
         policy_indexer = PolicyIndexer()
         model_indexer = ModelIndexer()
 
-        # Re-index Policies
-        policies = Policy.objects.all()
-        self.stdout.write(f"Re-indexing {policies.count()} policies...")
-        for policy in policies:
-            success = policy_indexer.index_policy(policy.id)
+        # Re-index Policies (concurrently; extraction runs in the process pool)
+        titles = dict(Policy.objects.values_list("id", "title"))
+        self.stdout.write(f"Re-indexing {len(titles)} policies...")
+        for policy_id, success in policy_indexer.index_policies(list(titles)):
             if success:
-                self.stdout.write(self.style.SUCCESS(f"Indexed Policy: {policy.title}"))
+                self.stdout.write(self.style.SUCCESS(f"Indexed Policy: {titles[policy_id]}"))
             else:
-                self.stdout.write(self.style.ERROR(f"Failed to index Policy: {policy.title}"))
+                self.stdout.write(self.style.ERROR(f"Failed to index Policy: {titles[policy_id]}"))
 
         # Re-index Candidates
         candidates = Candidate.objects.all()
@@ -0,0 +1,71 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs queued background jobs (indexing, ...) with bounded concurrency. "
+        "Start one or more of these next to the web process; jobs are claimed with SKIP LOCKED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=None,
+            help="Worker threads in this process (default HARVEY_JOB_CONCURRENCY)",
+        )
+        parser.add_argument("--kinds", default="", help="Only run these job kinds (comma-separated)")
+        parser.add_argument("--burst", action="store_true", help="Exit once no job is ready instead of polling")
+
+    def handle(self, *args, **opts):
+        concurrency = opts["concurrency"] or getattr(settings, "HARVEY_JOB_CONCURRENCY", 2)
+        kinds = [k for k in opts["kinds"].split(",") if k] or None
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write("Stopping after the current jobs finish...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        if getattr(settings, "HARVEY_WARMUP", True):
+            # Indexing jobs embed; load the model before the first job rather than inside it
+            from core.warmup import warmup
+            warmup(steps=["embeddings"])
+
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Re-queued {requeued} job(s) left running by a stopped worker"))
+        if not opts["burst"]:
+            # Starts the URL policy refresh cycle unless a sweep is already queued
+            from core.ai.rag.policy_refresh import schedule_refresh
+            schedule_refresh(delay=0)
+        self.stdout.write(
+            f"Running jobs ({', '.join(kinds or sorted(jobs.HANDLERS))}) with {concurrency} thread(s)"
+        )
+
+        threads = [
+            threading.Thread(
+                target=jobs.work, args=(stop,), kwargs={"kinds": kinds, "burst": opts["burst"]},
+                name=f"harvey-job-{i}",
+            )
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        stale_check = getattr(settings, "HARVEY_JOB_STALE_SECONDS", 1800) / 2
+        last_check = time.monotonic()
+        while any(t.is_alive() for t in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+            if not opts["burst"] and time.monotonic() - last_check > stale_check:
+                jobs.requeue_stale()
+                last_check = time.monotonic()
+        self.stdout.write(self.style.SUCCESS("Job worker stopped"))
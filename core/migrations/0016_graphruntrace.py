@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-19 11:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_message_client_id_alter_message_timestamp_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphRunTrace',
+            fields=[
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='span_trace', serialize=False, to='core.graphrun')),
+                ('spans', models.JSONField(blank=True, default=list)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_graphruntrace'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GraphRunProfile',
+            fields=[
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to='core.graphrun')),
+                ('reason', models.CharField(choices=[('sampled', 'Sampled'), ('slow', 'Slow')], default='sampled', max_length=20)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('interval_ms', models.PositiveIntegerField(default=0)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('collapsed_stacks', models.TextField(blank=True)),
+                ('top_functions', models.JSONField(blank=True, default=list)),
+                ('allocations', models.JSONField(blank=True, default=list)),
+                ('folded_path', models.CharField(blank=True, max_length=500)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-19 14:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_graphrunprofile'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenBudget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('downgrade_at', models.BigIntegerField(blank=True, help_text='Tokens per day before falling back to the 8B model', null=True)),
+                ('throttle_at', models.BigIntegerField(blank=True, help_text='Tokens per day before chat is paused', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='token_budget', to='core.organization')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TokenUsageRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.CharField(choices=[('minute', 'Minute'), ('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('model', models.CharField(max_length=100)),
+                ('node', models.CharField(blank=True, max_length=50)),
+                ('prompt_tokens', models.BigIntegerField(default=0)),
+                ('completion_tokens', models.BigIntegerField(default=0)),
+                ('calls', models.PositiveIntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='token_usage', to='core.organization')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='token_usage', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organization', 'bucket', 'bucket_start'], name='token_usage_org_bucket_idx')],
+                'constraints': [models.UniqueConstraint(fields=('bucket', 'bucket_start', 'organization', 'user', 'model', 'node'), name='token_usage_rollup_key', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 16:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_tokenbudget_tokenusagerollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policychunk',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector('text', config='english'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='policychunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='policychunk_search_gin'),
+        ),
+    ]
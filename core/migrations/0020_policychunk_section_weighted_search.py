@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-19 17:40
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Generated columns can't be altered in place: drop and re-add with the heading weighted A."""
+
+    dependencies = [
+        ('core', '0019_policychunk_search_vector'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='policychunk',
+            name='policychunk_search_gin',
+        ),
+        migrations.RemoveField(
+            model_name='policychunk',
+            name='search_vector',
+        ),
+        migrations.AddField(
+            model_name='policychunk',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.SearchVector(django.db.models.fields.json.KeyTextTransform('heading', 'metadata'), config='english', weight='A') + django.contrib.postgres.search.SearchVector('text', config='english', weight='B'), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='policychunk',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='policychunk_search_gin'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-19 21:05
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['organization', 'status'], name='candidate_org_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=django.contrib.postgres.indexes.GinIndex(django.db.models.functions.comparison.Cast(django.db.models.functions.text.Lower(django.db.models.functions.comparison.Cast('skills', output_field=models.TextField())), output_field=models.JSONField()), name='candidate_skills_gin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-20 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_candidate_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='policychunk',
+            name='staged',
+            field=models.BooleanField(default=False),
+        ),
+    ]
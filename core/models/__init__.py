@@ -1,9 +1,10 @@
 from .organization import Organization, User, generate_org_id
-from .chatbot import Conversation, Message, GraphRun
+from .chatbot import Conversation, Message, GraphRun, GraphRunTrace, GraphRunProfile
 from .recruitment import (
     Candidate, JobRole, Interview, LeaveRequest, 
     EmailLog, CalendarEvent, HRMSIntegrationConfig, CandidateJobScore
 )
 from .policy import Policy, PolicyChunk
 from .invite import Invite
-
+from .usage import TokenUsageRollup, TokenBudget
+from .jobs import BackgroundJob
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from .organization import Organization, User
 import uuid
 from core.utils.encryption import encrypt_token, decrypt_token
@@ -21,15 +22,22 @@ class Message(models.Model):
     conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE)
     sender = models.CharField(max_length=10)  # 'user' or 'ai'
     message_text = models.TextField()
-    timestamp = models.DateTimeField(auto_now_add=True)
-
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
+    # Set by the write-behind buffer so replayed flushes stay idempotent
+    client_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    @staticmethod
+    def encrypt_text(text):
+        """Returns the stored ('enc:' prefixed) form of a message text."""
+        if text and not text.startswith('enc:'):
+            encrypted = encrypt_token(text)
+            if encrypted:
+                return f"enc:{encrypted}"
+        return text
 
     def save(self, *args, **kwargs):
         # Encrypt if not already encrypted
-        if self.message_text and not self.message_text.startswith('enc:'):
-            encrypted = encrypt_token(self.message_text)
-            if encrypted:
-                self.message_text = f"enc:{encrypted}"
+        self.message_text = self.encrypt_text(self.message_text)
         super().save(*args, **kwargs)
 
     @property
@@ -66,8 +74,40 @@ class GraphRun(models.Model):
 
     trace = models.JSONField(default=list, blank=True)  # list of node events
 
-    started_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(default=timezone.now, editable=False)
     finished_at = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Run {self.id} ({self.status}) for {self.user.username}"
+
+
+class GraphRunTrace(models.Model):
+    """Spans recorded for one GraphRun (see core/observability/tracing.py)."""
+    run = models.OneToOneField(GraphRun, on_delete=models.CASCADE, primary_key=True, related_name="span_trace")
+    spans = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"Trace for run {self.run_id} ({len(self.spans)} spans)"
+
+
+class GraphRunProfile(models.Model):
+    """CPU samples and allocation snapshot for one GraphRun (see core/observability/profiling.py)."""
+    REASON_CHOICES = [
+        ("sampled", "Sampled"),
+        ("slow", "Slow"),
+    ]
+
+    run = models.OneToOneField(GraphRun, on_delete=models.CASCADE, primary_key=True, related_name="profile")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES, default="sampled")
+    duration_ms = models.PositiveIntegerField(default=0)
+    interval_ms = models.PositiveIntegerField(default=0)
+    sample_count = models.PositiveIntegerField(default=0)
+    collapsed_stacks = models.TextField(blank=True)  # flamegraph.pl / speedscope input
+    top_functions = models.JSONField(default=list, blank=True)
+    allocations = models.JSONField(default=list, blank=True)
+    folded_path = models.CharField(max_length=500, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    def __str__(self):
+        return f"Profile for run {self.run_id} ({self.duration_ms}ms, {self.sample_count} samples)"
@@ -0,0 +1,50 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from .organization import Organization
+
+
+class BackgroundJob(models.Model):
+    """
+    Durable unit of background work (indexing, ...), executed by `manage.py run_jobs`.
+    At most one *queued* job exists per (kind, entity_id): enqueueing again while one
+    is waiting is a no-op, see core/jobs.py.
+    """
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("succeeded", "Succeeded"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    entity_id = models.CharField(max_length=64)
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, null=True, blank=True, related_name="background_jobs"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "entity_id"],
+                condition=Q(status="queued"),
+                name="background_job_one_queued",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["run_after"], condition=Q(status="queued"), name="background_job_ready_idx"),
+            models.Index(fields=["kind", "entity_id", "-created_at"], name="background_job_entity_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}({self.entity_id}) {self.status}"
@@ -1,4 +1,7 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform
 from .organization import User
 import uuid
 
@@ -41,9 +44,22 @@ class PolicyChunk(models.Model):
     text = models.TextField()
     vector_id = models.CharField(max_length=100, null=True, blank=True)
     metadata = models.JSONField(default=dict, blank=True)
+    # Written by a re-index still in progress; hidden from search until PolicyIndexer swaps it in
+    staged = models.BooleanField(default=False)
+    # Lexical side of hybrid policy search (see policy_search_tool.lexical_search);
+    # the section heading is weighted A so ts_rank boosts chunks whose section matches
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector(KeyTextTransform("heading", "metadata"), weight="A", config="english")
+            + SearchVector("text", weight="B", config="english")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ["chunk_index"]
+        indexes = [GinIndex(fields=["search_vector"], name="policychunk_search_gin")]
 
     def __str__(self):
         return f"{self.policy.title} - Chunk {self.chunk_index}"
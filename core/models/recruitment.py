@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
+from django.db.models.functions import Cast, Lower
 from .organization import Organization, User
 
 class Candidate(models.Model):
@@ -12,6 +14,17 @@ class Candidate(models.Model):
     source = models.CharField(max_length=50)
     status = models.CharField(max_length=50, default='pending')
 
+    class Meta:
+        # Structured side of candidate_search: org/status filters and case-insensitive
+        # skills containment (@> / ?|) on the lower-cased array
+        indexes = [
+            models.Index(fields=["organization", "status"], name="candidate_org_status_idx"),
+            GinIndex(
+                Cast(Lower(Cast("skills", output_field=models.TextField())), output_field=models.JSONField()),
+                name="candidate_skills_gin",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.organization.name})"
 
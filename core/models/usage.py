@@ -0,0 +1,59 @@
+from django.db import models
+from .organization import Organization, User
+
+
+class TokenUsageRollup(models.Model):
+    """
+    LLM token counters per organization/user/model/graph node, bucketed by minute
+    and by day. Rows are only ever incremented (INSERT ... ON CONFLICT DO UPDATE),
+    see core/observability/usage.py.
+    """
+    BUCKET_CHOICES = [
+        ("minute", "Minute"),
+        ("day", "Day"),
+    ]
+
+    bucket = models.CharField(max_length=10, choices=BUCKET_CHOICES)
+    bucket_start = models.DateTimeField()
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="token_usage")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="token_usage")
+    model = models.CharField(max_length=100)
+    node = models.CharField(max_length=50, blank=True)
+
+    prompt_tokens = models.BigIntegerField(default=0)
+    completion_tokens = models.BigIntegerField(default=0)
+    calls = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bucket", "bucket_start", "organization", "user", "model", "node"],
+                nulls_distinct=False,
+                name="token_usage_rollup_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["organization", "bucket", "bucket_start"], name="token_usage_org_bucket_idx"),
+        ]
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+    def __str__(self):
+        return f"{self.organization_id} {self.model}/{self.node} @ {self.bucket} {self.bucket_start:%Y-%m-%d %H:%M}"
+
+
+class TokenBudget(models.Model):
+    """
+    Daily token limits for an organization. Past `downgrade_at` the reasoner
+    (Llama 4 Scout 17B) is swapped for the 8B model; past `throttle_at` new chat
+    turns are refused until the next UTC day. Either limit may be left empty.
+    """
+    organization = models.OneToOneField(Organization, on_delete=models.CASCADE, related_name="token_budget")
+    downgrade_at = models.BigIntegerField(null=True, blank=True, help_text="Tokens per day before falling back to the 8B model")
+    throttle_at = models.BigIntegerField(null=True, blank=True, help_text="Tokens per day before chat is paused")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Budget for {self.organization.name}"
@@ -0,0 +1,26 @@
+"""
+Per-turn context (organization, user, graph run) shared with code that has no
+access to the request, e.g. token accounting inside LangGraph nodes.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_turn = ContextVar("harvey_current_turn", default=None)
+
+
+@contextmanager
+def turn_context(**values):
+    """Binds values for the duration of a chat turn (propagates into sync_to_async and graph threads)."""
+    parent = _current_turn.get() or {}
+    token = _current_turn.set({**parent, **values})
+    try:
+        yield
+    finally:
+        _current_turn.reset(token)
+
+
+def get_turn_value(key, default=None):
+    turn = _current_turn.get()
+    if not turn:
+        return default
+    return turn.get(key, default)
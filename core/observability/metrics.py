@@ -0,0 +1,232 @@
+"""
+Prometheus-compatible metrics shared across Daphne processes.
+
+Observations are accumulated in process memory and folded into Redis hashes by
+a background thread every few seconds (one pipelined round trip), so the hot
+path never waits on the network. `render_metrics()` reads the Redis state and
+emits the Prometheus text exposition format, which means a scrape of `/metrics`
+includes every worker's samples regardless of which process serves it.
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger("harvey")
+
+KEY_PREFIX = "harvey:metrics:"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class _Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add(self, metric_name, field, amount):
+        with self._lock:
+            key = (metric_name, field)
+            self._pending[key] = self._pending.get(key, 0) + amount
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="harvey-metrics", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(getattr(settings, "HARVEY_METRICS_FLUSH_SECONDS", 5))
+            self.flush()
+
+    def flush(self):
+        """Pushes locally accumulated increments to Redis."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            from core.redis_utils import get_redis_client
+            pipe = get_redis_client().pipeline(transaction=False)
+            for (metric_name, field), amount in pending.items():
+                pipe.hincrbyfloat(KEY_PREFIX + metric_name, field, amount)
+            pipe.execute()
+        except Exception as e:
+            # Metrics are best effort; keep the increments for the next attempt
+            logger.warning(f"Metrics flush failed: {e}")
+            with self._lock:
+                for key, amount in pending.items():
+                    self._pending[key] = self._pending.get(key, 0) + amount
+
+
+REGISTRY = _Registry()
+
+
+def _field(suffix, labels, le=None):
+    data = {"s": suffix, "l": labels}
+    if le is not None:
+        data["le"] = le
+    return json.dumps(data, sort_keys=True)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, le=None):
+    items = list(labels.items())
+    if le is not None:
+        items.append(("le", le))
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    @property
+    def family(self):
+        """Family name on the # HELP / # TYPE lines; Prometheus types samples by it."""
+        return self.name
+
+    def _labels(self, labels):
+        missing = set(self.labelnames) - set(labels)
+        if missing:
+            raise ValueError(f"{self.name}: missing labels {sorted(missing)}")
+        return {k: str(labels[k]) for k in self.labelnames}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def family(self):
+        # Samples are exposed as <name>_total, like prometheus_client's text format
+        return f"{self.name}_total"
+
+    def inc(self, amount=1, **labels):
+        REGISTRY.add(self.name, _field("", self._labels(labels)), amount)
+
+    def render(self, rows):
+        for data, value in rows:
+            yield f"{self.name}_total{_format_labels(data['l'])} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        labels = self._labels(labels)
+        for bound in self.buckets:
+            if value <= bound:
+                REGISTRY.add(self.name, _field("_bucket", labels, le=_format_value(bound)), 1)
+        REGISTRY.add(self.name, _field("_bucket", labels, le="+Inf"), 1)
+        REGISTRY.add(self.name, _field("_sum", labels), value)
+        REGISTRY.add(self.name, _field("_count", labels), 1)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self, rows):
+        series = {}
+        for data, value in rows:
+            series.setdefault(json.dumps(data["l"], sort_keys=True), {})[(data["s"], data.get("le"))] = value
+
+        for key in sorted(series):
+            labels, values = json.loads(key), series[key]
+            # Buckets never hit have no Redis field; they are cumulative, so they are 0
+            for le in [_format_value(b) for b in self.buckets] + ["+Inf"]:
+                yield f"{self.name}_bucket{_format_labels(labels, le=le)} {_format_value(values.get(('_bucket', le), 0))}"
+            for suffix in ("_sum", "_count"):
+                yield f"{self.name}{suffix}{_format_labels(labels)} {_format_value(values.get((suffix, None), 0))}"
+
+
+def render_metrics():
+    """Prometheus text exposition (version 0.0.4) of all processes' metrics."""
+    from core.redis_utils import get_redis_client
+
+    REGISTRY.flush()
+    client = get_redis_client()
+    pipe = client.pipeline(transaction=False)
+    metrics = list(REGISTRY.metrics.values())
+    for metric in metrics:
+        pipe.hgetall(KEY_PREFIX + metric.name)
+
+    lines = []
+    for metric, raw in zip(metrics, pipe.execute()):
+        rows = sorted(
+            ((json.loads(field), float(value)) for field, value in raw.items()),
+            key=lambda row: json.dumps(row[0], sort_keys=True),
+        )
+        lines.append(f"# HELP {metric.family} {metric.documentation}")
+        lines.append(f"# TYPE {metric.family} {metric.kind}")
+        lines.extend(metric.render(rows))
+    return "\n".join(lines) + "\n"
+
+
+# ─────────────────────────────
+# Harvey metrics
+# ─────────────────────────────
+GRAPH_NODE_SECONDS = Histogram(
+    "harvey_graph_node_seconds", "Latency of LangGraph nodes (ROUTER, HARVEY, TOOL, SUM).", ["node"]
+)
+TOOL_SECONDS = Histogram(
+    "harvey_tool_seconds", "Latency of individual agent tool calls.", ["tool"]
+)
+VECTOR_SEARCH_SECONDS = Histogram(
+    "harvey_vector_search_seconds", "Latency of VectorStore.similarity_search.", ["doc_type"]
+)
+RERANK_SECONDS = Histogram(
+    "harvey_rerank_seconds", "Latency of the retrieval reranker stage.", ["reranker"]
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "harvey_embedding_batch_size", "Number of texts embedded per call.", ["operation"], buckets=SIZE_BUCKETS
+)
+LLM_TOKENS = Counter(
+    "harvey_llm_tokens", "LLM tokens consumed.", ["model", "organization", "kind"]
+)
+CACHE_REQUESTS = Counter(
+    "harvey_cache_requests", "Cache lookups by cache name and result (hit/miss).", ["cache", "result"]
+)
+
+
+def record_cache(cache_name, hit):
+    CACHE_REQUESTS.inc(cache=cache_name, result="hit" if hit else "miss")
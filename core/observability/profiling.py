@@ -0,0 +1,215 @@
+"""
+On-demand profiling of `graph.invoke`.
+
+A run is profiled when its organization or user is opted in (settings or a
+temporary cache flag set from the admin panel), or when it falls inside
+HARVEY_PROFILE_SAMPLE_RATE. Profiled runs get a statistical CPU profile (the
+invoking thread's stack sampled every few ms) and a tracemalloc allocation
+snapshot, stored as a GraphRunProfile next to the GraphRun (written in the
+same write-behind entry, so the row never lands before its run).
+
+tracemalloc is process-global: it traces every thread, and stopping it stops
+it for everyone. So only one run at a time is traced (a sampled run that
+overlaps a traced one gets its CPU profile but no allocations), and its
+allocation sites are process-wide, covering whatever else the process
+allocated during the run.
+
+With HARVEY_PROFILE_SLOW_MS set (off by default), every other run carries a
+cheap low-frequency sampler, and only runs slower than the threshold keep their
+profile; those also get a flamegraph-compatible collapsed-stack file in
+HARVEY_PROFILE_DIR.
+"""
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger("harvey")
+
+FLAG_TIMEOUT = 3600
+
+# Held by the one run whose allocations are being traced
+_TRACING = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enable_profiling(organization_id=None, user_id=None, timeout=FLAG_TIMEOUT):
+    """Temporarily opts an organization or user into profiling (default: one hour)."""
+    if organization_id is not None:
+        cache.set(f"harvey:profile:org:{organization_id}", True, timeout=timeout)
+    if user_id is not None:
+        cache.set(f"harvey:profile:user:{user_id}", True, timeout=timeout)
+
+
+def should_profile(user):
+    """HARVEY_PROFILE_ORGS holds public org ids (ORG-XXXXXXXX), HARVEY_PROFILE_USERS user pks."""
+    org = user.organization
+    if user.id in _setting("HARVEY_PROFILE_USERS", []):
+        return True
+    if org is not None and org.org_id in _setting("HARVEY_PROFILE_ORGS", []):
+        return True
+    try:
+        flags = cache.get_many([f"harvey:profile:org:{user.organization_id}", f"harvey:profile:user:{user.id}"])
+        if any(flags.values()):
+            return True
+    except Exception as e:
+        logger.warning(f"Profiling flags unavailable: {e}")
+    rate = _setting("HARVEY_PROFILE_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack at a fixed interval and counts collapsed stacks."""
+
+    def __init__(self, thread_id, interval_ms):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.interval_ms = interval_ms
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="harvey-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format (`a;b;c count`), consumable by flamegraph.pl / speedscope."""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit=25):
+        """Leaf frames by sample count (self time)."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [
+            {"function": name, "samples": count, "pct": round(count / self.samples * 100, 1)}
+            for name, count in leaves.most_common(limit)
+        ] if self.samples else []
+
+
+def _allocation_snapshot(limit=25):
+    snapshot = tracemalloc.take_snapshot()
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),  # the profiler's own stack bookkeeping
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    return [
+        {"location": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+
+def _write_collapsed(run_id, collapsed):
+    directory = str(_setting("HARVEY_PROFILE_DIR", "logs/profiles"))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{run_id}.folded")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(collapsed + "\n")
+    return path
+
+
+class ProfileResult:
+    """Filled in when `profile_run` exits; `records` go into the same write-behind entry as the GraphRun."""
+
+    def __init__(self):
+        self.records = []
+
+
+@contextmanager
+def profile_run(user, run):
+    """Wraps graph.invoke; yields a ProfileResult holding a GraphRunProfile record if the run was kept."""
+    result = ProfileResult()
+    sampled = should_profile(user)
+    slow_ms = _setting("HARVEY_PROFILE_SLOW_MS", 0)
+    if not sampled and not slow_ms:
+        yield result
+        return
+
+    interval_ms = _setting("HARVEY_PROFILE_INTERVAL_MS", 5) if sampled else _setting("HARVEY_PROFILE_SLOW_INTERVAL_MS", 50)
+    profiler = SamplingProfiler(threading.get_ident(), interval_ms).start()
+    traced = sampled and _TRACING.acquire(blocking=False)
+    started_tracemalloc = False
+    if traced and not tracemalloc.is_tracing():
+        # If something else already traces (PYTHONTRACEMALLOC), snapshot it but leave it running
+        tracemalloc.start()
+        started_tracemalloc = True
+
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        profiler.stop()
+        allocations = []
+        if traced:
+            try:
+                allocations = _allocation_snapshot()
+            except Exception as e:
+                logger.warning(f"Allocation snapshot for run {run.id} failed: {e}")
+            finally:
+                if started_tracemalloc:
+                    tracemalloc.stop()
+                _TRACING.release()
+
+        is_slow = bool(slow_ms) and duration_ms >= slow_ms
+        if sampled or is_slow:
+            try:
+                result.records.append(
+                    _build_profile(run, profiler, allocations, duration_ms, "sampled" if sampled else "slow", is_slow)
+                )
+            except Exception as e:
+                logger.warning(f"Failed to build profile for run {run.id}: {e}")
+
+
+def _build_profile(run, profiler, allocations, duration_ms, reason, is_slow):
+    from core.models.chatbot import GraphRunProfile
+    from core.ai.agentic.graph.write_behind import to_record
+
+    collapsed = profiler.collapsed()
+    path = _write_collapsed(run.id, collapsed) if is_slow else ""
+    if is_slow:
+        logger.warning(f"Slow run {run.id}: {duration_ms}ms, collapsed stacks written to {path}")
+
+    profile = GraphRunProfile(
+        run_id=run.id,
+        reason=reason,
+        duration_ms=duration_ms,
+        interval_ms=profiler.interval_ms,
+        sample_count=profiler.samples,
+        collapsed_stacks=collapsed,
+        top_functions=profiler.top_functions(),
+        allocations=allocations,
+        folded_path=path,
+    )
+    return to_record(profile)
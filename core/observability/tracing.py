@@ -0,0 +1,294 @@
+"""
+Span tracing for a chat turn.
+
+A span is opened with `with span("name", **attributes):`. The current span lives
+in a context var, so children opened in sync_to_async threads or LangGraph
+worker threads attach to the right parent. Spans of a trace are buffered until
+the root span ends, then handed to every exporter in HARVEY_TRACE_EXPORTERS.
+
+Instrumented: ChatConsumer.receive, generate_llm_reply, every graph node and
+tool, VectorStore.similarity_search, every ORM execute (via a connection
+wrapper) and every LLM call (via a LangChain callback handler).
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger("harvey")
+
+_current_span = ContextVar("harvey_current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "status", "error")
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.start = time.time()
+        self.end = None
+        self.attributes = dict(attributes or {})
+        self.status = "ok"
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        self.end = time.time()
+        if error is not None:
+            self.status = "error"
+            self.error = repr(error)[:500]
+        _collector.finished(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(((self.end or time.time()) - self.start) * 1000, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+def tracing_enabled():
+    return getattr(settings, "HARVEY_TRACING", True)
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def span(name, **attributes):
+    """Opens a child of the current span (or a new root). Yields the Span, or None when tracing is off."""
+    if not tracing_enabled():
+        yield None
+        return
+
+    s = Span(name, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        _current_span.reset(token)
+        s.finish(error=e)
+        raise
+    else:
+        _current_span.reset(token)
+        s.finish()
+
+
+def start_span(name, parent=None, **attributes):
+    """Starts a span without making it current (for callback-style start/end pairs)."""
+    if not tracing_enabled():
+        return None
+    return Span(name, parent=parent or _current_span.get(), attributes=attributes)
+
+
+# ─────────────────────────────
+# Collection & export
+# ─────────────────────────────
+class _Collector:
+    """
+    Buffers finished spans per trace. When the root ends the trace is queued for
+    a background thread, so exporters never run on the request path.
+    """
+    MAX_OPEN_TRACES = 1000
+
+    def __init__(self):
+        self._traces = {}
+        self._lock = threading.Lock()
+        self._exporters = None
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def finished(self, s):
+        with self._lock:
+            spans = self._traces.setdefault(s.trace_id, [])
+            spans.append(s.to_dict())
+            if s.parent_id is not None:
+                if len(self._traces) > self.MAX_OPEN_TRACES:
+                    # Drop the oldest trace whose root never finished
+                    self._traces.pop(next(iter(self._traces)))
+                return
+            del self._traces[s.trace_id]
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="harvey-trace-export", daemon=True)
+                self._thread.start()
+        self._queue.put(spans)
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self._export(spans)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Blocks until every finished trace has been handed to the exporters."""
+        self._queue.join()
+
+    def exporters(self):
+        if self._exporters is None:
+            paths = getattr(settings, "HARVEY_TRACE_EXPORTERS", [])
+            self._exporters = [import_string(path)() for path in paths]
+        return self._exporters
+
+    def _export(self, spans):
+        spans.sort(key=lambda d: d["start"])
+        for exporter in self.exporters():
+            try:
+                exporter.export(spans)
+            except Exception as e:
+                logger.warning(f"Trace exporter {exporter.__class__.__name__} failed: {e}")
+
+
+_collector = _Collector()
+
+
+def add_exporter(exporter):
+    """Registers an extra exporter at runtime (e.g. the in-memory one used by benchmark_chat)."""
+    _collector.exporters().append(exporter)
+
+
+def remove_exporter(exporter):
+    if exporter in _collector.exporters():
+        _collector.exporters().remove(exporter)
+
+
+def flush():
+    _collector.flush()
+
+
+class SpanExporter:
+    """Base class for exporters. `export` receives all spans of one finished trace."""
+
+    def export(self, spans):
+        raise NotImplementedError
+
+
+class JsonLinesExporter(SpanExporter):
+    """
+    Appends one JSON object per span to HARVEY_TRACE_FILE for offline analysis (opt-in via
+    HARVEY_TRACE_EXPORTERS). Past HARVEY_TRACE_FILE_MAX_MB the file is rotated to <file>.1,
+    so at most twice that is kept on disk.
+    """
+
+    def __init__(self, path=None, max_bytes=None):
+        self.path = str(path or getattr(settings, "HARVEY_TRACE_FILE", "logs/traces.jsonl"))
+        if max_bytes is None:
+            max_bytes = getattr(settings, "HARVEY_TRACE_FILE_MAX_MB", 100) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def export(self, spans):
+        lines = "".join(json.dumps(s, default=str) + "\n" for s in spans)
+        with self._lock:
+            if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+class MemoryExporter(SpanExporter):
+    """Keeps finished traces in a list (benchmarks and tests)."""
+
+    def __init__(self):
+        self.traces = []
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            self.traces.append(spans)
+
+    def reset(self):
+        with self._lock:
+            traces, self.traces = self.traces, []
+        return traces
+
+
+class GraphRunExporter(SpanExporter):
+    """Stores a turn's spans next to its GraphRun (through the write-behind buffer) for the admin waterfall."""
+
+    def export(self, spans):
+        run_id = next((s["attributes"]["graph_run_id"] for s in spans if "graph_run_id" in s["attributes"]), None)
+        if not run_id:
+            return
+        from core.models.chatbot import GraphRunTrace
+        from core.ai.agentic.graph.write_behind import write_behind, to_record
+        write_behind.submit([to_record(GraphRunTrace(run_id=run_id, spans=spans))])
+
+
+# ─────────────────────────────
+# ORM queries
+# ─────────────────────────────
+def _db_span_wrapper(execute, sql, params, many, context):
+    if _current_span.get() is None:
+        return execute(sql, params, many, context)
+    with span("db.query", sql=sql[:300], many=many, vendor=context["connection"].vendor):
+        return execute(sql, params, many, context)
+
+
+def install_db_tracing(sender=None, connection=None, **kwargs):
+    """connection_created handler: traces every query issued while a span is active."""
+    if _db_span_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_span_wrapper)
+
+
+# ─────────────────────────────
+# LLM calls
+# ─────────────────────────────
+def get_llm_callback():
+    """LangChain callback handler that records one span per LLM call (model, token counts)."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMSpanHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._spans = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(serialized, run_id, kwargs)
+
+        def _start(self, serialized, run_id, kwargs):
+            params = kwargs.get("invocation_params") or {}
+            model = params.get("model") or params.get("model_name") or (serialized or {}).get("name")
+            s = start_span("llm.call", model=model)
+            if s is not None:
+                self._spans[run_id] = s
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            s = self._spans.pop(run_id, None)
+            if s is None:
+                return
+            usage = (response.llm_output or {}).get("token_usage") or {}
+            s.set_attribute("prompt_tokens", usage.get("prompt_tokens"))
+            s.set_attribute("completion_tokens", usage.get("completion_tokens"))
+            s.finish()
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            s = self._spans.pop(run_id, None)
+            if s is not None:
+                s.finish(error=error)
+
+    return LLMSpanHandler()
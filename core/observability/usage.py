@@ -0,0 +1,187 @@
+"""
+Per-organization token accounting and budgets.
+
+`record_usage()` is called by `log_token_usage` for every LLM response. It does
+two cheap things on the request path:
+
+- bumps the organization's token counter for the current UTC day in the cache,
+  which `budget_state()` compares against the org's TokenBudget;
+- adds the counts to an in-process accumulator keyed by minute/day bucket,
+  organization, user, model and graph node.
+
+A background thread folds the accumulator into TokenUsageRollup every
+HARVEY_USAGE_FLUSH_SECONDS with a single `INSERT ... ON CONFLICT DO UPDATE`
+batch that adds to the existing counters, so many workers can write the same
+bucket without read-modify-write races and the table grows per bucket, not per call.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .context import get_turn_value
+
+logger = logging.getLogger("harvey")
+
+BUDGET_OK = "ok"
+BUDGET_DOWNGRADE = "downgrade"
+BUDGET_THROTTLE = "throttle"
+
+
+def _day_key(organization_id, now=None):
+    now = now or timezone.now()
+    return f"harvey:usage:{organization_id}:{now:%Y%m%d}"
+
+
+class _UsageAccumulator:
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, organization_id, user_id, model, node, prompt, completion, now=None):
+        now = now or timezone.now()
+        minute = now.replace(second=0, microsecond=0)
+        day = minute.replace(hour=0, minute=0)
+        with self._lock:
+            for bucket, start in (("minute", minute), ("day", day)):
+                key = (bucket, start, organization_id, user_id, model, node)
+                counts = self._pending.setdefault(key, [0, 0, 0])
+                counts[0] += prompt
+                counts[1] += completion
+                counts[2] += 1
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="harvey-usage", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(getattr(settings, "HARVEY_USAGE_FLUSH_SECONDS", 10))
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Adds accumulated counts to TokenUsageRollup. Returns the number of rows upserted."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        from core.models.usage import TokenUsageRollup
+        table = TokenUsageRollup._meta.db_table
+        sql = (
+            f"INSERT INTO {table} "
+            "(bucket, bucket_start, organization_id, user_id, model, node, prompt_tokens, completion_tokens, calls) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
+            "ON CONFLICT ON CONSTRAINT token_usage_rollup_key DO UPDATE SET "
+            f"prompt_tokens = {table}.prompt_tokens + EXCLUDED.prompt_tokens, "
+            f"completion_tokens = {table}.completion_tokens + EXCLUDED.completion_tokens, "
+            f"calls = {table}.calls + EXCLUDED.calls"
+        )
+        rows = [key + tuple(counts) for key, counts in pending.items()]
+        try:
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+        except Exception as e:
+            logger.warning(f"Token usage flush failed, retrying next interval: {e}")
+            with self._lock:
+                for key, counts in pending.items():
+                    merged = self._pending.setdefault(key, [0, 0, 0])
+                    for i, value in enumerate(counts):
+                        merged[i] += value
+            return 0
+        return len(rows)
+
+
+ACCUMULATOR = _UsageAccumulator()
+
+
+def record_usage(model, prompt_tokens, completion_tokens):
+    """Attributes one LLM call to the current turn's organization, user and graph node."""
+    organization_id = get_turn_value("organization_id")
+    if organization_id is None:
+        return  # not inside a chat turn (e.g. background scoring); metrics still count it
+
+    total = prompt_tokens + completion_tokens
+    key = _day_key(organization_id)
+    try:
+        cache.add(key, 0, timeout=int(timedelta(days=2).total_seconds()))
+        cache.incr(key, total)
+    except Exception as e:
+        logger.warning(f"Live token counter unavailable: {e}")
+
+    ACCUMULATOR.add(
+        organization_id,
+        get_turn_value("user_id"),
+        model,
+        get_turn_value("node") or "",
+        prompt_tokens,
+        completion_tokens,
+    )
+
+
+def tokens_used_today(organization_id):
+    try:
+        return cache.get(_day_key(organization_id)) or 0
+    except Exception:
+        return 0
+
+
+def _budget_limits(organization_id):
+    def load():
+        from core.models.usage import TokenBudget
+        budget = TokenBudget.objects.filter(organization_id=organization_id).first()
+        return (budget.downgrade_at, budget.throttle_at) if budget else (None, None)
+
+    try:
+        return cache.get_or_set(f"harvey:budget:{organization_id}", load, timeout=60)
+    except Exception:
+        return load()
+
+
+def budget_state(organization_id=None):
+    """"ok", "downgrade" (use the 8B model) or "throttle" (refuse the turn) for today's usage."""
+    if organization_id is None:
+        organization_id = get_turn_value("organization_id")
+    if organization_id is None:
+        return BUDGET_OK
+
+    downgrade_at, throttle_at = _budget_limits(organization_id)
+    if downgrade_at is None and throttle_at is None:
+        return BUDGET_OK
+
+    used = tokens_used_today(organization_id)
+    if throttle_at is not None and used >= throttle_at:
+        return BUDGET_THROTTLE
+    if downgrade_at is not None and used >= downgrade_at:
+        return BUDGET_DOWNGRADE
+    return BUDGET_OK
+
+
+def invalidate_budget(organization_id):
+    cache.delete(f"harvey:budget:{organization_id}")
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """USD cost from HARVEY_MODEL_PRICES ({model: (prompt $/1M, completion $/1M)}); 0 for unknown models."""
+    prices = getattr(settings, "HARVEY_MODEL_PRICES", {}).get(model)
+    if not prices:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
@@ -1,8 +1,18 @@
 import json
+import os
 import redis
 
 r = redis.Redis(host="127.0.0.1", port=6379, db=1)
 
+_client = None
+
+def get_redis_client():
+    """Shared Redis client for the configured REDIS_URL (same instance as the cache)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/1"))
+    return _client
+
 def get_user_memory(user_id: int):
     key = f"harvey:memory:{user_id}"
     data = r.get(key)
@@ -14,3 +24,4 @@ def set_user_memory(user_id: int, memory: dict):
 
 def clear_user_memory(user_id: int):
     r.delete(f"harvey:memory:{user_id}")
+
@@ -5,8 +5,7 @@ from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from core.models.policy import Policy
 from core.models.recruitment import Candidate, JobRole
-from core.ai.rag.model_indexer import ModelIndexer
-import threading
+from core.jobs import enqueue
 
 @receiver(post_delete, sender=Policy)
 def delete_policy_file(sender, instance, **kwargs):
@@ -24,23 +23,14 @@ def delete_policy_file(sender, instance, **kwargs):
 @receiver(post_save, sender=Candidate)
 def index_candidate_on_save(sender, instance, created, **kwargs):
     """
-    Triggers indexing when a Candidate is saved (created or updated).
-    Runs in a background thread to avoid blocking.
+    Queues (re)indexing when a Candidate is saved (created or updated).
+    Repeated saves coalesce into one queued job; `run_jobs` does the work.
     """
-    def _index():
-        indexer = ModelIndexer()
-        indexer.index_candidate(instance.id)
-
-    threading.Thread(target=_index).start()
+    enqueue("index_candidate", instance.id, organization_id=instance.organization_id)
 
 @receiver(post_save, sender=JobRole)
 def index_job_role_on_save(sender, instance, created, **kwargs):
     """
-    Triggers indexing when a JobRole is saved.
+    Queues indexing when a JobRole is saved.
     """
-    def _index():
-        indexer = ModelIndexer()
-        indexer.index_job_role(instance.id)
-        
-    threading.Thread(target=_index).start()
-
+    enqueue("index_job_role", instance.id, organization_id=instance.organization_id)
@@ -2,9 +2,9 @@
 from django.urls import path
 from .views import (
     chat_with_llm, chat_page, login_view, CustomLogoutView, upload_resume, landing_page,
-    google_login, google_callback, org_google_login
+    google_login, google_callback, org_google_login, metrics_view, healthz, readyz
 )
-from .api import list_conversations, get_conversation_messages, delete_conversation
+from .api import list_conversations, get_conversation_messages, delete_conversation, list_jobs, get_job
 from adminpanel import views as admin_views
 
 urlpatterns = [
@@ -22,6 +22,11 @@ urlpatterns = [
     path("api/conversations/", list_conversations, name="list_conversations"),
     path("api/conversations/<int:conversation_id>/messages/", get_conversation_messages, name="get_conversation_messages"),
     path("api/conversations/<int:conversation_id>/delete/", delete_conversation, name="delete_conversation"),
+    path("api/jobs/", list_jobs, name="list_jobs"),
+    path("api/jobs/<int:job_id>/", get_job, name="get_job"),
     path("upload_resume/", upload_resume, name="upload_resume"),
+    path("metrics", metrics_view, name="metrics"),
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
     path('logout/', CustomLogoutView.as_view(next_page='login'), name='logout'),
 ]
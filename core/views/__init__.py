@@ -8,3 +8,5 @@ from .auth import (
 )
 from .chat import chat_page, chat_with_llm
 from .upload import upload_resume
+from .metrics import metrics_view
+from .health import healthz, readyz
@@ -0,0 +1,15 @@
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_GET
+from core import warmup
+
+
+@require_GET
+def healthz(request):
+    """Liveness: the process is up and serving requests."""
+    return HttpResponse("ok", content_type="text/plain")
+
+
+@require_GET
+def readyz(request):
+    """Readiness: 503 until startup warmup (models, LLM clients, compiled graph) has finished."""
+    return JsonResponse(warmup.status(), status=200 if warmup.is_ready() else 503)
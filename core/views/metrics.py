@@ -0,0 +1,24 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from core.observability.metrics import render_metrics
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, behind a bearer token (HARVEY_METRICS_TOKEN). The series
+    carry per-organization usage, so without a token it is only served under DEBUG.
+    """
+    token = getattr(settings, "HARVEY_METRICS_TOKEN", "")
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse("Metrics are disabled until HARVEY_METRICS_TOKEN is set", status=403)
+    elif not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse("Unauthorized", status=401)
+
+    try:
+        body = render_metrics()
+    except Exception as e:
+        return HttpResponse(f"# metrics backend unavailable: {e}\n", status=503, content_type="text/plain")
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
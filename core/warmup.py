@@ -0,0 +1,86 @@
+"""
+Startup warmup and readiness.
+
+The heavy AI stack (LangChain/LangGraph, the Groq and Gemini SDKs, every tool, the
+embedding and reranker models, the sqlite checkpointer) is imported lazily, so
+`manage.py migrate` and other commands never load it. A serving process loads it
+once, up front, with `warmup()`: project_harvey/asgi.py starts it in a background
+thread when HARVEY_WARMUP is on, and GET /readyz answers 503 until it finishes.
+The orchestrator therefore only routes traffic to a worker whose first chat turn
+will not pay the cold start.
+
+A failing step (e.g. no GROQ_API_KEY in development) is logged and reported in
+/readyz but does not hold readiness back: the request path would load the same
+thing lazily and surface the same error.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger("harvey")
+
+
+def _embeddings():
+    from core.ai.rag.vector_store import VectorStore
+    VectorStore.get_embeddings().embed_query("warmup")
+
+
+def _reranker():
+    from core.ai.rag.reranker import get_reranker
+    get_reranker().warmup()
+
+
+def _llm():
+    from core.ai.agentic.graph.tools_registry import get_router_llm
+    get_router_llm()
+
+
+def _graph():
+    from core.ai.agentic.graph.graph import get_graph
+    get_graph()
+
+
+STEPS = {"embeddings": _embeddings, "reranker": _reranker, "llm": _llm, "graph": _graph}
+
+_ready = threading.Event()
+_status = {"state": "pending", "steps": {}}
+_lock = threading.Lock()
+
+
+def warmup(steps=None):
+    """Runs the named warmup steps (all by default); returns {step: seconds or error} and marks the process ready."""
+    with _lock:
+        _status["state"] = "warming"
+        for name in steps or STEPS:
+            started = time.perf_counter()
+            try:
+                STEPS[name]()
+                _status["steps"][name] = round(time.perf_counter() - started, 3)
+            except Exception as e:
+                logger.warning(f"Warmup step {name} failed: {e}")
+                _status["steps"][name] = f"error: {e}"
+        _status["state"] = "ready"
+        _ready.set()
+    logger.info(f"Warmup finished: {_status['steps']}")
+    return dict(_status["steps"])
+
+
+def start_warmup():
+    """Called once per serving process; warms in the background, or marks ready at once when HARVEY_WARMUP is off."""
+    if not getattr(settings, "HARVEY_WARMUP", True):
+        _status["state"] = "ready"
+        _ready.set()
+        return None
+    thread = threading.Thread(target=warmup, name="harvey-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready():
+    return _ready.is_set()
+
+
+def status():
+    return {"state": _status["state"], "steps": dict(_status["steps"])}
@@ -10,6 +10,11 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_harvey.settings")
 django.setup()
 
 from core import routing  
+from core.warmup import start_warmup
+
+# Load models, LLM clients and the chat graph now rather than on the first chat turn;
+# /readyz reports 503 until this finishes
+start_warmup()
 
 application = ProtocolTypeRouter({
     "http": ASGIStaticFilesHandler(get_asgi_application()),
@@ -212,3 +212,130 @@ LOGGING = {
     },
 }
 
+
+
+# Chat persistence
+# Message/GraphRun rows are queued on a Redis stream and bulk-written off the reply path.
+HARVEY_WRITE_BEHIND = os.environ.get("HARVEY_WRITE_BEHIND", "true").lower() == "true"
+HARVEY_WRITE_BEHIND_BATCH = int(os.environ.get("HARVEY_WRITE_BEHIND_BATCH", "50"))
+HARVEY_WRITE_BEHIND_INTERVAL_MS = int(os.environ.get("HARVEY_WRITE_BEHIND_INTERVAL_MS", "200"))
+HARVEY_WRITE_BEHIND_RECLAIM_MS = int(os.environ.get("HARVEY_WRITE_BEHIND_RECLAIM_MS", "30000"))
+
+# Metrics (/metrics, Prometheus text format aggregated through Redis)
+HARVEY_METRICS_FLUSH_SECONDS = int(os.environ.get("HARVEY_METRICS_FLUSH_SECONDS", "5"))
+# Bearer token for /metrics; without one the endpoint is only served when DEBUG is on
+HARVEY_METRICS_TOKEN = os.environ.get("HARVEY_METRICS_TOKEN", "")
+
+# Span tracing (core/observability/tracing.py)
+HARVEY_TRACING = os.environ.get("HARVEY_TRACING", "true").lower() == "true"
+# Comma-separated exporter paths. The JSON-lines file exporter is opt-in (add
+# core.observability.tracing.JsonLinesExporter); its file rotates at HARVEY_TRACE_FILE_MAX_MB
+HARVEY_TRACE_EXPORTERS = [
+    v for v in os.environ.get("HARVEY_TRACE_EXPORTERS", "core.observability.tracing.GraphRunExporter").split(",") if v
+]
+HARVEY_TRACE_FILE = os.environ.get("HARVEY_TRACE_FILE", str(BASE_DIR / "logs/traces.jsonl"))
+HARVEY_TRACE_FILE_MAX_MB = int(os.environ.get("HARVEY_TRACE_FILE_MAX_MB", "100"))
+
+# Profiling of graph.invoke (core/observability/profiling.py)
+# Comma-separated org/user ids that are always profiled; admins can also opt in for an hour from /runs/slowest/.
+HARVEY_PROFILE_ORGS = [v for v in os.environ.get("HARVEY_PROFILE_ORGS", "").split(",") if v]
+HARVEY_PROFILE_USERS = [int(v) for v in os.environ.get("HARVEY_PROFILE_USERS", "").split(",") if v]
+HARVEY_PROFILE_SAMPLE_RATE = float(os.environ.get("HARVEY_PROFILE_SAMPLE_RATE", "0"))
+HARVEY_PROFILE_INTERVAL_MS = int(os.environ.get("HARVEY_PROFILE_INTERVAL_MS", "5"))
+# Runs slower than this keep a low-frequency profile and get a .folded file in HARVEY_PROFILE_DIR;
+# every run then carries a sampler thread, so it is off (0) unless set
+HARVEY_PROFILE_SLOW_MS = int(os.environ.get("HARVEY_PROFILE_SLOW_MS", "0"))
+HARVEY_PROFILE_SLOW_INTERVAL_MS = int(os.environ.get("HARVEY_PROFILE_SLOW_INTERVAL_MS", "50"))
+HARVEY_PROFILE_DIR = os.environ.get("HARVEY_PROFILE_DIR", str(BASE_DIR / "logs/profiles"))
+
+# Token accounting (core/observability/usage.py); budgets are set per organization in Django admin
+HARVEY_USAGE_FLUSH_SECONDS = int(os.environ.get("HARVEY_USAGE_FLUSH_SECONDS", "10"))
+# USD per 1M tokens: (prompt, completion)
+HARVEY_MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "meta-llama/llama-4-scout-17b-16e-instruct": (0.11, 0.34),
+}
+
+# LLM record/replay (core/ai/agentic/graph/cassette.py): off | record | replay | new_episodes
+HARVEY_LLM_CASSETTE_MODE = os.environ.get("HARVEY_LLM_CASSETTE_MODE", "off")
+HARVEY_LLM_CASSETTE = os.environ.get("HARVEY_LLM_CASSETTE", "")
+# Replay delay: "recorded" (original latency) or a fixed number of milliseconds
+HARVEY_LLM_CASSETTE_LATENCY = os.environ.get("HARVEY_LLM_CASSETTE_LATENCY", "recorded")
+
+# Retrieval reranker: dotted path to a core.ai.rag.reranker.Reranker, or "none"
+HARVEY_RERANKER = os.environ.get("HARVEY_RERANKER", "core.ai.rag.reranker.CrossEncoderReranker")
+HARVEY_RERANKER_MODEL = os.environ.get("HARVEY_RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+# Per-query scoring budget; candidates past it keep retrieval order (0 = score everything)
+HARVEY_RERANKER_BUDGET_MS = int(os.environ.get("HARVEY_RERANKER_BUDGET_MS", "30"))
+HARVEY_RERANKER_CACHE_SIZE = int(os.environ.get("HARVEY_RERANKER_CACHE_SIZE", "4096"))
+
+# Text extraction process pool (core/ai/utils/extraction.py); 0 workers = extract inline
+HARVEY_EXTRACT_WORKERS = int(os.environ.get("HARVEY_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+HARVEY_EXTRACT_TIMEOUT = int(os.environ.get("HARVEY_EXTRACT_TIMEOUT", "120"))
+HARVEY_EXTRACT_MEMORY_MB = int(os.environ.get("HARVEY_EXTRACT_MEMORY_MB", "1024"))
+# PDF pages per extraction task when indexing policies, so long PDFs stream into the indexer
+HARVEY_EXTRACT_BATCH_PAGES = int(os.environ.get("HARVEY_EXTRACT_BATCH_PAGES", "16"))
+
+# Background jobs (core/jobs.py, `manage.py run_jobs`)
+HARVEY_JOB_CONCURRENCY = int(os.environ.get("HARVEY_JOB_CONCURRENCY", "2"))
+HARVEY_JOB_POLL_SECONDS = float(os.environ.get("HARVEY_JOB_POLL_SECONDS", "1"))
+# First retry delay; doubles per attempt (capped at an hour)
+HARVEY_JOB_BACKOFF_SECONDS = int(os.environ.get("HARVEY_JOB_BACKOFF_SECONDS", "10"))
+# A job "running" longer than this is assumed orphaned by a dead worker and re-queued
+HARVEY_JOB_STALE_SECONDS = int(os.environ.get("HARVEY_JOB_STALE_SECONDS", "1800"))
+
+# Keep a copy of policy chunk text in langchain_pg_embedding.document. Off = text lives only
+# in PolicyChunk and search results are hydrated from it (halves chunk text storage)
+HARVEY_VECTOR_STORE_TEXT = os.environ.get("HARVEY_VECTOR_STORE_TEXT", "true").lower() == "true"
+
+# Embedding backend (core/ai/rag/embeddings.py): "huggingface" (torch), "onnx" (ONNX Runtime,
+# needs onnxruntime + tokenizers) or a dotted path to a factory. Both produce the same 384-dim vectors
+HARVEY_EMBEDDINGS = os.environ.get("HARVEY_EMBEDDINGS", "huggingface")
+HARVEY_EMBEDDING_QUANTIZED = os.environ.get("HARVEY_EMBEDDING_QUANTIZED", "false").lower() == "true"
+# Local copy of the model repo (onnx/*.onnx + tokenizer.json) for offline images; empty = Hugging Face Hub
+HARVEY_EMBEDDING_ONNX_PATH = os.environ.get("HARVEY_EMBEDDING_ONNX_PATH", "")
+HARVEY_EMBEDDING_THREADS = int(os.environ.get("HARVEY_EMBEDDING_THREADS", "0"))
+
+# Compact ANN storage (`manage.py compact_vectors`): "none", "halfvec" or "binary". Searches scan the
+# compact index, then rescore k * factor candidates on the float32 column (0 = per-mode default: 2 / 8)
+HARVEY_VECTOR_QUANTIZATION = os.environ.get("HARVEY_VECTOR_QUANTIZATION", "none")
+HARVEY_VECTOR_RESCORE_FACTOR = int(os.environ.get("HARVEY_VECTOR_RESCORE_FACTOR", "0"))
+
+# How candidate search scores a candidate from its skills/summary/resume-chunk vectors:
+# "max" (best single match) or "sum" (rewards several matching sections)
+HARVEY_CANDIDATE_AGGREGATE = os.environ.get("HARVEY_CANDIDATE_AGGREGATE", "max")
+
+# Vector search result cache (core/ai/rag/retrieval_cache.py), invalidated per tenant on every index write; 0 = off
+HARVEY_RETRIEVAL_CACHE_SECONDS = int(os.environ.get("HARVEY_RETRIEVAL_CACHE_SECONDS", "600"))
+
+# Preload the embedding/reranker models, LLM clients and chat graph at startup (core/warmup.py);
+# /readyz answers 503 until done. Off = load lazily on first use
+HARVEY_WARMUP = os.environ.get("HARVEY_WARMUP", "true").lower() == "true"
+
+# URL policy refresh (core/ai/rag/policy_refresh.py): re-check each linked policy this often
+# (0 = never) with conditional GETs, re-indexing only pages whose text changed
+HARVEY_POLICY_REFRESH_SECONDS = int(os.environ.get("HARVEY_POLICY_REFRESH_SECONDS", "86400"))
+HARVEY_POLICY_REFRESH_CONCURRENCY = int(os.environ.get("HARVEY_POLICY_REFRESH_CONCURRENCY", "8"))
+HARVEY_POLICY_REFRESH_PER_HOST = int(os.environ.get("HARVEY_POLICY_REFRESH_PER_HOST", "1"))
+HARVEY_POLICY_REFRESH_HOST_DELAY = float(os.environ.get("HARVEY_POLICY_REFRESH_HOST_DELAY", "1.0"))
+
+# URL policies with metadata["crawl"] set are crawled from their start page (breadth-first,
+# below its directory) and indexed one section per page; 1 page = never crawl
+HARVEY_POLICY_CRAWL_MAX_PAGES = int(os.environ.get("HARVEY_POLICY_CRAWL_MAX_PAGES", "50"))
+HARVEY_POLICY_CRAWL_MAX_DEPTH = int(os.environ.get("HARVEY_POLICY_CRAWL_MAX_DEPTH", "2"))
+HARVEY_POLICY_CRAWL_CONCURRENCY = int(os.environ.get("HARVEY_POLICY_CRAWL_CONCURRENCY", "8"))
+
+# search_policies context compression (core/ai/rag/compression.py): excerpts over this many
+# (estimated) tokens are cut to numeric sentences plus the most query-similar ones; 0 = off
+HARVEY_CONTEXT_TOKEN_BUDGET = int(os.environ.get("HARVEY_CONTEXT_TOKEN_BUDGET", "200"))
+HARVEY_CONTEXT_MIN_SIMILARITY = float(os.environ.get("HARVEY_CONTEXT_MIN_SIMILARITY", "0.2"))
+HARVEY_SENTENCE_VECTOR_CACHE_SIZE = int(os.environ.get("HARVEY_SENTENCE_VECTOR_CACHE_SIZE", "20000"))
+
+# Filtered candidate search (core/ai/rag/candidate_search.py) runs its HNSW scan with pgvector's
+# iterative scan ("relaxed_order" or "strict_order", needs pgvector >= 0.8); "off" for older servers
+HARVEY_VECTOR_ITERATIVE_SCAN = os.environ.get("HARVEY_VECTOR_ITERATIVE_SCAN", "relaxed_order")
+
+# shortlist_candidates LLM scoring (core/ai/utils/candidate_scorer.py): candidates per prompt and
+# prompts in flight at once. Stored CandidateJobScores are reused, never re-scored
+HARVEY_SCORING_BATCH_SIZE = int(os.environ.get("HARVEY_SCORING_BATCH_SIZE", "5"))
+HARVEY_SCORING_CONCURRENCY = int(os.environ.get("HARVEY_SCORING_CONCURRENCY", "4"))
@@ -3,6 +3,9 @@ from unittest.mock import patch, MagicMock
 from django.core.files.uploadedfile import SimpleUploadedFile
 from core.models.recruitment import Candidate, JobRole
 from core.models.organization import Organization, User
+from core.models.jobs import BackgroundJob
+from core import jobs
+import threading
 
 class TestKnowledgeBaseIndexing(TransactionTestCase):
     
@@ -26,9 +29,9 @@ class TestKnowledgeBaseIndexing(TransactionTestCase):
             resume_file=resume
         )
 
-        # Allow thread to run (signals use threads)
-        import time
-        time.sleep(1) # Give thread a moment
+        # Signals queue a job; drain the queue like `run_jobs --burst`
+        self.assertEqual(BackgroundJob.objects.filter(kind="index_candidate", status="queued").count(), 1)
+        jobs.work(threading.Event(), burst=True)
 
         # Verify add_documents was called
         self.assertTrue(mock_store_instance.add_documents.called)
@@ -54,9 +57,8 @@ class TestKnowledgeBaseIndexing(TransactionTestCase):
             requirements="Python 3.12"
         )
 
-        # Allow thread to run
-        import time
-        time.sleep(1) 
+        # Run the queued indexing job
+        jobs.work(threading.Event(), burst=True)
 
         # Verify
         self.assertTrue(mock_store_instance.add_documents.called)
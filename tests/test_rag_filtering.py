@@ -5,33 +5,34 @@ from core.ai.rag.tools.policy_search_tool import search_policies
 
 class TestRAGFiltering(TestCase):
     
+    @patch('core.ai.rag.tools.search_tool.get_reranker')
+    @patch('core.ai.rag.tools.search_tool.search_candidates')
     @patch('core.ai.rag.tools.search_tool.get_vector_store')
-    def test_search_knowledge_base_filters_candidates(self, mock_get_store):
+    def test_search_knowledge_base_filters_candidates(self, mock_get_store, mock_search_candidates, mock_get_reranker):
         """
-        Test that search_knowledge_base applies the correct doc_type filter
-        for candidates and job roles, excluding policies.
+        Test that search_knowledge_base searches only the user's organization:
+        candidates through search_candidates, job roles by an org-scoped filter.
         """
         mock_store = MagicMock()
         mock_get_store.return_value = mock_store
-        
-        mock_doc = MagicMock()
-        mock_doc.page_content = "Some content"
-        mock_doc.metadata = {"source": "Test", "type": "candidate"}
-        mock_store.similarity_search.return_value = [mock_doc]
+        mock_store.similarity_search.return_value = []
+        mock_search_candidates.return_value = MagicMock(hits=[])
+        mock_get_reranker.return_value.rerank.side_effect = lambda query, docs, top_n: docs[:top_n]
+
+        user = MagicMock()
+        user.organization.id = 7
 
         query = "Steve developer"
-        search_knowledge_base.invoke({"query": query})
-        
-        # Verify similarity_search was called
+        search_knowledge_base.invoke({"query": query, "user": user})
+
+        args, kwargs = mock_search_candidates.call_args
+        self.assertEqual(args, (7,))
+        self.assertEqual(kwargs['query'], query)
+
+        # Job roles: only this organization's
         args, kwargs = mock_store.similarity_search.call_args
-        
-        # Check the filter argument
         self.assertIn('filter', kwargs, "Filter argument should be present")
-        filter_arg = kwargs['filter']
-        
-        # Expecting: {'doc_type': {'$in': ['candidate', 'job_role']}}
-        self.assertIn('doc_type', filter_arg)
-        self.assertEqual(filter_arg['doc_type'], {'$in': ['candidate', 'job_role']})
+        self.assertEqual(kwargs['filter'], {'doc_type': 'job', 'organization_id': '7'})
 
     @patch('core.ai.rag.tools.policy_search_tool.get_vector_store')
     def test_search_policies_filters_policies(self, mock_get_store):
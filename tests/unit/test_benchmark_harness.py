@@ -0,0 +1,55 @@
+import json
+import urllib.request
+from django.test import SimpleTestCase
+from core.benchmarks.fake_llm import FakeLLMServer, LatencyProfile, build_reply
+from core.benchmarks.report import percentile, summarize, compare
+
+
+class BenchmarkReportTest(SimpleTestCase):
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6], 50), 3)
+        self.assertEqual(summarize([])["count"], 0)
+        self.assertEqual(summarize([10, 20])["max"], 20)
+
+    def test_compare_walks_nested_results(self):
+        baseline = {"ws": {"turn_latency_ms": {"p95": 100}, "stages_ms": {"node.ROUTER": {"p95": 20}}}}
+        current = {"ws": {"turn_latency_ms": {"p95": 150}, "stages_ms": {"node.ROUTER": {"p95": 10}}}}
+        self.assertEqual(
+            sorted(compare(baseline, current)),
+            [("ws.stages_ms.node.ROUTER", 20, 10, -50.0), ("ws.turn_latency_ms", 100, 150, 50.0)],
+        )
+
+
+class FakeLLMTest(SimpleTestCase):
+    profile = LatencyProfile(latency_ms=0, tokens_per_sec=1e9, completion_tokens=5)
+
+    def test_replies_follow_request_type(self):
+        router = {"messages": [{"role": "user", "content": "Classify intent ...\n    human: what is the leave policy?"}]}
+        message, _ = build_reply(router, self.profile)
+        self.assertEqual(json.loads(message["content"]), {"intent": "tool", "tool_name": "search_policies"})
+
+        tool_mode = {"messages": [{"role": "user", "content": "leave policy"}], "tools": [{"type": "function"}]}
+        message, _ = build_reply(tool_mode, self.profile)
+        self.assertEqual(message["tool_calls"][0]["function"]["name"], "search_policies")
+
+        message, tokens = build_reply({"messages": [{"role": "user", "content": "hello"}]}, self.profile)
+        self.assertEqual(tokens, 5)
+        self.assertEqual(len(message["content"].split()), 5)
+
+    def test_server_speaks_openai_chat_completions(self):
+        body = json.dumps({"model": "llama-3.1-8b-instant", "messages": [{"role": "user", "content": "hi"}]}).encode()
+        with FakeLLMServer(self.profile) as server:
+            request = urllib.request.Request(
+                f"{server.base_url}/openai/v1/chat/completions", data=body, headers={"Content-Type": "application/json"}
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                payload = json.loads(response.read())
+            self.assertEqual(server.request_count, 1)
+
+        self.assertEqual(payload["model"], "llama-3.1-8b-instant")
+        self.assertEqual(payload["usage"]["completion_tokens"], 5)
+        self.assertEqual(payload["choices"][0]["finish_reason"], "stop")
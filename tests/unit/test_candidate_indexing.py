@@ -0,0 +1,65 @@
+from unittest.mock import MagicMock
+from django.test import SimpleTestCase
+from core.ai.rag.chunking import SectionChunker
+from core.ai.rag.model_indexer import candidate_documents, resume_markdown
+
+RESUME = """Jane Doe
+jane@example.com
+
+PROFESSIONAL SUMMARY
+Platform engineer with 8 years building developer tooling.
+
+Skills:
+Python, Go, Terraform
+
+EXPERIENCE
+Acme Corp - Senior SRE (2019-2024)
+""" + "\n".join(f"Maintained service {i} and its deploy pipeline." for i in range(40)) + """
+Ran the Kubernetes migration for 120 services and on-call rotation.
+
+EDUCATION
+BSc Computer Science
+"""
+
+
+def _candidate(parsed_data=RESUME):
+    candidate = MagicMock(id=9, email="jane@example.com", skills=["Python", "Go"], parsed_data=parsed_data)
+    candidate.name = "Jane Doe"
+    candidate.organization.id = 4
+    return candidate
+
+
+class ResumeMarkdownTest(SimpleTestCase):
+    def test_section_titles_become_headings(self):
+        text = resume_markdown(RESUME)
+        self.assertIn("## Professional Summary", text)
+        self.assertIn("## Skills", text)
+        self.assertIn("## Experience", text)
+        # Ordinary short lines are not promoted
+        self.assertIn("\nJane Doe\n", "\n" + text)
+
+    def test_dict_resume_is_one_section_per_key(self):
+        text = resume_markdown({"experience": "Acme SRE", "skills": ["Go"], "empty": ""})
+        self.assertEqual(text, '## experience\nAcme SRE\n## skills\n["Go"]')
+
+
+class CandidateDocumentsTest(SimpleTestCase):
+    def test_skills_summary_and_every_resume_section_are_embedded(self):
+        texts, metadatas = candidate_documents(_candidate(), SectionChunker(chunk_size=800, chunk_overlap=100))
+
+        fields = [m["field"] for m in metadatas]
+        self.assertEqual(fields[:2], ["skills", "summary"])
+        self.assertTrue(all(f == "resume" for f in fields[2:]))
+        self.assertTrue(all(m["candidate_id"] == "9" and m["doc_type"] == "candidate" for m in metadatas))
+        self.assertIn("Platform engineer", texts[1])
+        # Content far past the first 256 tokens still gets its own vector, under its section
+        kubernetes = [m for t, m in zip(texts, metadatas) if "Kubernetes migration" in t]
+        self.assertEqual(len(kubernetes), 1)
+        self.assertEqual(kubernetes[0]["heading"], "Experience")
+        self.assertTrue(all(len(t) <= 800 for t in texts[2:]))
+
+    def test_empty_resume_still_indexes_skills(self):
+        texts, metadatas = candidate_documents(_candidate(parsed_data=None), SectionChunker())
+        self.assertEqual([m["field"] for m in metadatas], ["skills"])
+        self.assertIn("Python, Go", texts[0])
+
@@ -0,0 +1,106 @@
+import json
+import re
+import threading
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from core.ai.utils.candidate_scorer import CandidateScorer
+from core.observability.context import get_turn_value, turn_context
+
+
+class FakeScoringLLM:
+    """Scores every candidate id in the prompt as 50 + id; records prompts, turn organizations and peak concurrency."""
+
+    def __init__(self, skip=(), fail_on=None):
+        self.prompts = []
+        self.organizations = []
+        self.skip = set(skip)
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+        self._active = 0
+        self.peak = 0
+
+    def invoke(self, messages):
+        with self._lock:
+            self._active += 1
+            self.peak = max(self.peak, self._active)
+            self.prompts.append(messages[0].content)
+            self.organizations.append(get_turn_value("organization_id"))
+        try:
+            ids = [int(i) for i in re.findall(r"\[Candidate id (\d+)\]", messages[0].content)]
+            if self.fail_on in ids:
+                raise RuntimeError("rate limited")
+            scores = [{"candidate_id": i, "score": 50 + i, "justification": f"fit {i}"} for i in ids if i not in self.skip]
+            return MagicMock(content="```json\n" + json.dumps({"scores": scores}) + "\n```", response_metadata={})
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def _candidate(i):
+    candidate = MagicMock(id=i, skills=["Go"], parsed_data="x" * 10000)
+    candidate.name = f"Candidate {i}"
+    return candidate
+
+
+def _scorer(llm):
+    with patch("core.ai.agentic.graph.tools_registry.get_reasoner_llm", return_value=llm):
+        return CandidateScorer()
+
+
+@patch("core.ai.utils.candidate_scorer.CandidateJobScore")
+class ScoreCandidatesTest(SimpleTestCase):
+    def setUp(self):
+        self.job_role = MagicMock(id=3, title="Backend Engineer", description="APIs", requirements="Go")
+        self.candidates = [_candidate(i) for i in range(1, 13)]
+
+    def test_stored_scores_are_reused_and_the_rest_batched_and_upserted(self, CandidateJobScore):
+        CandidateJobScore.objects.filter.return_value = [MagicMock(candidate_id=1, score=90, justification="stored")]
+        llm = FakeScoringLLM()
+
+        scores = _scorer(llm).score_candidates(self.candidates, self.job_role, batch_size=5, concurrency=2)
+
+        # One query for the stored scores, not one per candidate
+        CandidateJobScore.objects.filter.assert_called_once()
+        self.assertEqual(scores[1], (90, "stored"))
+        self.assertEqual(scores[12], (62, "fit 12"))
+        self.assertEqual(len(llm.prompts), 3)  # 11 unscored candidates, 5 per prompt
+        self.assertTrue(all("[Candidate id 1]" not in p for p in llm.prompts))
+        self.assertLessEqual(llm.peak, 2)
+        self.assertTrue(all(len(p) < 5 * 4500 for p in llm.prompts))
+
+        CandidateJobScore.objects.bulk_create.assert_called_once()
+        saved, = CandidateJobScore.objects.bulk_create.call_args.args
+        self.assertEqual(len(saved), 11)
+        self.assertEqual(CandidateJobScore.objects.bulk_create.call_args.kwargs["unique_fields"], ["candidate", "job_role"])
+
+    def test_batches_run_in_the_callers_turn_context(self, CandidateJobScore):
+        # Token rollups and budgets attribute the scoring calls to the turn's organization
+        CandidateJobScore.objects.filter.return_value = []
+        llm = FakeScoringLLM()
+
+        with turn_context(organization_id=42):
+            _scorer(llm).score_candidates(self.candidates, self.job_role, batch_size=3, concurrency=4)
+
+        self.assertEqual(len(llm.organizations), 4)
+        self.assertEqual(set(llm.organizations), {42})
+
+    def test_failed_or_missing_scores_are_reported_but_not_saved(self, CandidateJobScore):
+        CandidateJobScore.objects.filter.return_value = []
+        llm = FakeScoringLLM(skip={2}, fail_on=7)
+
+        scores = _scorer(llm).score_candidates(self.candidates, self.job_role, batch_size=5, concurrency=4)
+
+        self.assertEqual(scores[2][0], 0)
+        self.assertEqual(scores[7][0], 0)
+        self.assertIn("rate limited", scores[7][1])
+        self.assertEqual(scores[1], (51, "fit 1"))
+        saved, = CandidateJobScore.objects.bulk_create.call_args.args
+        # The failed batch (6-10) and the skipped candidate are retried next time
+        self.assertEqual(len(saved), 12 - 5 - 1)
+
+    def test_single_candidate_as_a_bare_object(self, CandidateJobScore):
+        CandidateJobScore.objects.filter.return_value = []
+        llm = MagicMock()
+        llm.invoke.return_value = MagicMock(content='{"score": 95, "justification": "Perfect match"}', response_metadata={})
+
+        self.assertEqual(_scorer(llm).score_candidate(self.candidates[0], self.job_role), (95, "Perfect match"))
@@ -0,0 +1,110 @@
+import json
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from core.ai.rag import candidate_search
+from core.ai.rag.candidate_search import candidate_predicates, search_candidates
+
+
+def _store(rows):
+    store = MagicMock(rescore_factor=2)
+    store._scan_sql.return_value = ("SELECT id, document, cmetadata, embedding FROM langchain_pg_embedding", {"f0": "candidate"})
+    store._query.return_value = rows
+    return store
+
+
+class CandidatePredicatesTest(SimpleTestCase):
+    def test_all_skills_is_containment_on_the_indexed_expression(self):
+        where, params = candidate_predicates(3, status="Pending", name="ann", skills="Python, GO ,")
+
+        self.assertEqual(
+            where,
+            "c.organization_id = :organization_id AND lower(c.status) = lower(:status) AND c.name ILIKE :name "
+            "AND (lower(c.skills::text))::jsonb @> CAST(:skills AS jsonb)",
+        )
+        self.assertEqual(params["skills"], json.dumps(["python", "go"]))
+        self.assertEqual(params["name"], "%ann%")
+        self.assertEqual(params["organization_id"], 3)
+
+    def test_any_skill_and_unknown_mode(self):
+        where, params = candidate_predicates(3, skills=["Go", "Rust"], skills_match="any")
+        self.assertIn("?| CAST(:skills AS text[])", where)
+        self.assertEqual(params["skills"], ["go", "rust"])
+        with self.assertRaises(ValueError):
+            candidate_predicates(3, skills="go", skills_match="most")
+
+
+class SearchCandidatesTest(SimpleTestCase):
+    def test_semantic_search_is_one_filtered_and_grouped_statement(self):
+        rows = [
+            (5, "Ann", "ann@x.io", "pending", "referral", ["Go"], None, 0.81, ["resume", "skills", None], "Ran Kubernetes", 43),
+            (4, "Bob", "bob@x.io", "pending", "portal", None, "555", 0.62, ["summary"], "", 43),
+            # Matches the filters but has no vectors yet (index job still queued)
+            (9, "Cy", "cy@x.io", "pending", "portal", ["go"], None, None, None, None, 43),
+        ]
+        store = _store(rows)
+
+        page = search_candidates(3, query="kubernetes", status="pending", skills="go", limit=10, offset=20, vector_store=store)
+
+        sql, query, params = store._query.call_args.args
+        kwargs = store._query.call_args.kwargs
+        self.assertEqual(query, "kubernetes")
+        self.assertIn("WITH matching AS (SELECT c.id FROM core_candidate c WHERE c.organization_id", sql)
+        # Membership comes from the predicates; the vector scores only order it
+        self.assertIn("FROM matching m JOIN core_candidate c ON c.id = m.id LEFT JOIN grouped g", sql)
+        self.assertIn("ORDER BY g.score DESC NULLS LAST", sql)
+        self.assertIn("MAX(score)", sql)
+        self.assertIn("GROUP BY candidate_id", sql)
+        self.assertTrue(sql.endswith("LIMIT :limit OFFSET :offset"))
+        self.assertEqual((params["limit"], params["offset"], params["f0"]), (10, 20, "candidate"))
+        # The filter is evaluated inside the ANN scan, which is sized for the page
+        filter, = store._scan_sql.call_args.args
+        self.assertEqual(filter, {"doc_type": "candidate", "organization_id": "3"})
+        self.assertIn("IN (SELECT id::text FROM matching)", store._scan_sql.call_args.kwargs["extra"])
+        self.assertEqual(kwargs["scan"], 30 * candidate_search.FANOUT * 2)
+        self.assertTrue(kwargs["iterative"])
+
+        self.assertEqual([h.id for h in page.hits], [5, 4, 9])
+        self.assertEqual(page.hits[0].matched_fields, ["resume", "skills"])
+        self.assertEqual(page.hits[0].snippet, "Ran Kubernetes")
+        self.assertEqual(page.hits[1].skills, [])
+        self.assertEqual(page.hits[0].as_dict()["score"], 0.81)
+        self.assertIsNone(page.hits[2].score)
+        self.assertEqual(page.hits[2].matched_fields, [])
+        # Every matching candidate, not just those inside the scan window
+        self.assertEqual(page.total, 43)
+        self.assertTrue(page.has_more)
+
+    def test_sum_aggregate(self):
+        store = _store([])
+        search_candidates(3, query="go", aggregate="sum", vector_store=store)
+        self.assertIn("SUM(score)", store._query.call_args.args[0])
+
+    @patch("core.ai.rag.candidate_search.filtered_candidates")
+    def test_query_before_any_vectors_exist_still_lists_matches(self, filtered):
+        filtered.return_value.count.return_value = 1
+        filtered.return_value.order_by.return_value.__getitem__.return_value = [MagicMock(id=9, skills=None, phone=None)]
+        store = _store([])
+        store._scan_sql.return_value = (None, None)
+
+        page = search_candidates(3, query="go", skills="go", vector_store=store)
+
+        store._query.assert_not_called()
+        self.assertEqual(([h.id for h in page.hits], page.total), ([9], 1))
+
+    @patch("core.ai.rag.candidate_search.filtered_candidates")
+    def test_listing_without_query_skips_the_vector_store(self, filtered):
+        candidates = [MagicMock(id=i, skills=None, phone=None) for i in (9, 8)]
+        queryset = filtered.return_value
+        queryset.count.return_value = 7
+        queryset.order_by.return_value.__getitem__.return_value = candidates
+        store = _store([])
+
+        page = search_candidates(3, status="pending", skills="go", limit=2, offset=2, vector_store=store)
+
+        filtered.assert_called_once_with(3, "pending", "", "", "", "go", "all")
+        queryset.order_by.assert_called_once_with("-id")
+        queryset.order_by.return_value.__getitem__.assert_called_once_with(slice(2, 4))
+        store._query.assert_not_called()
+        self.assertEqual([h.id for h in page.hits], [9, 8])
+        self.assertTrue(page.has_more)
+        self.assertNotIn("score", page.hits[0].as_dict())
@@ -0,0 +1,90 @@
+import math
+import re
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from core.ai.rag import compression
+from core.ai.rag.reranker import ScoreCache
+
+VOCAB = ["leave", "annual", "days", "carry", "parking", "canteen", "dress", "code", "remote", "laptop"]
+
+
+class KeywordEmbeddings:
+    """Unit-length bag-of-words vectors over VOCAB; counts embedded texts."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def _vector(self, text):
+        words = re.findall(r"\w+", text.lower())
+        vector = [float(words.count(w)) for w in VOCAB]
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [self._vector(t) for t in texts]
+
+
+LEAVE = Document(
+    page_content=(
+        "Annual Leave\n"
+        "Employees accrue annual leave monthly. Unused annual leave may be carried over once. "
+        "Parking permits are issued by facilities. The canteen opens at noon.\n"
+        "Full-time staff receive 24 days per year."
+    ),
+    metadata={"title": "Handbook", "heading": "Annual Leave", "policy_id": "p1"},
+)
+DRESS = Document(
+    page_content="Dress Code\nThe dress code is business casual. Remote staff use a company laptop.",
+    metadata={"title": "Handbook", "heading": "Dress Code", "policy_id": "p1"},
+)
+
+
+class ContextCompressionTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(compression, "_vectors", ScoreCache(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.embeddings = KeywordEmbeddings()
+
+    def test_split_sentences(self):
+        self.assertEqual(
+            compression.split_sentences("5.1 Leave\nYou get 20 days. See section 5.2 for details! Ask HR"),
+            ["5.1 Leave", "You get 20 days.", "See section 5.2 for details!", "Ask HR"],
+        )
+
+    def test_keeps_relevant_and_numeric_sentences_within_budget(self):
+        docs = compression.compress("can I carry over annual leave", [LEAVE, DRESS], token_budget=40, embeddings=self.embeddings)
+
+        self.assertEqual(len(docs), 1)
+        text = docs[0].page_content
+        self.assertIn("Unused annual leave may be carried over once.", text)
+        # The number the answerability gate and the grader need survives, after a cut
+        self.assertIn("... Full-time staff receive 24 days per year.", text)
+        self.assertNotIn("Parking", text)
+        self.assertNotIn("Annual Leave\n", text)
+        self.assertEqual(docs[0].metadata, LEAVE.metadata)
+        self.assertLessEqual(sum(compression.estimate_tokens(d.page_content) for d in docs), 40)
+
+    def test_context_within_budget_is_untouched(self):
+        docs = [DRESS]
+        self.assertIs(compression.compress("dress code", docs, token_budget=1000, embeddings=self.embeddings), docs)
+        self.assertEqual(self.embeddings.embedded, [])
+
+    def test_sentence_vectors_are_cached(self):
+        compression.compress("annual leave", [LEAVE, DRESS], token_budget=30, embeddings=self.embeddings)
+        first = len(self.embeddings.embedded)
+        compression.compress("remote laptop", [LEAVE, DRESS], token_budget=30, embeddings=self.embeddings)
+        self.assertEqual(len(self.embeddings.embedded), first)
+
+    def test_embedding_failure_keeps_the_original_context(self):
+        class Broken(KeywordEmbeddings):
+            def embed_query(self, text):
+                raise RuntimeError("model not loaded")
+
+        docs = [LEAVE, DRESS]
+        self.assertIs(compression.compress("leave", docs, token_budget=10, embeddings=Broken()), docs)
@@ -0,0 +1,104 @@
+import importlib.util
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.test import SimpleTestCase, override_settings
+
+from core.ai.rag import embeddings
+from core.ai.rag.embeddings import OnnxEmbeddings, mean_pool
+
+HAS_RUNTIMES = all(importlib.util.find_spec(m) for m in ("onnxruntime", "tokenizers", "sentence_transformers"))
+
+SENTENCES = [
+    "Employees are entitled to 18 days of paid leave per year.",
+    "The notice period for resignation is 30 days.",
+    "Harassment complaints go to the Internal Complaints Committee.",
+    "How many sick days do I get?",
+    "Candidate has five years of Django and PostgreSQL experience.",
+]
+
+
+def _cosine(a, b):
+    a, b = np.asarray(a), np.asarray(b)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+class MeanPoolTest(SimpleTestCase):
+    def test_padding_is_ignored_and_vectors_are_unit_length(self):
+        hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+        pooled = mean_pool(hidden, mask)
+        np.testing.assert_allclose(pooled, [[1.0, 0.0]])
+
+
+class OnnxEmbeddingsTest(SimpleTestCase):
+    def _embedder(self, inputs=("input_ids", "attention_mask", "token_type_ids")):
+        embedder = OnnxEmbeddings(model_name="unused", batch_size=2)
+        tokenizer = MagicMock()
+        # One token per character, padded to the longest text in the batch
+        tokenizer.encode_batch.side_effect = lambda texts: [
+            MagicMock(ids=[ord(c) for c in t.ljust(max(map(len, texts)))],
+                      attention_mask=[1] * len(t) + [0] * (max(map(len, texts)) - len(t)))
+            for t in texts
+        ]
+        session = MagicMock()
+        # Hidden state = token id in every dimension, so pooled vectors reveal which text they came from
+        session.run.side_effect = lambda _, feeds: [np.repeat(feeds["input_ids"][..., None], 3, axis=2).astype(float)]
+        embedder._tokenizer, embedder._session, embedder._input_names = tokenizer, session, set(inputs)
+        return embedder, session
+
+    def test_results_keep_input_order_across_length_sorted_batches(self):
+        embedder, session = self._embedder()
+        vectors = embedder.embed_documents(["ccc", "a", "bb"])
+
+        self.assertEqual(session.run.call_count, 2)
+        self.assertEqual(len(vectors), 3)
+        for vector in vectors:
+            self.assertEqual(len(vector), 3)
+            self.assertAlmostEqual(float(np.linalg.norm(vector)), 1.0)
+        # The first batch held the two shortest texts
+        first_batch = session.run.call_args_list[0].args[1]["input_ids"]
+        self.assertEqual(first_batch.shape, (2, 2))
+
+    def test_token_type_ids_only_when_the_graph_takes_them(self):
+        embedder, session = self._embedder(inputs=("input_ids", "attention_mask"))
+        embedder.embed_query("hello")
+        self.assertNotIn("token_type_ids", session.run.call_args.args[1])
+
+    @override_settings(HARVEY_EMBEDDING_QUANTIZED=True)
+    @patch.object(embeddings.platform, "machine", return_value="aarch64")
+    def test_quantized_setting_picks_the_platform_int8_export(self, machine):
+        self.assertEqual(OnnxEmbeddings().model_file, "onnx/model_qint8_arm64.onnx")
+        machine.return_value = "x86_64"
+        self.assertEqual(OnnxEmbeddings().model_file, "onnx/model_quint8_avx2.onnx")
+        self.assertEqual(OnnxEmbeddings(quantized=False).model_file, "onnx/model.onnx")
+
+    @override_settings(HARVEY_EMBEDDINGS="onnx")
+    def test_backend_is_selected_by_setting(self):
+        self.assertIsInstance(embeddings.get_embeddings(), OnnxEmbeddings)
+
+
+@skipUnless(HAS_RUNTIMES, "needs onnxruntime, tokenizers and sentence-transformers (downloads the model)")
+class EmbeddingParityTest(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reference = embeddings.huggingface_embeddings().embed_documents(SENTENCES)
+
+    def _assert_parity(self, embedder, min_cosine):
+        vectors = embedder.embed_documents(SENTENCES)
+        self.assertEqual(len(vectors[0]), 384)
+        for ours, theirs in zip(vectors, self.reference):
+            self.assertGreaterEqual(_cosine(ours, theirs), min_cosine)
+        # Same nearest neighbour for the query as the torch vectors
+        query = embedder.embed_query(SENTENCES[3])
+        ranked = sorted(range(len(SENTENCES)), key=lambda i: -_cosine(query, vectors[i]))
+        reference = sorted(range(len(SENTENCES)), key=lambda i: -_cosine(self.reference[3], self.reference[i]))
+        self.assertEqual(ranked[:2], reference[:2])
+
+    def test_fp32_matches_torch(self):
+        self._assert_parity(OnnxEmbeddings(quantized=False), 0.9999)
+
+    def test_int8_stays_close_to_torch(self):
+        self._assert_parity(OnnxEmbeddings(quantized=True), 0.98)
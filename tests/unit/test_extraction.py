@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from core.ai.utils import extraction
+from core.ai.utils.extraction import ExtractionError, ExtractionTimeout, extract_pages
+
+
+class ExtractionTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _file(self, name, content=""):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    @override_settings(HARVEY_EXTRACT_WORKERS=0)
+    def test_inline_extraction(self):
+        self.assertEqual(extract_pages(self._file("a.txt", "1. Intro\nHello\n")), ["1. Intro\nHello\n"])
+        with self.assertRaises(ExtractionError):
+            extract_pages(self._file("a.xyz"))
+
+    @override_settings(HARVEY_EXTRACT_WORKERS=1, HARVEY_EXTRACT_MEMORY_MB=0)
+    def test_pool_returns_only_text(self):
+        self.addCleanup(extraction.shutdown)
+        self.assertEqual(extract_pages(self._file("b.txt", "Leave is 20 days.")), ["Leave is 20 days."])
+        with self.assertRaises(ExtractionError):
+            extract_pages(self._file("b.xyz"))
+
+    @override_settings(HARVEY_EXTRACT_WORKERS=0)
+    def test_pdf_pages_come_back_in_batches(self):
+        def pages(path, first, last):
+            return [f"page {i}" for i in range(first, min(last, 5))]
+
+        with patch.object(extraction, "_pdf_page_count", return_value=5), \
+             patch.object(extraction, "_pdf_pages_pdfminer", side_effect=pages):
+            batches = list(extraction.iter_page_batches(self._file("h.pdf"), batch_pages=2))
+
+        self.assertEqual(batches, [(["page 0", "page 1"], 5), (["page 2", "page 3"], 5), (["page 4"], 5)])
+        self.assertEqual(list(extraction.iter_page_batches(self._file("h.txt", "Leave"))), [(["Leave"], 1)])
+
+    def test_worker_timeout_interrupts_parsing(self):
+        with patch.object(extraction, "_pdf_pages_pdfminer", side_effect=lambda path, *pages: time.sleep(5)):
+            started = time.perf_counter()
+            with self.assertRaises(ExtractionTimeout):
+                extraction._extract(self._file("slow.pdf"), timeout=0.2)
+        self.assertLess(time.perf_counter() - started, 2)
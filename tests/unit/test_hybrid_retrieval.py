@@ -0,0 +1,69 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from core.ai.rag.tools import policy_search_tool
+from core.ai.rag.tools.policy_search_tool import reciprocal_rank_fusion, retrieve_policy_chunks
+
+
+def _doc(policy_id, text, **metadata):
+    return Document(page_content=text, metadata={"policy_id": policy_id, **metadata})
+
+
+class ReciprocalRankFusionTest(SimpleTestCase):
+    def test_chunks_found_by_both_rankers_rise(self):
+        vector = [_doc("p", "a"), _doc("p", "b"), _doc("p", "c")]
+        lexical = [_doc("p", "c"), _doc("p", "d")]
+        fused = reciprocal_rank_fusion(vector, lexical)
+        self.assertEqual([d.page_content for d in fused], ["c", "a", "b", "d"])
+
+    def test_same_chunk_matches_across_whitespace_and_metadata(self):
+        vector = [_doc("p", "Notice  period\nis 30 days")]
+        lexical = [_doc("p", "Notice period is 30 days", chunk_index=4)]
+        self.assertEqual(len(reciprocal_rank_fusion(vector, lexical)), 1)
+        # Same text under another policy is a different chunk
+        self.assertEqual(len(reciprocal_rank_fusion(vector, [_doc("q", "Notice period is 30 days")])), 2)
+
+
+class HybridRetrievalTest(SimpleTestCase):
+    def setUp(self):
+        self.store = MagicMock()
+        self.store.similarity_search.return_value = [_doc("p", "vector hit"), _doc("p", "shared hit")]
+
+    @patch.object(policy_search_tool, "lexical_search")
+    def test_fuses_lexical_hits_under_tenant_filter(self, lexical):
+        lexical.return_value = [_doc("p", "shared hit"), _doc("p", "ICC contact details")]
+        docs = retrieve_policy_chunks("ICC", organization_id=7, k=5, top_n=3, rerank=False, vector_store=self.store)
+
+        lexical.assert_called_once_with("ICC", 7, 5)
+        _, kwargs = self.store.similarity_search.call_args
+        self.assertEqual(kwargs["filter"], {"doc_type": "policy", "organization_id": "7"})
+        self.assertEqual(kwargs["k"], 5)
+        self.assertEqual([d.page_content for d in docs], ["shared hit", "vector hit", "ICC contact details"])
+
+    @patch.object(policy_search_tool, "lexical_search")
+    def test_vector_only_without_org_or_when_lexical_fails(self, lexical):
+        retrieve_policy_chunks("leave", organization_id=None, rerank=False, vector_store=self.store)
+        lexical.assert_not_called()
+
+        lexical.side_effect = RuntimeError("db down")
+        docs = retrieve_policy_chunks("leave", organization_id=1, rerank=False, vector_store=self.store)
+        self.assertEqual([d.page_content for d in docs], ["vector hit", "shared hit"])
+
+
+class HydrateChunksTest(SimpleTestCase):
+    @patch("core.models.policy.PolicyChunk")
+    def test_text_less_vectors_are_filled_from_policy_chunks(self, PolicyChunk):
+        PolicyChunk.objects.filter.return_value.values_list.return_value = [(11, "Notice period is 30 days")]
+        docs = [_doc("p", "", chunk_id=11), _doc("p", "stored text", chunk_id=12), _doc("p", "", chunk_id=13)]
+
+        hydrated = policy_search_tool.hydrate_chunks(docs)
+
+        PolicyChunk.objects.filter.assert_called_once_with(id__in={11, 13})
+        # Chunk 13 was deleted since its vector was written, so it drops out
+        self.assertEqual([d.page_content for d in hydrated], ["Notice period is 30 days", "stored text"])
+
+    @patch("core.models.policy.PolicyChunk")
+    def test_no_query_when_every_vector_has_text(self, PolicyChunk):
+        docs = [_doc("p", "a", chunk_id=1), _doc("p", "b")]
+        self.assertEqual(policy_search_tool.hydrate_chunks(docs), docs)
+        PolicyChunk.objects.filter.assert_not_called()
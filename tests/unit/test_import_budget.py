@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from core import warmup
+from core.views.health import healthz, readyz
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# Loaded by warmup / the first chat turn, never by importing the app
+HEAVY_MODULES = [
+    "langgraph",
+    "langchain",
+    "langchain_groq",
+    "langchain_google_genai",
+    "langchain_huggingface",
+    "langchain_text_splitters",
+    "sentence_transformers",
+    "torch",
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+import core.consumers, core.signals, core.urls
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+class ImportBudgetTest(SimpleTestCase):
+    """Importing the app (what every manage.py command does) must not load the AI stack."""
+
+    def test_app_import_stays_light(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="project_harvey.settings")
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+        self.assertEqual(probe["loaded"], [])
+        budget = float(os.environ.get("HARVEY_IMPORT_BUDGET_S", "2"))
+        self.assertLess(probe["seconds"], budget, f"app import took {probe['seconds']:.2f}s")
+
+
+class WarmupTest(SimpleTestCase):
+    def setUp(self):
+        warmup._ready.clear()
+        warmup._status.update(state="pending", steps={})
+
+    def test_readyz_turns_ready_after_warmup(self):
+        request = RequestFactory().get("/readyz")
+        self.assertEqual(readyz(request).status_code, 503)
+        self.assertEqual(healthz(request).status_code, 200)
+
+        def broken():
+            raise RuntimeError("GROQ_API_KEY missing")
+
+        with patch.dict(warmup.STEPS, {"embeddings": lambda: None, "llm": broken}, clear=True):
+            steps = warmup.warmup()
+
+        self.assertIsInstance(steps["embeddings"], float)
+        self.assertIn("GROQ_API_KEY missing", steps["llm"])
+        response = readyz(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)["state"], "ready")
+
+    @override_settings(HARVEY_WARMUP=False)
+    def test_disabled_warmup_is_ready_at_once(self):
+        self.assertIsNone(warmup.start_warmup())
+        self.assertTrue(warmup.is_ready())
@@ -0,0 +1,117 @@
+import threading
+from datetime import timedelta
+from unittest.mock import patch
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from core import jobs
+from core.models.jobs import BackgroundJob
+from core.models.organization import Organization, User
+
+
+class BackgroundJobTest(TestCase):
+    def setUp(self):
+        self.calls = []
+        self.outcomes = []
+
+        def handler(entity_id):
+            self.calls.append(entity_id)
+            outcome = self.outcomes.pop(0) if self.outcomes else True
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        patcher = patch.dict(jobs.HANDLERS, {"test_job": handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue_coalesces_queued_jobs_per_entity(self):
+        first = jobs.enqueue("test_job", 1)
+        for _ in range(5):
+            self.assertEqual(jobs.enqueue("test_job", 1).id, first.id)
+        jobs.enqueue("test_job", 2)
+        self.assertEqual(BackgroundJob.objects.filter(status="queued").count(), 2)
+
+        with self.assertRaises(ValueError):
+            jobs.enqueue("unknown_kind", 1)
+
+    def test_running_job_does_not_absorb_new_work(self):
+        jobs.enqueue("test_job", 1)
+        running = jobs.claim()
+        again = jobs.enqueue("test_job", 1)
+        self.assertNotEqual(again.id, running.id)
+
+    def test_follow_up_waits_for_the_running_job_of_its_entity(self):
+        jobs.enqueue("test_job", 1)
+        running = jobs.claim()
+        follow_up = jobs.enqueue("test_job", 1)
+        jobs.enqueue("test_job", 2)
+
+        # Entity 2 is free; entity 1's follow-up is not claimed while the first run is going
+        self.assertEqual(jobs.claim().entity_id, "2")
+        self.assertIsNone(jobs.claim())
+
+        jobs.run(running)
+        self.assertEqual(jobs.claim().id, follow_up.id)
+
+    def test_worker_runs_ready_jobs_only(self):
+        jobs.enqueue("test_job", 1)
+        jobs.enqueue("test_job", 2, delay=3600)
+        jobs.work(threading.Event(), burst=True)
+
+        self.assertEqual(self.calls, ["1"])
+        self.assertEqual(BackgroundJob.objects.get(entity_id="1").status, "succeeded")
+        self.assertEqual(BackgroundJob.objects.get(entity_id="2").status, "queued")
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        self.outcomes = [RuntimeError("vector store down"), False, False]
+        job = jobs.enqueue("test_job", 7)
+        job.max_attempts = 3
+        job.save()
+
+        before = timezone.now()
+        self.assertFalse(jobs.run(jobs.claim()))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "queued")
+        self.assertIn("vector store down", job.last_error)
+        self.assertGreater(job.run_after, before + timedelta(seconds=5))
+
+        for _ in range(2):
+            BackgroundJob.objects.filter(id=job.id).update(run_after=timezone.now())
+            jobs.run(jobs.claim())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("failed", 3))
+
+    def test_retry_is_dropped_when_a_newer_job_is_queued(self):
+        self.outcomes = [False]
+        jobs.enqueue("test_job", 1)
+        running = jobs.claim()
+        newer = jobs.enqueue("test_job", 1)
+        jobs.run(running)
+
+        running.refresh_from_db()
+        self.assertEqual(running.status, "failed")
+        self.assertIn("superseded", running.last_error)
+        self.assertEqual(BackgroundJob.objects.get(status="queued").id, newer.id)
+
+    def test_stale_running_jobs_are_requeued(self):
+        jobs.enqueue("test_job", 1)
+        job = jobs.claim()
+        BackgroundJob.objects.filter(id=job.id).update(started_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(BackgroundJob.objects.get(id=job.id).status, "queued")
+
+
+class JobsApiTest(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org")
+        self.client = Client()
+        self.client.force_login(User.objects.create_user(username="admin", password="password", organization=self.org))
+        for i in range(3):
+            BackgroundJob.objects.create(kind="index_policy", entity_id=str(i), organization_id=self.org.id)
+
+    def test_limit_is_validated_and_clamped(self):
+        self.assertEqual(len(self.client.get(reverse("list_jobs") + "?limit=2").json()["jobs"]), 2)
+        self.assertEqual(len(self.client.get(reverse("list_jobs") + "?limit=100000").json()["jobs"]), 3)
+        for bad in ("abc", "0", "-5"):
+            self.assertEqual(self.client.get(reverse("list_jobs") + f"?limit={bad}").status_code, 400)
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+from django.test import SimpleTestCase
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from core.ai.agentic.graph.cassette import (
+    Cassette, CassetteChatModel, CassetteMiss, normalize_text, prompt_hash,
+)
+
+
+class ExplodingModel(FakeMessagesListChatModel):
+    def _generate(self, *args, **kwargs):
+        raise AssertionError("replay must not reach the provider")
+
+
+def _prompt(date):
+    return [SystemMessage(content=f"CURRENT DATE: {date}\nYou are Harvey."), HumanMessage(content="What is the leave policy?")]
+
+
+class CassetteTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "chat.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalization_ignores_dates_and_ids(self):
+        self.assertEqual(
+            normalize_text("Monday, October 19, 2026, 02:37 PM run 9b2f0c1e-8d7a-4c47-9a57-3f0b7c6f1d2e"),
+            normalize_text("Tuesday, October 20, 2026, 11:05 AM run 0d3e4f5a-1b2c-4d5e-8f9a-0b1c2d3e4f5a"),
+        )
+        self.assertEqual(
+            prompt_hash("m", _prompt("Monday, October 19, 2026, 02:37 PM")),
+            prompt_hash("m", _prompt("Friday, January 02, 2027, 09:00 AM")),
+        )
+        self.assertNotEqual(prompt_hash("m", _prompt("x")), prompt_hash("other", _prompt("x")))
+
+    def test_record_then_replay(self):
+        reply = AIMessage(
+            content="Employees get 12 days of casual leave.",
+            response_metadata={"token_usage": {"prompt_tokens": 321, "completion_tokens": 9}, "model_name": "m"},
+        )
+        recorder = CassetteChatModel(
+            inner=FakeMessagesListChatModel(responses=[reply]), cassette=Cassette(self.path, "record"), model_name="m",
+        )
+        recorded = recorder.invoke(_prompt("Monday, October 19, 2026, 02:37 PM"))
+        self.assertEqual(recorded.content, reply.content)
+
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.assertEqual(data["log"][0]["prompt_tokens"], 321)
+
+        player = CassetteChatModel(
+            inner=ExplodingModel(responses=[]), cassette=Cassette(self.path, "replay"), model_name="m",
+        )
+        with self.settings(HARVEY_LLM_CASSETTE_LATENCY=0):
+            replayed = player.invoke(_prompt("Friday, January 02, 2027, 09:00 AM"))
+            self.assertEqual(replayed.content, reply.content)
+            self.assertEqual(replayed.response_metadata["token_usage"]["prompt_tokens"], 321)
+
+            with self.assertRaises(CassetteMiss):
+                player.invoke([HumanMessage(content="Something never recorded")])
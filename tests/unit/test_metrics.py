@@ -0,0 +1,77 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from unittest.mock import patch
+from core.observability import metrics
+from core.views.metrics import metrics_view
+
+
+class FakePipeline:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def hincrbyfloat(self, key, field, amount):
+        self.ops.append(("incr", key, field, amount))
+
+    def hgetall(self, key):
+        self.ops.append(("get", key))
+
+    def execute(self):
+        out = []
+        for op in self.ops:
+            if op[0] == "incr":
+                bucket = self.store.setdefault(op[1], {})
+                bucket[op[2].encode()] = bucket.get(op[2].encode(), 0) + op[3]
+                out.append(True)
+            else:
+                out.append(dict(self.store.get(op[1], {})))
+        return out
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self.store)
+
+
+class MetricsRenderTest(SimpleTestCase):
+    def test_histogram_and_counter_exposition(self):
+        fake = FakeRedis()
+        with patch("core.redis_utils.get_redis_client", return_value=fake):
+            metrics.GRAPH_NODE_SECONDS.observe(0.03, node="ROUTER")
+            metrics.GRAPH_NODE_SECONDS.observe(2.0, node="ROUTER")
+            metrics.LLM_TOKENS.inc(120, model="llama-3.1-8b-instant", organization="1", kind="prompt")
+            body = metrics.render_metrics()
+
+        self.assertIn("# TYPE harvey_graph_node_seconds histogram", body)
+        self.assertIn('harvey_graph_node_seconds_bucket{node="ROUTER",le="0.025"} 0', body)
+        self.assertIn('harvey_graph_node_seconds_bucket{node="ROUTER",le="0.05"} 1', body)
+        self.assertIn('harvey_graph_node_seconds_bucket{node="ROUTER",le="+Inf"} 2', body)
+        self.assertIn('harvey_graph_node_seconds_count{node="ROUTER"} 2', body)
+        self.assertIn(
+            'harvey_llm_tokens_total{kind="prompt",model="llama-3.1-8b-instant",organization="1"} 120', body
+        )
+        # The TYPE line names the same family as the samples, or Prometheus treats them as untyped
+        self.assertIn("# TYPE harvey_llm_tokens_total counter", body)
+        self.assertNotIn("# TYPE harvey_llm_tokens counter", body)
+
+
+@patch("core.views.metrics.render_metrics", return_value="# metrics\n")
+class MetricsViewTest(SimpleTestCase):
+    def _get(self, **headers):
+        return metrics_view(RequestFactory().get("/metrics", **headers))
+
+    @override_settings(HARVEY_METRICS_TOKEN="s3cret", DEBUG=False)
+    def test_token_is_required(self, render):
+        self.assertEqual(self._get().status_code, 401)
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer nope").status_code, 401)
+        self.assertEqual(self._get(HTTP_AUTHORIZATION="Bearer s3cret").status_code, 200)
+
+    @override_settings(HARVEY_METRICS_TOKEN="")
+    def test_no_token_is_only_served_under_debug(self, render):
+        # Per-organization token usage must not be public on a default deploy
+        with override_settings(DEBUG=False):
+            self.assertEqual(self._get().status_code, 403)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self._get().status_code, 200)
@@ -0,0 +1,149 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from core.ai.rag import url_source
+from core.ai.rag.chunking import SectionChunker
+from core.ai.rag.policy_indexer import PolicyIndexer
+from core.ai.rag.policy_refresh import HostThrottle, check_policy
+from core.benchmarks.fake_site import FakeSite
+
+
+def _page(title, body, links=()):
+    anchors = "".join(f'<li><a href="{href}">{href}</a></li>' for href in links)
+    return f"<html><head><title>{title}</title></head><body><h1>{title}</h1><p>{body}</p><ul>{anchors}</ul></body></html>"
+
+
+SITE = {
+    "/handbook/": _page("Handbook", "Welcome to the employee handbook.", ["leave", "benefits#top", "https://other.example/x", "form.pdf", "/careers/"]),
+    "/handbook/leave": _page("Leave", "Employees get 20 days of annual leave.", ["/handbook/", "leave/parental"]),
+    "/handbook/benefits": _page("Benefits", "Health cover starts on day one.", ["/handbook/leave?print=1"]),
+    "/handbook/leave/parental": _page("Parental leave", "16 weeks of paid parental leave."),
+    # Same text as /handbook/leave under another URL
+    "/handbook/leave?print=1": _page("Leave", "Employees get 20 days of annual leave."),
+    # Same host, outside the handbook
+    "/careers/": _page("Careers", "We are hiring."),
+}
+
+
+class ParseHtmlTest(SimpleTestCase):
+    def test_text_keeps_headings_and_drops_scripts(self):
+        html = (
+            "<html><head><title> Leave  policy </title><style>p {}</style></head><body>"
+            "<h2>Annual <b>leave</b></h2><p>20 days.</p><script>track()</script>"
+            "<table><tr><td>Grade A</td><td>25 days</td></tr></table><!-- note --></body></html>"
+        )
+        title, text, links = url_source.parse_html(html.encode(), base_url="https://hr.example/policies/")
+
+        self.assertEqual(title, "Leave policy")
+        self.assertEqual(text, "## Annual leave\n20 days.\nGrade A 25 days")
+        self.assertEqual(links, [])
+        self.assertEqual(url_source.parse_html(b"  "), ("", "", []))
+
+    def test_demote_headings(self):
+        self.assertEqual(url_source.demote_headings("# A\ntext\n###### F"), "## A\ntext\n###### F")
+
+
+class CrawlTest(SimpleTestCase):
+    def test_breadth_first_same_host_with_duplicate_pages_dropped(self):
+        with FakeSite(SITE) as site:
+            pages = url_source.crawl(site.url("/handbook/"), max_pages=10, max_depth=2, concurrency=4)
+
+        self.assertEqual(
+            [p.url.replace(site.base_url, "") for p in pages],
+            ["/handbook/", "/handbook/leave", "/handbook/benefits", "/handbook/leave/parental"],
+        )
+        self.assertEqual([p.depth for p in pages], [0, 1, 1, 2])
+        self.assertEqual(len({p.content_hash for p in pages}), 4)
+        # The PDF, the other host and the pages outside /handbook/ were never requested
+        requested = [path for path, *_ in site.requests]
+        self.assertNotIn("/handbook/form.pdf", requested)
+        self.assertNotIn("/careers/", requested)
+
+    def test_scope_is_the_start_page_directory(self):
+        host, prefix = url_source.crawl_scope("https://hr.example/policies/leave.html")
+        self.assertEqual((host, prefix), ("hr.example", "/policies/"))
+        self.assertEqual(url_source.crawl_scope("https://hr.example"), ("hr.example", "/"))
+        self.assertIsNone(url_source.canonical_url("https://hr.example/blog/", host, prefix))
+        self.assertEqual(url_source.canonical_url("https://hr.example/policies/sick#a", host, prefix), "https://hr.example/policies/sick")
+
+    def test_unreachable_start_page_raises(self):
+        with FakeSite(SITE) as site:
+            with self.assertRaises(Exception):
+                url_source.crawl(site.url("/missing/"))
+
+    def test_depth_and_page_limits(self):
+        with FakeSite(SITE) as site:
+            shallow = url_source.crawl(site.url("/handbook/"), max_pages=10, max_depth=1)
+            capped = url_source.crawl(site.url("/handbook/"), max_pages=2, max_depth=2)
+
+        self.assertEqual(len(shallow), 3)
+        self.assertEqual(len(capped), 2)
+
+    def test_page_hash_matches_a_single_fetch(self):
+        # The refresh scheduler compares crawl-time hashes with url_source.fetch()
+        with FakeSite(SITE) as site:
+            crawled = url_source.crawl(site.url("/handbook/"), max_pages=1)[0]
+            fetched = url_source.fetch(site.url("/handbook/"))
+        self.assertEqual(crawled.content_hash, fetched.content_hash)
+
+
+@patch("core.ai.rag.policy_indexer.connection", MagicMock())
+@patch("core.ai.rag.policy_indexer.transaction", MagicMock())
+@patch("core.ai.rag.policy_indexer.PolicyChunk")
+@patch("core.ai.rag.policy_indexer.Policy")
+class CrawledPolicyIndexingTest(SimpleTestCase):
+    def test_each_page_is_its_own_section(self, Policy, PolicyChunk):
+        policy = MagicMock(id="p1", title="Handbook", source_type="url", metadata={"crawl": True})
+        policy.created_by.organization.id = 3
+        Policy.objects.get.return_value = policy
+        PolicyChunk.objects.bulk_create.side_effect = lambda chunks, **kwargs: chunks
+        store = MagicMock()
+        indexer = PolicyIndexer(vector_store=store)
+
+        with FakeSite(SITE) as site:
+            policy.external_url = site.url("/handbook/")
+            self.assertTrue(indexer.index_policy("p1"))
+
+        metadatas = [m for c in store.add_documents.call_args_list for m in c.args[1]]
+        self.assertIn("Parental leave > Parental leave", [m["section_path"] for m in metadatas])
+        self.assertEqual(policy.metadata["indexing"]["pages_total"], 4)
+        self.assertEqual(len(policy.metadata["fetch"]["pages"]), 3)
+
+    @patch("core.ai.rag.policy_indexer.take_fetched", return_value=None)
+    def test_policies_that_did_not_opt_in_index_only_their_url(self, take_fetched, Policy, PolicyChunk):
+        policy = MagicMock(id="p1", title="Handbook", source_type="url", metadata={})
+        policy.created_by.organization.id = 3
+        Policy.objects.get.return_value = policy
+        PolicyChunk.objects.bulk_create.side_effect = lambda chunks, **kwargs: chunks
+        indexer = PolicyIndexer(vector_store=MagicMock())
+
+        with FakeSite(SITE) as site:
+            policy.external_url = site.url("/handbook/")
+            self.assertTrue(indexer.index_policy("p1"))
+            self.assertEqual([path for path, *_ in site.requests], ["/handbook/"])
+        self.assertNotIn("pages", policy.metadata["fetch"])
+
+    def test_page_sections_survive_chunking(self, Policy, PolicyChunk):
+        text = "# Leave\n## Annual\n20 days.\n# Benefits\n## Health\nDay one."
+        paths = [meta["section_path"] for _, meta in SectionChunker().chunk(text)]
+        self.assertEqual(paths, ["Leave > Annual", "Benefits > Health"])
+
+
+@patch("core.jobs.enqueue")
+@patch("core.ai.rag.policy_refresh.Policy")
+class CrawledPolicyRefreshTest(SimpleTestCase):
+    def test_edit_below_the_start_page_queues_a_reindex(self, Policy, enqueue):
+        throttle = HostThrottle(delay=0)
+        with FakeSite(SITE) as site:
+            pages = url_source.crawl(site.url("/handbook/"))
+            fetch = {**pages[0].validators(), "pages": {p.url: p.validators() for p in pages[1:]}}
+            policy = MagicMock(
+                id="p1", external_url=site.url("/handbook/"), status="indexed", metadata={"crawl": True, "fetch": fetch}
+            )
+
+            self.assertEqual(check_policy(policy, throttle), "unchanged")
+            enqueue.assert_not_called()
+
+            site.touch("/handbook/leave/parental", _page("Parental leave", "20 weeks of paid parental leave."))
+            self.assertEqual(check_policy(policy, throttle), "changed")
+
+        enqueue.assert_called_once()
@@ -0,0 +1,126 @@
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase
+from django.utils import timezone
+from core.ai.rag import url_source
+from core.ai.rag.policy_indexer import PolicyIndexer
+from core.ai.rag.policy_refresh import HostThrottle, check_policy, is_due, take_fetched
+from core.benchmarks.fake_site import FakeSite
+
+HANDBOOK = "<html><body><h1>Leave</h1><p>20 days of annual leave.</p><script>var t = 1;</script></body></html>"
+
+
+def _policy(url, fetch=None, status="indexed"):
+    policy = MagicMock(id="p1", external_url=url, status=status, metadata={"fetch": fetch} if fetch else {})
+    policy.created_by.organization_id = 3
+    return policy
+
+
+class ConditionalFetchTest(SimpleTestCase):
+    def test_validators_turn_repeat_fetches_into_304s(self):
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            first = url_source.fetch(site.url("/leave"))
+            again = url_source.fetch(site.url("/leave"), previous=first.validators())
+
+        self.assertEqual(first.status, 200)
+        self.assertIn("# Leave", first.text)
+        self.assertNotIn("var t", first.text)
+        self.assertTrue(again.not_modified)
+        self.assertEqual(again.content_hash, first.content_hash)
+        self.assertEqual(site.requests[1][3]["If-None-Match"], first.etag)
+
+    def test_markup_only_change_keeps_the_content_hash(self):
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            first = url_source.fetch(site.url("/leave"))
+            site.touch("/leave", HANDBOOK.replace("var t = 1", "var t = 2"))
+            cosmetic = url_source.fetch(site.url("/leave"), previous=first.validators())
+            site.touch("/leave", HANDBOOK.replace("20 days", "25 days"))
+            edited = url_source.fetch(site.url("/leave"), previous=first.validators())
+
+        self.assertEqual(cosmetic.status, 200)
+        self.assertEqual(cosmetic.content_hash, first.content_hash)
+        self.assertNotEqual(edited.content_hash, first.content_hash)
+
+
+@patch("core.jobs.enqueue")
+@patch("core.ai.rag.policy_refresh.Policy")
+class CheckPolicyTest(SimpleTestCase):
+    def setUp(self):
+        self.throttle = HostThrottle(per_host=1, delay=0)
+        patcher = patch("core.ai.rag.policy_refresh.cache")
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_unchanged_page_is_not_reindexed(self, Policy, enqueue):
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            validators = url_source.fetch(site.url("/leave")).validators()
+            policy = _policy(site.url("/leave"), fetch=validators)
+            self.assertEqual(check_policy(policy, self.throttle), "unchanged")
+
+        self.assertEqual(site.statuses(), [200, 304])
+        enqueue.assert_not_called()
+        self.assertIn("checked_at", policy.metadata["fetch"])
+
+    def test_changed_text_queues_a_reindex(self, Policy, enqueue):
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            validators = url_source.fetch(site.url("/leave")).validators()
+            site.touch("/leave", HANDBOOK.replace("20 days", "25 days"))
+            policy = _policy(site.url("/leave"), fetch=validators)
+            self.assertEqual(check_policy(policy, self.throttle), "changed")
+
+        enqueue.assert_called_once_with("index_policy", "p1", organization_id=3)
+        # Stored validators only move once the re-index has fetched the new version
+        self.assertEqual(policy.metadata["fetch"]["content_hash"], validators["content_hash"])
+        # The changed page goes to the index job instead of being fetched again
+        key, page = self.cache.set.call_args.args
+        self.assertEqual(key, "harvey:policy_fetched:p1")
+        self.assertIn("25 days", page.text)
+
+    def test_index_job_uses_the_page_the_check_fetched(self, Policy, enqueue):
+        page = url_source.SourcePage(url="x", status=200, text="# Leave\n25 days", content_hash="h")
+        self.cache.get.return_value = page
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            policy = _policy(site.url("/leave"))
+            self.assertEqual(PolicyIndexer(vector_store=MagicMock())._extract_from_url(policy), "# Leave\n25 days")
+            self.assertEqual(site.requests, [])
+        self.cache.delete.assert_called_once_with("harvey:policy_fetched:p1")
+        self.assertEqual(policy.metadata["fetch"]["content_hash"], "h")
+
+        self.cache.get.return_value = None
+        self.assertIsNone(take_fetched("p1"))
+
+    def test_first_check_of_an_indexed_policy_records_a_baseline(self, Policy, enqueue):
+        with FakeSite({"/leave": HANDBOOK}) as site:
+            policy = _policy(site.url("/leave"))
+            self.assertEqual(check_policy(policy, self.throttle), "baseline")
+            failed = _policy(site.url("/leave"), status="failed")
+            self.assertEqual(check_policy(failed, self.throttle), "changed")
+
+        self.assertEqual(enqueue.call_count, 1)
+        self.assertTrue(policy.metadata["fetch"]["etag"])
+
+    def test_unreachable_page_is_an_error_not_a_change(self, Policy, enqueue):
+        with FakeSite({}) as site:
+            policy = _policy(site.url("/gone"), fetch={"content_hash": "abc"})
+            self.assertEqual(check_policy(policy, self.throttle), "error")
+        enqueue.assert_not_called()
+        self.assertIn("404", policy.metadata["fetch"]["error"])
+
+
+class ScheduleTest(SimpleTestCase):
+    def test_host_throttle_spaces_requests_per_host(self):
+        throttle = HostThrottle(per_host=1, delay=0.2)
+        starts = {}
+        for key, url in [("a1", "http://a.example/1"), ("b1", "http://b.example/1"), ("a2", "http://a.example/2")]:
+            with throttle.slot(url):
+                starts[key] = time.monotonic()
+
+        self.assertGreaterEqual(starts["a2"] - starts["a1"], 0.19)
+        self.assertLess(starts["b1"] - starts["a1"], 0.1)
+
+    def test_is_due(self):
+        cutoff = timezone.now() - timedelta(days=1)
+        self.assertTrue(is_due(_policy("http://x"), cutoff))
+        recent = _policy("http://x", fetch={"checked_at": timezone.now().isoformat()})
+        self.assertFalse(is_due(recent, cutoff))
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import uuid
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch
+from core.observability import profiling
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(i * i for i in range(200))
+
+
+class ProfilingTest(SimpleTestCase):
+    def setUp(self):
+        self.user = SimpleNamespace(id=7, organization_id=3, organization=SimpleNamespace(org_id="ORG-ABCD1234"))
+        self.run = SimpleNamespace(id=uuid.uuid4())
+
+    @override_settings(HARVEY_PROFILE_ORGS=["ORG-ABCD1234"], HARVEY_PROFILE_USERS=[], HARVEY_PROFILE_SAMPLE_RATE=0)
+    def test_opted_in_org_is_profiled(self):
+        self.assertTrue(profiling.should_profile(self.user))
+
+    @override_settings(HARVEY_PROFILE_ORGS=[], HARVEY_PROFILE_USERS=[], HARVEY_PROFILE_SAMPLE_RATE=0)
+    def test_cache_flag_opts_in(self):
+        with patch.object(profiling.cache, "get_many", return_value={}):
+            self.assertFalse(profiling.should_profile(self.user))
+        with patch.object(profiling.cache, "get_many", return_value={"harvey:profile:user:7": True}):
+            self.assertTrue(profiling.should_profile(self.user))
+
+    @override_settings(HARVEY_PROFILE_INTERVAL_MS=1, HARVEY_PROFILE_SLOW_MS=0)
+    def test_sampled_run_collects_stacks_and_allocations(self):
+        with patch.object(profiling, "should_profile", return_value=True), \
+             patch.object(profiling, "_build_profile", return_value="record") as build:
+            with profiling.profile_run(self.user, self.run) as result:
+                _busy(0.05)
+
+        self.assertEqual(result.records, ["record"])
+        run, profiler, allocations, duration_ms, reason, is_slow = build.call_args[0]
+        self.assertEqual(reason, "sampled")
+        self.assertFalse(is_slow)
+        self.assertGreater(profiler.samples, 0)
+        self.assertIn("_busy", profiler.collapsed())
+        self.assertTrue(allocations)
+
+    @override_settings(HARVEY_PROFILE_INTERVAL_MS=1, HARVEY_PROFILE_SLOW_MS=0)
+    def test_only_one_overlapping_run_is_traced(self):
+        inner_run = SimpleNamespace(id=uuid.uuid4())
+        with patch.object(profiling, "should_profile", return_value=True), \
+             patch.object(profiling, "_build_profile", return_value="record") as build:
+            with profiling.profile_run(self.user, self.run):
+                with profiling.profile_run(self.user, inner_run):
+                    _busy(0.01)
+                # The overlapping run didn't stop the outer run's tracing
+                self.assertTrue(tracemalloc.is_tracing())
+                kept = [bytearray(1024) for _ in range(100)]
+
+        self.assertFalse(tracemalloc.is_tracing())
+        inner, outer = (call.args[2] for call in build.call_args_list)
+        self.assertEqual(inner, [])
+        self.assertTrue(outer)
+        self.assertEqual(len(kept), 100)
+
+    def test_fast_unsampled_run_is_dropped(self):
+        with override_settings(HARVEY_PROFILE_SLOW_MS=10_000), \
+             patch.object(profiling, "should_profile", return_value=False):
+            with profiling.profile_run(self.user, self.run) as result:
+                pass
+        self.assertEqual(result.records, [])
+
+    def test_slow_run_writes_folded_file(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+             override_settings(HARVEY_PROFILE_SLOW_MS=20, HARVEY_PROFILE_SLOW_INTERVAL_MS=1, HARVEY_PROFILE_DIR=tmp), \
+             patch.object(profiling, "should_profile", return_value=False):
+            with profiling.profile_run(self.user, self.run) as result:
+                _busy(0.05)
+
+            fields = result.records[0]["fields"]
+            self.assertEqual(fields["reason"], "slow")
+            self.assertEqual(fields["allocations"], [])
+            path = os.path.join(tmp, f"{self.run.id}.folded")
+            self.assertEqual(fields["folded_path"], path)
+            with open(path, encoding="utf-8") as f:
+                line = f.readline().strip()
+            stack, count = line.rsplit(" ", 1)
+            self.assertIn(";", stack)
+            self.assertGreater(int(count), 0)
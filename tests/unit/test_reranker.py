@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+from django.test import SimpleTestCase
+from langchain_core.documents import Document
+from core.ai.rag.reranker import CrossEncoderReranker, Reranker, chunk_id
+
+
+class FakeCrossEncoder:
+    """Scores a pair by how many query words appear in the passage."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.calls.append(len(pairs))
+        return [sum(w in passage.lower() for w in query.lower().split()) for query, passage in pairs]
+
+
+def _docs(*texts):
+    return [Document(page_content=t, metadata={"policy_id": "p", "chunk_index": i}) for i, t in enumerate(texts)]
+
+
+class CrossEncoderRerankerTest(SimpleTestCase):
+    def setUp(self):
+        self.reranker = CrossEncoderReranker(model_name="fake", budget_ms=0, cache_size=8)
+        self.reranker._model = FakeCrossEncoder()
+
+    def test_orders_by_score_in_one_batch(self):
+        docs = _docs("holiday calendar", "notice period is 30 days", "the notice board")
+        ranked = self.reranker.rerank("notice period", docs, top_n=2)
+        self.assertEqual([d.page_content for d in ranked], ["notice period is 30 days", "the notice board"])
+        self.assertEqual(self.reranker._model.calls, [3])
+
+    def test_scores_are_cached_per_query_and_chunk(self):
+        docs = _docs("a", "b", "c")
+        self.reranker.rerank("q", docs)
+        self.reranker.rerank("Q ", docs + _docs("d", "e", "f", "g")[3:])
+        # Second call only scores the one new chunk (chunk_index 3); query is normalised
+        self.assertEqual(self.reranker._model.calls, [3, 1])
+        self.assertLessEqual(len(self.reranker.cache), 8)
+
+    def test_reindexed_chunk_text_is_scored_again(self):
+        self.reranker.rerank("notice", _docs("notice period", "holidays"))
+        # Same policy and chunk indexes, new text after a re-index
+        ranked = self.reranker.rerank("notice", _docs("holidays", "notice period"))
+        self.assertEqual([d.page_content for d in ranked], ["notice period", "holidays"])
+        self.assertEqual(self.reranker._model.calls, [2, 2])
+
+    def test_budget_limits_pairs_and_keeps_order_for_the_rest(self):
+        self.reranker.budget_ms = 10
+        self.reranker.pair_ms = 5  # as if measured: only two pairs fit
+        self.reranker._predict = MagicMock(return_value=[0.1, 0.9])
+        ranked = self.reranker.rerank("q", _docs("a", "b", "c", "d"))
+        self.assertEqual([d.page_content for d in ranked], ["b", "a", "c", "d"])
+        self.assertEqual(len(self.reranker._predict.call_args[0][0]), 2)
+
+    def test_model_failure_keeps_retrieval_order(self):
+        self.reranker._model.predict = MagicMock(side_effect=RuntimeError("oom"))
+        ranked = self.reranker.rerank("q", _docs("a", "b", "c"), top_n=2)
+        self.assertEqual([d.page_content for d in ranked], ["a", "b"])
+
+
+class ChunkIdTest(SimpleTestCase):
+    def test_owner_and_index_plus_text_hash(self):
+        self.assertTrue(chunk_id(_docs("x")[0]).startswith("policy_id=p#0#"))
+        self.assertNotEqual(chunk_id(_docs("x")[0]), chunk_id(_docs("y")[0]))
+        a = Document(page_content="same  text", metadata={"candidate_id": 4})
+        b = Document(page_content="same text", metadata={"candidate_id": 4})
+        self.assertEqual(chunk_id(a), chunk_id(b))
+        self.assertNotEqual(chunk_id(a), chunk_id(Document(page_content="other", metadata={"candidate_id": 4})))
+
+    def test_passthrough_reranker(self):
+        self.assertEqual([d.page_content for d in Reranker().rerank("q", _docs("a", "b"), top_n=1)], ["a"])
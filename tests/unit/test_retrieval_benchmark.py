@@ -0,0 +1,48 @@
+import json
+import os
+import tempfile
+from itertools import islice
+from django.test import SimpleTestCase
+from core.benchmarks.policy_corpus import (
+    TOPICS, generate_documents, is_relevant, load_corpus, score_ranking,
+)
+
+
+class PolicyCorpusTest(SimpleTestCase):
+    def test_generation_is_deterministic_and_labelled(self):
+        first = list(islice(generate_documents(seed=3), 5))
+        again = list(islice(generate_documents(seed=3), 5))
+        self.assertEqual(first, again)
+
+        document, facts = first[0]
+        self.assertEqual(len(facts), len(TOPICS))
+        for question, answer in facts:
+            self.assertIn(answer, document["text"])
+            # The company name disambiguates otherwise identical questions across handbooks
+            self.assertIn(document["title"].replace(" Employee Handbook", ""), question)
+
+    def test_answers_are_unique_across_documents(self):
+        answers = [a for _, facts in islice(generate_documents(), 50) for _, a in facts]
+        self.assertEqual(len(answers), len(set(answers)))
+
+    def test_relevance_ignores_chunk_whitespace(self):
+        answer = "Staff resigning from X must serve a notice period of 30 days."
+        self.assertTrue(is_relevant("4. Notice Period\nStaff resigning from X must serve\n a notice period of 30 days.", answer))
+        self.assertFalse(is_relevant("Staff resigning from X must serve a notice period", answer))
+
+    def test_score_ranking(self):
+        ranked = ["noise", "more noise", "the ANSWER is here", "ANSWER again"]
+        self.assertEqual(score_ranking(ranked, "ANSWER", 3), (True, True, 1 / 3))
+        self.assertEqual(score_ranking(ranked, "ANSWER", 2), (False, True, 1 / 3))
+        self.assertEqual(score_ranking(ranked, "missing", 3), (False, False, 0.0))
+
+    def test_load_corpus_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            docs_path, qrels_path = os.path.join(tmp, "docs.jsonl"), os.path.join(tmp, "q.jsonl")
+            with open(docs_path, "w") as f:
+                f.write(json.dumps({"id": "a", "title": "A", "text": "Leave is 20 days."}) + "\n\n")
+            with open(qrels_path, "w") as f:
+                f.write(json.dumps({"question": "How much leave?", "answer": "Leave is 20 days."}) + "\n")
+            documents, questions = load_corpus(docs_path, qrels_path)
+            self.assertEqual([d["id"] for d in documents], ["a"])
+            self.assertEqual(questions, [("How much leave?", "Leave is 20 days.")])
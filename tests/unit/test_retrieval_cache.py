@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from langchain_core.documents import Document
+from core.ai.rag import retrieval_cache
+from core.ai.rag.vector_store import VectorStore
+
+
+class FakeCache:
+    """The slice of the Django cache API retrieval_cache uses, in a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        return {k: self.data[k] for k in keys if k in self.data}
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def add(self, key, value, timeout=None):
+        return self.data.setdefault(key, value) is value
+
+    def incr(self, key, delta=1):
+        self.data[key] += delta
+        return self.data[key]
+
+
+@override_settings(HARVEY_RETRIEVAL_CACHE_SECONDS=600)
+class RetrievalCacheTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(retrieval_cache, "cache", FakeCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_normalized_queries_share_an_entry(self):
+        org = {"doc_type": "policy", "organization_id": "7"}
+        key, hits = retrieval_cache.lookup("harvey_vectors", "Holidays in December?", 5, org)
+        self.assertIsNone(hits)
+        retrieval_cache.store(key, [("v1", 0.1)])
+
+        self.assertEqual(retrieval_cache.lookup("harvey_vectors", "  holidays in  december", 5, org)[1], [("v1", 0.1)])
+        # k, filter and collection are part of the key
+        self.assertIsNone(retrieval_cache.lookup("harvey_vectors", "holidays in december", 3, org)[1])
+        self.assertIsNone(retrieval_cache.lookup("harvey_bench", "holidays in december", 5, org)[1])
+
+    def test_symbols_inside_terms_are_part_of_the_key(self):
+        self.assertNotEqual(retrieval_cache.normalize_query("C++"), retrieval_cache.normalize_query("C"))
+        self.assertNotEqual(retrieval_cache.normalize_query("C# developer"), retrieval_cache.normalize_query("C developer"))
+        self.assertEqual(retrieval_cache.normalize_query(" Senior  C++ developer? "), "senior c++ developer")
+
+    def test_writes_invalidate_only_their_tenant(self):
+        seven = {"organization_id": "7"}
+        eight = {"organization_id": "8"}
+        for flt in (seven, eight, None):
+            key, _ = retrieval_cache.lookup("c", "q", 5, flt)
+            retrieval_cache.store(key, [("v", 0.0)])
+
+        retrieval_cache.bump_index_version("7")
+
+        self.assertIsNone(retrieval_cache.lookup("c", "q", 5, seven)[1])
+        self.assertIsNotNone(retrieval_cache.lookup("c", "q", 5, eight)[1])
+        # Unscoped searches may include org 7's rows, so they are invalidated too
+        self.assertIsNone(retrieval_cache.lookup("c", "q", 5, None)[1])
+
+        retrieval_cache.bump_all()
+        self.assertIsNone(retrieval_cache.lookup("c", "q", 5, eight)[1])
+
+    @override_settings(HARVEY_RETRIEVAL_CACHE_SECONDS=0)
+    def test_disabled(self):
+        self.assertEqual(retrieval_cache.lookup("c", "q", 5), (None, None))
+
+
+@override_settings(HARVEY_RETRIEVAL_CACHE_SECONDS=600, HARVEY_VECTOR_QUANTIZATION="none")
+class CachedSimilaritySearchTest(SimpleTestCase):
+    def setUp(self):
+        patcher = patch.object(retrieval_cache, "cache", FakeCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with patch.object(VectorStore, "_initialize"):
+            self.store = VectorStore()
+        self.store.db = MagicMock()
+        self.store.db.similarity_search_with_score.return_value = [
+            (Document(id="v2", page_content="Holiday list", metadata={"organization_id": "7"}), 0.12),
+            (Document(id="v1", page_content="Leave policy", metadata={"organization_id": "7"}), 0.3),
+        ]
+        self.store._execute = MagicMock()
+        self.store._execute.return_value.fetchall.return_value = [
+            ("v1", "Leave policy", {"organization_id": "7"}),
+            ("v2", "Holiday list", {"organization_id": "7"}),
+        ]
+        self.filter = {"doc_type": "policy", "organization_id": "7"}
+
+    def test_repeat_query_skips_the_vector_scan(self):
+        first = self.store.similarity_search("holidays in December", k=2, filter=self.filter)
+        second = self.store.similarity_search("Holidays in december?", k=2, filter=self.filter)
+
+        self.store.db.similarity_search_with_score.assert_called_once()
+        self.assertEqual([d.page_content for d in first], [d.page_content for d in second])
+        self.assertEqual([d.id for d in second], ["v2", "v1"])
+
+    def test_index_write_for_the_tenant_forces_a_fresh_search(self):
+        self.store.similarity_search("holidays", k=2, filter=self.filter)
+        self.store.db.add_texts = MagicMock()
+        self.store.add_documents(["New holiday"], [{"organization_id": "7"}])
+        self.store.similarity_search("holidays", k=2, filter=self.filter)
+
+        self.assertEqual(self.store.db.similarity_search_with_score.call_count, 2)
+
+    def test_missing_rows_fall_back_to_a_search(self):
+        self.store.similarity_search("holidays", k=2, filter=self.filter)
+        self.store._execute.return_value.fetchall.return_value = [("v1", "Leave policy", {})]
+        self.store.similarity_search("holidays", k=2, filter=self.filter)
+
+        self.assertEqual(self.store.db.similarity_search_with_score.call_count, 2)
@@ -0,0 +1,55 @@
+from django.test import SimpleTestCase
+from core.ai.rag.chunking import SectionChunker, parse_heading, split_sections
+
+HANDBOOK = """Acme HR Handbook
+Effective 1 April 2024
+5. Leave Policy
+5.1 Types of Leave
+Employees receive 20 days of annual leave.
+1. Submit requests through the HR portal.
+5.2 Carry Forward
+Up to 5 unused days carry over to the next year.
+6. Code of Conduct
+Be respectful.
+# Remote Work
+## Eligibility
+Available after probation.
+"""
+
+
+class SectionChunkerTest(SimpleTestCase):
+    def test_heading_detection(self):
+        self.assertEqual(parse_heading("5.1 Types of Leave"), (2, "5.1 Types of Leave"))
+        self.assertEqual(parse_heading("12. Separation and Exit Policy"), (1, "12. Separation and Exit Policy"))
+        self.assertEqual(parse_heading("## Eligibility"), (2, "Eligibility"))
+        # Numbered sentences, years and lowercase continuations are body text
+        self.assertIsNone(parse_heading("1. Submit requests through the HR portal."))
+        self.assertIsNone(parse_heading("2024 Holiday Calendar"))
+        self.assertIsNone(parse_heading("30 days of notice"))
+
+    def test_sections_carry_their_hierarchy(self):
+        paths = [s.path for s in split_sections(HANDBOOK)]
+        self.assertEqual(paths, [
+            [],
+            ["5. Leave Policy", "5.1 Types of Leave"],
+            ["5. Leave Policy", "5.2 Carry Forward"],
+            ["6. Code of Conduct"],
+            ["Remote Work", "Eligibility"],
+        ])
+
+    def test_chunks_are_section_aligned(self):
+        chunks = list(SectionChunker(chunk_size=400).chunk(HANDBOOK))
+        text, meta = chunks[1]
+        self.assertTrue(text.startswith("5.1 Types of Leave\n"))
+        self.assertIn("Submit requests", text)
+        self.assertEqual(meta, {"section_path": "5. Leave Policy > 5.1 Types of Leave", "heading": "5.1 Types of Leave"})
+        self.assertNotIn("Carry Forward", text)
+
+    def test_long_sections_repeat_their_heading(self):
+        body = " ".join(f"Rule {i} applies to every employee without exception." for i in range(20))
+        chunks = list(SectionChunker(chunk_size=200, chunk_overlap=0).chunk(f"7. Travel\n{body}"))
+        self.assertGreater(len(chunks), 1)
+        for text, meta in chunks:
+            self.assertTrue(text.startswith("7. Travel\n"))
+            self.assertLessEqual(len(text), 200)
+            self.assertEqual(meta["heading"], "7. Travel")
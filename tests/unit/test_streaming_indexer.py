@@ -0,0 +1,154 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.ai.rag.policy_indexer import PolicyIndexer
+
+
+def _policy():
+    policy = MagicMock(id="p1", title="Handbook", metadata={}, indexed_at=None)
+    policy.created_by.organization.id = 3
+    return policy
+
+
+@patch("core.ai.rag.policy_indexer.PolicyChunk")
+@patch("core.ai.rag.policy_indexer.Policy")
+class StreamingIndexerTest(SimpleTestCase):
+    def setUp(self):
+        for name in ("transaction", "connection"):
+            patcher = patch(f"core.ai.rag.policy_indexer.{name}")
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _indexer(self, pages):
+        store = MagicMock()
+        indexer = PolicyIndexer(chunk_size=60, chunk_overlap=0, vector_store=store, batch_size=2)
+
+        def iter_text(policy, progress):
+            progress["pages_total"] = len(pages)
+            for page in pages:
+                yield page
+                progress["pages_done"] += 1
+
+        indexer._iter_text = iter_text
+        return indexer, store
+
+    def test_writes_in_batches_with_running_progress(self, Policy, PolicyChunk):
+        policy = _policy()
+        Policy.objects.get.return_value = policy
+        PolicyChunk.objects.bulk_create.side_effect = lambda chunks, **kwargs: chunks
+        pages = [f"{i}. Section {i}\nBody text of section {i}." for i in range(1, 6)]
+        indexer, store = self._indexer(pages)
+
+        self.assertTrue(indexer.index_policy("p1"))
+
+        batches = [c.args[0] for c in store.add_documents.call_args_list]
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        indexes = [m["chunk_index"] for c in store.add_documents.call_args_list for m in c.args[1]]
+        self.assertEqual(indexes, [0, 1, 2, 3, 4])
+        self.assertEqual(PolicyChunk.objects.bulk_create.call_count, 3)
+        self.assertEqual(policy.metadata["indexing"], {"pages_done": 5, "pages_total": 5, "chunks": 5})
+        self.assertEqual(policy.status, "indexed")
+
+    def test_new_index_is_staged_then_swapped_in(self, Policy, PolicyChunk):
+        policy = _policy()
+        Policy.objects.get.return_value = policy
+        PolicyChunk.objects.bulk_create.side_effect = lambda chunks, **kwargs: chunks
+        indexer, store = self._indexer(["1. Leave\n20 days.", "2. Travel\nEconomy class."])
+
+        self.assertTrue(indexer.index_policy("p1"))
+
+        # Nothing is deleted up front; every batch is written hidden from search
+        store.delete_by_policy_id.assert_not_called()
+        self.assertTrue(all(c.kwargs["staged"] for c in PolicyChunk.call_args_list))
+        doc_types = {m["doc_type"] for c in store.add_documents.call_args_list for m in c.args[1]}
+        self.assertEqual(doc_types, {"policy:staged"})
+        store.promote_staged.assert_called_once()
+        self.assertEqual(store.promote_staged.call_args.args[:2], ("policy_id", "p1"))
+        policy.chunks.filter.assert_any_call(staged=False)
+
+    def test_batches_are_written_before_extraction_finishes(self, Policy, PolicyChunk):
+        Policy.objects.get.return_value = _policy()
+        indexer, store = self._indexer([])
+        seen = []
+
+        def iter_text(policy, progress):
+            for i in range(1, 4):
+                yield f"{i}. Part {i}\nText {i}."
+                seen.append(store.add_documents.call_count)
+
+        indexer._iter_text = iter_text
+        indexer.index_policy("p1")
+        # The first batch (two chunks) is stored while the third page is still being read
+        self.assertEqual(seen, [0, 0, 1])
+
+    def test_failure_removes_partial_chunks(self, Policy, PolicyChunk):
+        policy = _policy()
+        Policy.objects.get.return_value = policy
+        indexer, store = self._indexer([])
+
+        def iter_text(policy, progress):
+            yield "1. Intro\nHello there."
+            yield "2. More\nStill fine."
+            raise OSError("truncated PDF")
+
+        indexer._iter_text = iter_text
+        self.assertFalse(indexer.index_policy("p1"))
+        self.assertEqual(policy.status, "failed")
+        self.assertEqual(policy.metadata["indexing"]["error"], "truncated PDF")
+        # Only the staged copy goes: before the run (leftovers) and after the failure
+        self.assertEqual(store.delete_staged.call_count, 2)
+        store.delete_by_policy_id.assert_not_called()
+        store.promote_staged.assert_not_called()
+
+    def test_failed_reindex_keeps_the_previous_index(self, Policy, PolicyChunk):
+        policy = _policy()
+        policy.indexed_at = "2026-01-01T00:00:00"
+        policy.metadata = {"fetch": {"etag": '"v1"', "content_hash": "old"}}
+        Policy.objects.get.return_value = policy
+        indexer, store = self._indexer([])
+
+        def iter_text(policy, progress):
+            policy.metadata["fetch"] = {"etag": '"v2"', "content_hash": "new"}
+            raise ConnectionError("site unreachable")
+            yield
+
+        indexer._iter_text = iter_text
+        self.assertFalse(indexer.index_policy("p1"))
+        self.assertEqual(policy.status, "indexed")
+        policy.chunks.filter.assert_called_with(staged=True)
+        store.delete_by_policy_id.assert_not_called()
+        # The refresh scheduler still compares against what the live index was built from
+        self.assertEqual(policy.metadata["fetch"], {"etag": '"v1"', "content_hash": "old"})
+
+    def test_empty_source_fails(self, Policy, PolicyChunk):
+        policy = _policy()
+        Policy.objects.get.return_value = policy
+        indexer, _ = self._indexer(["   \n"])
+        self.assertFalse(indexer.index_policy("p1"))
+        self.assertIn("No text extracted", policy.metadata["indexing"]["error"])
+
+    @override_settings(HARVEY_VECTOR_STORE_TEXT=False)
+    def test_chunks_and_vectors_are_linked(self, Policy, PolicyChunk):
+        PolicyChunk.side_effect = lambda **fields: MagicMock(pk=fields["chunk_index"] + 100, **fields)
+        PolicyChunk.objects.bulk_create.side_effect = lambda chunks, **kwargs: chunks
+        indexer, store = self._indexer([])
+        meta = {"source": "Handbook", "policy_id": "p1", "section_path": "", "heading": ""}
+
+        chunks = indexer.write_chunks(["a", "b"], [{**meta, "chunk_index": 0}, {**meta, "chunk_index": 1}])
+
+        _, metadatas = store.add_documents.call_args.args
+        kwargs = store.add_documents.call_args.kwargs
+        self.assertEqual(kwargs["ids"], [c.vector_id for c in chunks])
+        self.assertEqual(len(set(kwargs["ids"])), 2)
+        self.assertEqual([m["chunk_id"] for m in metadatas], [100, 101])
+        self.assertFalse(kwargs["store_text"])
+
+    def test_file_pages_stream_a_batch_at_a_time(self, Policy, PolicyChunk):
+        progress = {"pages_done": 0, "pages_total": None, "chunks": 0}
+        batches = iter([(["p1", "p2"], 3), (["p3"], 3)])
+        with patch("core.ai.rag.policy_indexer.iter_page_batches", return_value=batches):
+            pages = PolicyIndexer(vector_store=MagicMock())._iter_file(MagicMock(path="handbook.pdf"), progress)
+            self.assertEqual(next(pages), "p1")
+            # The total is known from the first batch, before the rest is extracted
+            self.assertEqual((progress["pages_done"], progress["pages_total"]), (0, 3))
+            self.assertEqual(list(pages), ["p2", "p3"])
+        self.assertEqual(progress["pages_done"], 3)
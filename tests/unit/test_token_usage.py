@@ -0,0 +1,64 @@
+from datetime import datetime, timezone as dt_timezone
+from django.test import SimpleTestCase
+from unittest.mock import patch, MagicMock
+from core.observability import usage
+from core.observability.context import turn_context
+
+
+class TokenUsageTest(SimpleTestCase):
+    def test_calls_are_aggregated_per_bucket(self):
+        acc = usage._UsageAccumulator()
+        now = datetime(2026, 10, 19, 14, 37, 12, tzinfo=dt_timezone.utc)
+        with patch.object(acc, "_ensure_flusher"):
+            acc.add(3, 7, "llama-3.1-8b-instant", "ROUTER", 100, 10, now=now)
+            acc.add(3, 7, "llama-3.1-8b-instant", "ROUTER", 50, 5, now=now.replace(second=40))
+            acc.add(3, 7, "llama-3.1-8b-instant", "SUM", 20, 2, now=now)
+
+        minute = datetime(2026, 10, 19, 14, 37, tzinfo=dt_timezone.utc)
+        day = datetime(2026, 10, 19, tzinfo=dt_timezone.utc)
+        self.assertEqual(acc._pending[("minute", minute, 3, 7, "llama-3.1-8b-instant", "ROUTER")], [150, 15, 2])
+        self.assertEqual(acc._pending[("day", day, 3, 7, "llama-3.1-8b-instant", "ROUTER")], [150, 15, 2])
+        self.assertEqual(len(acc._pending), 4)
+
+        cursor = MagicMock()
+        with patch.object(usage, "connection") as connection:
+            connection.cursor.return_value.__enter__.return_value = cursor
+            self.assertEqual(acc.flush(), 4)
+
+        sql, rows = cursor.executemany.call_args[0]
+        self.assertIn("ON CONFLICT ON CONSTRAINT token_usage_rollup_key DO UPDATE", sql)
+        self.assertIn("prompt_tokens + EXCLUDED.prompt_tokens", sql)
+        self.assertIn(("day", day, 3, 7, "llama-3.1-8b-instant", "SUM", 20, 2, 1), rows)
+        self.assertEqual(acc._pending, {})
+
+    def test_failed_flush_keeps_counts(self):
+        acc = usage._UsageAccumulator()
+        with patch.object(acc, "_ensure_flusher"):
+            acc.add(3, None, "m", "", 10, 1)
+        with patch.object(usage, "connection") as connection:
+            connection.cursor.side_effect = Exception("db down")
+            self.assertEqual(acc.flush(), 0)
+        self.assertEqual(sorted(c for c in acc._pending.values()), [[10, 1, 1], [10, 1, 1]])
+
+    def test_record_usage_attributes_turn(self):
+        with patch.object(usage, "ACCUMULATOR") as acc, patch.object(usage, "cache") as cache:
+            usage.record_usage("m", 10, 5)  # outside a turn: ignored
+            acc.add.assert_not_called()
+
+            with turn_context(organization_id=3, user_id=7), turn_context(node="HARVEY"):
+                usage.record_usage("m", 10, 5)
+
+        acc.add.assert_called_once_with(3, 7, "m", "HARVEY", 10, 5)
+        cache.incr.assert_called_once()
+        self.assertEqual(cache.incr.call_args[0][1], 15)
+
+    def test_budget_state(self):
+        with patch.object(usage, "_budget_limits", return_value=(1000, 5000)), \
+             patch.object(usage, "tokens_used_today", side_effect=[10, 1000, 5000]):
+            self.assertEqual(usage.budget_state(3), usage.BUDGET_OK)
+            self.assertEqual(usage.budget_state(3), usage.BUDGET_DOWNGRADE)
+            self.assertEqual(usage.budget_state(3), usage.BUDGET_THROTTLE)
+
+        with patch.object(usage, "_budget_limits", return_value=(None, None)):
+            self.assertEqual(usage.budget_state(3), usage.BUDGET_OK)
+        self.assertEqual(usage.budget_state(), usage.BUDGET_OK)
@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+from django.test import SimpleTestCase, override_settings
+from unittest.mock import patch
+from core.observability import tracing
+from adminpanel.views.runs import _waterfall_rows
+
+
+@override_settings(HARVEY_TRACING=True)
+class TracingTest(SimpleTestCase):
+    def test_nested_spans_are_exported_as_one_trace(self):
+        with patch.object(tracing._collector._queue, "put") as put:
+            with tracing.span("chat.generate_llm_reply", graph_run_id="run-1"):
+                with tracing.span("node.ROUTER"):
+                    llm = tracing.start_span("llm.call", model="llama-3.1-8b-instant")
+                    llm.finish()
+                with tracing.span("vector.similarity_search", k=5):
+                    pass
+
+        put.assert_called_once()
+        spans = {s["name"]: s for s in put.call_args[0][0]}
+        root = spans["chat.generate_llm_reply"]
+        self.assertIsNone(root["parent_id"])
+        self.assertEqual(spans["node.ROUTER"]["parent_id"], root["span_id"])
+        self.assertEqual(spans["llm.call"]["parent_id"], spans["node.ROUTER"]["span_id"])
+        self.assertEqual(spans["vector.similarity_search"]["attributes"]["k"], 5)
+        self.assertEqual(len({s["trace_id"] for s in spans.values()}), 1)
+
+    def test_jsonl_exporter_and_waterfall(self):
+        spans = [
+            {"trace_id": "t", "span_id": "a", "parent_id": None, "name": "root",
+             "start": 100.0, "duration_ms": 1000, "attributes": {}, "status": "ok", "error": None},
+            {"trace_id": "t", "span_id": "b", "parent_id": "a", "name": "node.HARVEY",
+             "start": 100.5, "duration_ms": 250, "attributes": {}, "status": "ok", "error": None},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "traces.jsonl")
+            tracing.JsonLinesExporter(path).export(spans)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["name"] for line in f], ["root", "node.HARVEY"])
+
+            # Past the size cap the file rotates instead of growing without bound
+            capped = tracing.JsonLinesExporter(path, max_bytes=1)
+            capped.export(spans[:1])
+            self.assertGreater(os.path.getsize(f"{path}.1"), 0)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)["name"] for line in f], ["root"])
+
+        rows, total_ms = _waterfall_rows(spans)
+        self.assertEqual(total_ms, 1000.0)
+        self.assertEqual([r["depth"] for r in rows], [0, 1])
+        self.assertEqual(rows[1]["offset_pct"], 50.0)
+        self.assertEqual(rows[1]["width_pct"], 25.0)
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock, patch
+from django.test import SimpleTestCase, override_settings
+from core.ai.rag.vector_store import VectorStore, metadata_filter
+
+
+def _store(quantization, collection_id="0f0e0d0c-0b0a-0908-0706-050403020100"):
+    with patch.object(VectorStore, "_initialize"):
+        store = VectorStore(collection_name="harvey_vectors", quantization=quantization)
+    store._collection_id = collection_id
+    store.embeddings = MagicMock()
+    store.embeddings.embed_query.return_value = [0.5, -0.25]
+    store._execute = MagicMock()
+    store.connection_string = "postgresql+psycopg://test"
+    return store
+
+
+class MetadataFilterTest(SimpleTestCase):
+    def test_equality_and_in(self):
+        where, params = metadata_filter({"doc_type": {"$in": ["candidate", "job"]}, "organization_id": 7})
+        self.assertEqual(where, " AND cmetadata->>'doc_type' = ANY(:f0) AND cmetadata->>'organization_id' = :f1")
+        self.assertEqual(params, {"f0": ["candidate", "job"], "f1": "7"})
+
+    def test_rejects_what_it_cannot_translate(self):
+        with self.assertRaises(ValueError):
+            metadata_filter({"doc_type": {"$ne": "policy"}})
+        with self.assertRaises(ValueError):
+            metadata_filter({"x' OR '1": "y"})
+
+
+class QuantizedIndexTest(SimpleTestCase):
+    def test_compact_index_is_built_on_the_expression(self):
+        store = _store("none")
+        store._execute.return_value.scalar.return_value = 384
+        name = store.ensure_ann_index("hnsw", scoped=True, quantization="binary")
+
+        ddl = [c.args[0] for c in store._execute.call_args_list if c.args[0].startswith("CREATE INDEX")][0]
+        self.assertIn("USING hnsw ((binary_quantize(embedding)::bit(384)) bit_hamming_ops)", ddl)
+        self.assertIn("WHERE collection_id = '0f0e0d0c-0b0a-0908-0706-050403020100'", ddl)
+        self.assertEqual(name, "harvey_embedding_hnsw_m16_ef64_binary_0f0e0d0c0b0a")
+
+    def test_unpinned_column_is_only_altered_on_request(self):
+        store = _store("none")
+        store._execute.return_value.scalar.return_value = -1  # bare `vector`
+        with self.assertRaises(ValueError):
+            store.ensure_ann_index("hnsw", scoped=True)
+        statements = [c.args[0] for c in store._execute.call_args_list]
+        self.assertFalse([sql for sql in statements if sql.startswith(("ALTER", "CREATE"))])
+
+        store.ensure_ann_index("hnsw", scoped=True, pin_dimension=True)
+        statements = [c.args[0] for c in store._execute.call_args_list]
+        self.assertIn("ALTER TABLE langchain_pg_embedding ALTER COLUMN embedding TYPE vector(384)", statements)
+
+    def test_unknown_quantization(self):
+        with self.assertRaises(ValueError):
+            _store("pq")
+
+
+class QuantizedSearchTest(SimpleTestCase):
+    @override_settings(HARVEY_VECTOR_RESCORE_FACTOR=0, HARVEY_RETRIEVAL_CACHE_SECONDS=0)
+    @patch("sqlalchemy.create_engine")
+    def test_scans_compact_expression_then_rescores(self, create_engine):
+        conn = create_engine.return_value.connect.return_value.__enter__.return_value
+        conn.execute.return_value.fetchall.return_value = [("v1", "Notice period is 30 days", {"policy_id": "p"}, 0.2)]
+        store = _store("halfvec")
+
+        docs = store.similarity_search("notice period", k=3, filter={"doc_type": "policy"})
+
+        self.assertEqual(store.rescore_factor, 2)
+        ef_search, query = [c.args[0].text for c in conn.execute.call_args_list]
+        self.assertEqual(ef_search, "SET LOCAL hnsw.ef_search = 40")
+        self.assertIn("ORDER BY (embedding::halfvec(384)) <=> CAST(:query AS halfvec(384)) LIMIT :scan", query)
+        self.assertIn("embedding <=> CAST(:query AS vector(384)) AS distance", query)
+        self.assertIn("ORDER BY distance LIMIT :k", query)
+        self.assertIn("cmetadata->>'doc_type' = :f0", query)
+        params = conn.execute.call_args_list[1].args[1]
+        self.assertEqual((params["scan"], params["k"], params["query"]), (6, 3, "[0.5,-0.25]"))
+        self.assertEqual(docs[0].page_content, "Notice period is 30 days")
+        self.assertEqual(docs[0].metadata, {"policy_id": "p"})
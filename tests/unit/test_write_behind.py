@@ -0,0 +1,103 @@
+import json
+import uuid
+from unittest.mock import MagicMock, patch
+from django.db import IntegrityError, OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from core.models.organization import Organization, User
+from core.models.chatbot import Conversation, Message, GraphRun
+from core.ai.agentic.graph.chat_service import _save_chat
+from core.ai.agentic.graph.write_behind import DEAD_LETTER_KEY, WriteBehindBuffer, apply_records, to_record
+
+
+@override_settings(HARVEY_WRITE_BEHIND=False)
+class WriteBehindTest(TestCase):
+    def setUp(self):
+        self.org = Organization.objects.create(name="Test Org")
+        self.user = User.objects.create_user(username="wb_user", password="password", organization=self.org)
+        self.convo = Conversation.objects.create(organization=self.org, user=self.user, title="WB")
+
+    def _run(self):
+        return GraphRun(
+            conversation=self.convo,
+            user=self.user,
+            input_text="Hi",
+            status="success",
+            output_text="Hello!",
+            finished_at=timezone.now(),
+        )
+
+    def test_save_chat_writes_run_and_encrypted_messages(self):
+        run = self._run()
+        ai_msg = _save_chat(self.convo, self.user, "Hi", "Hello!", run)
+
+        self.assertTrue(GraphRun.objects.filter(id=run.id, status="success").exists())
+        stored = list(Message.objects.filter(conversation=self.convo).order_by("timestamp", "id"))
+        self.assertEqual([m.sender for m in stored], ["user", "ai"])
+        self.assertTrue(stored[1].message_text.startswith("enc:"))
+        self.assertEqual(stored[1].text, "Hello!")
+        self.assertEqual(stored[1].timestamp, ai_msg.timestamp)
+
+    def test_replayed_records_are_idempotent(self):
+        run = self._run()
+        msg = Message(
+            sender="user",
+            message_text=Message.encrypt_text("Hi"),
+            conversation=self.convo,
+            organization=self.org,
+            client_id=uuid.uuid4(),
+        )
+        records = [to_record(run), to_record(msg)]
+
+        apply_records(records)
+        run.status = "error"
+        apply_records([to_record(run)] + records[1:])
+
+        self.assertEqual(Message.objects.filter(conversation=self.convo).count(), 1)
+        self.assertEqual(GraphRun.objects.get(id=run.id).status, "error")
+
+
+def _entry(n):
+    return (f"{n}-0".encode(), {b"data": json.dumps([{"model": "core.message", "fields": {"n": n}}]).encode()})
+
+
+@patch("core.ai.agentic.graph.write_behind.close_old_connections")
+class WriteBehindFailureTest(SimpleTestCase):
+    def setUp(self):
+        self.buffer = WriteBehindBuffer()
+        self.client = MagicMock()
+        self.buffer._client = lambda: self.client
+
+    @patch("core.ai.agentic.graph.write_behind.apply_records", side_effect=OperationalError("server closed the connection"))
+    def test_database_outage_leaves_entries_pending(self, apply, close):
+        self.assertEqual(self.buffer._process([_entry(1), _entry(2)]), 0)
+
+        # No dead letters, no ack: XAUTOCLAIM hands them to a flusher again later
+        self.client.xadd.assert_not_called()
+        self.client.xack.assert_not_called()
+        self.client.xdel.assert_not_called()
+
+    @patch("core.ai.agentic.graph.write_behind.apply_records")
+    def test_only_the_failing_entry_is_dead_lettered(self, apply, close):
+        def write(records):
+            if len(records) > 1 or records[0]["fields"]["n"] == 2:
+                raise IntegrityError("null value in column \"conversation_id\"")
+        apply.side_effect = write
+
+        self.assertEqual(self.buffer._process([_entry(1), _entry(2), _entry(3)]), 3)
+
+        self.client.xadd.assert_called_once()
+        self.assertEqual(self.client.xadd.call_args.args[0], DEAD_LETTER_KEY)
+        self.client.xack.assert_called_once_with(self.buffer.stream_key, "harvey-writers", b"1-0", b"2-0", b"3-0")
+
+    @patch("core.ai.agentic.graph.write_behind.apply_records")
+    def test_redrive_replays_dead_letters(self, apply, close):
+        def write(records):
+            if records[0]["fields"]["n"] == 2:
+                raise ValueError("Message has no field named 'n'")
+        apply.side_effect = write
+        self.client.xrange.side_effect = [[_entry(1), _entry(2)], []]
+
+        self.assertEqual(self.buffer.redrive(), (1, 1))
+        self.client.xdel.assert_called_once_with(DEAD_LETTER_KEY, b"1-0")
+        self.assertEqual(self.client.xrange.call_args.kwargs["min"], "(2-0")